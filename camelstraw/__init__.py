@@ -1,2 +1,25 @@
-from .core import HttpGetJob, HttpPostJob, WebsocketTextJob, WebsocketBinaryJob
-from .main import cmd_main, web_main, Launcher
+from .util.modules import lazy_exports
+
+# nothing heavy is imported until a name is used
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'HttpGetJob': '.core',
+    'HttpPostJob': '.core',
+    'WebsocketTextJob': '.core',
+    'WebsocketBinaryJob': '.core',
+    'Scenario': '.core',
+    'Step': '.core',
+    'Replay': '.core',
+    'TcpJob': '.core',
+    'UdpJob': '.core',
+    'TlsOptions': '.net',
+    'FilePayload': '.net',
+    'Thresholds': '.core',
+    'cmd_main': '.main',
+    'web_main': '.main',
+    'compare_main': '.main',
+    'target_main': '.main',
+    'Launcher': '.main'
+})
+__all__ = ['HttpGetJob', 'HttpPostJob', 'WebsocketTextJob', 'WebsocketBinaryJob', 'Scenario', 'Step', 'Replay',
+           'TcpJob', 'UdpJob', 'TlsOptions', 'FilePayload', 'Thresholds', 'cmd_main', 'web_main', 'compare_main',
+           'target_main', 'Launcher']
@@ -0,0 +1,7 @@
+from ..util.modules import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'SampleAnalyser': '.analysers',
+    'SAMPLE_DTYPE': '.analysers'
+})
+__all__ = ['SampleAnalyser', 'SAMPLE_DTYPE']
@@ -0,0 +1,197 @@
+import glob
+import json
+import os
+
+import numpy as np
+
+from ..core.interfaces import AnalyseResult
+from ..core.samples import SAMPLE_STRUCT, SAMPLE_SUCCESS, SAMPLE_WARMUP, LEGACY_SAMPLE_FORMAT
+from ..net import ErrorType, is_success
+from ..settings import SAMPLE_CHUNK_SIZE
+from ..util import Histogram, readonly
+
+# numpy view of the records written by SampleWriter
+SAMPLE_DTYPE = np.dtype([('start', '<i8'), ('latency', '<i4'), ('status', '<i2'), ('job', '<u2'), ('flags', 'u1')])
+assert SAMPLE_DTYPE.itemsize == SAMPLE_STRUCT.size
+# records of the files written before the flags were added
+LEGACY_SAMPLE_DTYPE = np.dtype([('start', '<i8'), ('latency', '<i4'), ('status', '<i2'), ('job', '<u2')])
+
+# 10 ** n, used to count digits of integer latencies without floating errors
+POWERS = 10 ** np.arange(19, dtype=np.int64)
+
+
+def bucket(latency):
+    """
+    vectorized Histogram.bucket
+    :param latency: integer array (milliseconds)
+    :return:
+    """
+    latency = np.maximum(latency, 0).astype(np.int64)
+    digits = np.searchsorted(POWERS, latency, side='right')
+    magnitude = POWERS[np.maximum(digits - 3, 0)]
+    return latency // magnitude * magnitude
+
+
+class SampleAggregate:
+    """
+    partial statistics accumulated chunk by chunk
+    """
+    def __init__(self):
+        self.total_request = 0
+        self.success_request = 0
+        self.start_time = None
+        self.stop_time = None
+        self.histogram = Histogram()
+        self.series = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def update(self, start, latency, status, success):
+        """
+        :param start: start time array (ms)
+        :param latency: latency array (ms)
+        :param status: status code array, errors are negative ErrorType values
+        :param success: boolean array
+        :return:
+        """
+        if len(start) == 0:
+            return
+        self.total_request += len(start)
+        self.success_request += int(np.count_nonzero(success))
+        start_time, stop_time = int(start.min()), int((start + latency).max())
+        self.start_time = start_time if self.start_time is None else min(self.start_time, start_time)
+        self.stop_time = stop_time if self.stop_time is None else max(self.stop_time, stop_time)
+        # latency distribution, the exact part is counted by bincount which is much cheaper than sorting
+        latency = np.maximum(latency, 0)
+        small = latency < 1000
+        exact = np.bincount(latency[small])
+        for value in np.flatnonzero(exact).tolist():
+            self.histogram.record(value, int(exact[value]))
+        buckets, counts = np.unique(bucket(latency[~small]), return_counts=True)
+        for value, count in zip(buckets.tolist(), counts.tolist()):
+            self.histogram.record(value, count)
+        # per-second throughput
+        seconds = start // 1000
+        base = int(seconds.min())
+        totals = np.bincount(seconds - base)
+        successes = np.bincount(seconds - base, weights=success, minlength=len(totals))
+        for offset in np.flatnonzero(totals).tolist():
+            counts = self.series.setdefault(base + offset, [0, 0])
+            counts[0] += int(totals[offset])
+            counts[1] += int(successes[offset])
+        # status codes & error types
+        codes, counts = np.unique(status, return_counts=True)
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            if code >= 0:
+                self.statuses[code] = self.statuses.get(code, 0) + count
+            else:
+                try:
+                    phrase = ErrorType(-code).phrase
+                except ValueError:
+                    phrase = ErrorType.OTHER.phrase
+                self.errors[phrase] = self.errors.get(phrase, 0) + count
+
+    def result(self, _id, jobs=None):
+        start_time = self.start_time or 0
+        stop_time = self.stop_time or 0
+        latency = stop_time - start_time
+        return AnalyseResult(_id=_id, total_request=self.total_request, success_request=self.success_request,
+                             latency=latency, qps=self.success_request * 1000 // max(1, latency),
+                             start_time=start_time, stop_time=stop_time, histogram=self.histogram,
+                             series=self.series, statuses=self.statuses, errors=self.errors, jobs=jobs)
+
+
+class SampleAnalyser:
+    """
+    analyse raw samples written by workers, files are memory-mapped and
+    processed chunk by chunk with vectorized operations, so that the
+    samples never have to fit in memory at once
+    """
+    def __init__(self, path, chunk_size=SAMPLE_CHUNK_SIZE, success=None):
+        """
+        :param path: sample file, or a directory containing sample files of a run
+        :param chunk_size: rows processed at a time
+        :param success: vectorized predicate of a status code array, every 2xx status code is a success by default,
+        only used for the files written without the success flag, the others tell what the job counted
+        """
+        if os.path.isdir(path):
+            files = sorted(glob.glob(os.path.join(path, '*.bin')))
+        else:
+            files = [path]
+        # properties
+        readonly(self, 'path', lambda: path)
+        readonly(self, 'files', lambda: files)
+        readonly(self, 'chunk_size', lambda: max(1, int(chunk_size)))
+        readonly(self, 'success', lambda: success or is_success)
+
+    @staticmethod
+    def load(path):
+        """
+        memory-map a sample file without copying
+        :param path:
+        :return: (record array, job names)
+        """
+        names, dtype = [], SAMPLE_DTYPE
+        if os.path.exists(path + '.json'):
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            names = meta.get('jobs', [])
+            if meta.get('format', None) == LEGACY_SAMPLE_FORMAT:
+                dtype = LEGACY_SAMPLE_DTYPE
+        # ignore a partially written trailing record
+        count = os.path.getsize(path) // dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype), names
+        return np.memmap(path, dtype=dtype, mode='r', shape=(count,)), names
+
+    def chunks(self):
+        """
+        iterate all samples chunk by chunk, job indices are translated
+        into indices of the global job name list
+        :return: generator of (chunk, global job indices, global job names)
+        """
+        names = []
+
+        def index(name):
+            if name not in names:
+                names.append(name)
+            return names.index(name)
+
+        for path in self.files:
+            samples, local_names = self.load(path)
+            if len(samples) == 0:
+                continue
+            mapping = [index(name) for name in local_names]
+            # records without a known job name fall into an unnamed job
+            top = int(samples['job'].max()) + 1
+            if top > len(mapping):
+                mapping.extend([index('')] * (top - len(mapping)))
+            mapping = np.array(mapping, dtype=np.int64)
+            for offset in range(0, len(samples), self.chunk_size):
+                chunk = samples[offset:offset + self.chunk_size]
+                yield chunk, mapping[chunk['job']], names
+
+    def analyse(self, _id='samples'):
+        """
+        :param _id: id of the returned result
+        :return: AnalyseResult with histogram, series, statuses and per-job breakdowns
+        """
+        total, jobs, names = SampleAggregate(), {}, []
+        for chunk, job_indices, names in self.chunks():
+            if 'flags' in chunk.dtype.names:
+                # the warmup is reported apart from the measured result, as it's by the workers
+                measured = (chunk['flags'] & SAMPLE_WARMUP) == 0
+                chunk, job_indices = chunk[measured], job_indices[measured]
+                success = (chunk['flags'] & SAMPLE_SUCCESS) != 0
+            else:
+                success = np.asarray(self.success(chunk['status']), dtype=bool)
+            start = chunk['start']
+            latency = chunk['latency'].astype(np.int64)
+            status = chunk['status']
+            total.update(start, latency, status, success)
+            for index in np.unique(job_indices).tolist():
+                mask = job_indices == index
+                jobs.setdefault(index, SampleAggregate()).update(start[mask], latency[mask], status[mask],
+                                                                 success[mask])
+        job_results = {names[index]: job.result(names[index]) for index, job in jobs.items()}
+        return total.result(_id, jobs=job_results)
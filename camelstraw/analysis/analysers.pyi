@@ -0,0 +1,43 @@
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from ..core.interfaces import AnalyseResult
+from ..settings import SAMPLE_CHUNK_SIZE
+from ..util import Histogram
+
+SAMPLE_DTYPE: np.dtype
+LEGACY_SAMPLE_DTYPE: np.dtype
+POWERS: np.ndarray
+
+
+def bucket(latency: np.ndarray) -> np.ndarray: pass
+
+
+class SampleAggregate:
+    total_request: int
+    success_request: int
+    start_time: int
+    stop_time: int
+    histogram: Histogram
+    series: Dict[int, List[int]]
+    statuses: Dict[int, int]
+    errors: Dict[str, int]
+
+    def __init__(self): pass
+    def update(self, start: np.ndarray, latency: np.ndarray, status: np.ndarray, success: np.ndarray) -> None: pass
+    def result(self, _id: str, jobs: Dict[str, AnalyseResult]=None) -> AnalyseResult: pass
+
+
+class SampleAnalyser:
+    path: str
+    files: List[str]
+    chunk_size: int
+    success: Callable[[np.ndarray], np.ndarray]
+
+    def __init__(self, path: str, chunk_size: int=SAMPLE_CHUNK_SIZE,
+                 success: Callable[[np.ndarray], np.ndarray]=None): pass
+    @staticmethod
+    def load(path: str) -> Tuple[np.ndarray, List[str]]: pass
+    def chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray, List[str]]]: pass
+    def analyse(self, _id: str='samples') -> AnalyseResult: pass
@@ -1,4 +1,23 @@
-from .job import HttpGetJob, HttpPostJob, WebsocketTextJob, WebsocketBinaryJob, JobContainer
-from .worker import Worker
-from .slave import Slave
-from .master import Master
+from ..util.modules import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'HttpGetJob': '.job',
+    'HttpPostJob': '.job',
+    'WebsocketTextJob': '.job',
+    'WebsocketBinaryJob': '.job',
+    'JobContainer': '.job',
+    'Scenario': '.scenario',
+    'Step': '.scenario',
+    'Replay': '.replay',
+    'TcpJob': '.sockets',
+    'UdpJob': '.sockets',
+    'Worker': '.worker',
+    'Slave': '.slave',
+    'Master': '.master',
+    'DirectMaster': '.direct',
+    'Relay': '.relay',
+    'Thresholds': '.thresholds'
+})
+__all__ = ['HttpGetJob', 'HttpPostJob', 'WebsocketTextJob', 'WebsocketBinaryJob', 'JobContainer', 'Scenario', 'Step',
+           'Replay', 'TcpJob', 'UdpJob', 'Worker', 'Slave', 'Master',
+           'DirectMaster', 'Relay', 'Thresholds']
@@ -0,0 +1,91 @@
+from asyncio import Event
+
+from ..util import readonly
+
+
+class RequestBudget:
+    """
+    a fixed number of requests shared by all the jobs of a worker, a request
+    loop takes a ticket before sending and marks it done once the request is
+    recorded, the budget is finished right after the last ticket is done
+    """
+    def __init__(self, total, held=False):
+        """
+        :param total:
+        :param held: hand out tickets without counting them until opened, so that the requests
+        of a warmup don't use up the budget
+        """
+        self.__remaining = total
+        self.__completed = 0
+        self.__held = held
+        # tickets handed out while held and not done yet
+        self.__pending = 0
+        # created inside the event loop running the jobs
+        self.__finished = Event()
+        if total <= 0:
+            self.__finished.set()
+        # properties
+        readonly(self, 'total', lambda: total)
+        readonly(self, 'remaining', lambda: self.__remaining)
+        readonly(self, 'completed', lambda: self.__completed)
+
+    @staticmethod
+    def split(total, parts):
+        """
+        split the budget into shares whose sizes differ by at most one
+        :param total:
+        :param parts:
+        :return: list of shares
+        """
+        quotient, remainder = divmod(total, parts)
+        return [quotient + (1 if i < remainder else 0) for i in range(parts)]
+
+    def acquire(self):
+        """
+        take a ticket for the next request
+        :return: False if all the tickets are taken
+        """
+        if self.__held:
+            self.__pending += 1
+            return True
+        if self.__remaining <= 0:
+            return False
+        self.__remaining -= 1
+        return True
+
+    def release(self):
+        """
+        give back a ticket which is not used by a request
+        :return:
+        """
+        if self.__held:
+            self.__pending -= 1
+            return
+        self.__remaining += 1
+
+    def done(self):
+        """
+        mark a ticket as used once its request is recorded
+        :return:
+        """
+        if self.__held:
+            self.__pending -= 1
+            return
+        self.__completed += 1
+        if self.__completed >= self.total:
+            self.__finished.set()
+
+    def open(self):
+        """
+        start counting the tickets, the requests in flight keep theirs and are counted once done,
+        as they are recorded after the warmup
+        :return:
+        """
+        if not self.__held:
+            return
+        self.__held = False
+        self.__remaining -= self.__pending
+        self.__pending = 0
+
+    async def wait(self):
+        await self.__finished.wait()
@@ -0,0 +1,24 @@
+import asyncio
+from asyncio import Event
+from typing import List
+
+
+class RequestBudget:
+    __remaining: int
+    __completed: int
+    __finished: Event
+    __held: bool
+    __pending: int
+
+    total: int
+    remaining: int
+    completed: int
+
+    def __init__(self, total: int, held: bool=False): pass
+    @staticmethod
+    def split(total: int, parts: int) -> List[int]: pass
+    def acquire(self) -> bool: pass
+    def release(self) -> None: pass
+    def done(self) -> None: pass
+    def open(self) -> None: pass
+    async def wait(self) -> asyncio.coroutine: pass
@@ -0,0 +1,195 @@
+import time
+from threading import Thread
+
+from .interfaces import AnalyseResult
+from .profiles import profile_options, write_run_profiles
+from .thresholds import ThresholdWatch
+from .worker import WorkerManager
+from ..net import get_host_ip
+from ..settings import PROFILE_DIR, HEALTH_INTERVAL
+from ..util import uid, readonly
+
+
+class DirectMaster:
+    """
+    master of a single host run, it drives the worker pool in its own process
+    instead of serving slaves over websockets, so neither the master service
+    nor a slave process is started. it offers the same interface and results
+    as Master, this host being the only slave, so the launchers take either
+    """
+    # worker pool kept warm between runs of the session unless released
+    __manager = None
+
+    def __init__(self, *jobs, worker_num=None, requests=None, rate=None, profile=None, warmup=None,
+                 thresholds=None):
+        """
+        :param rate: requests per second of all the workers together
+        :param profile: profile every worker, 'cprofile', 'sample' or the dict of profile_options
+        :param warmup: seconds every round runs before it's measured, see Master
+        :param thresholds: Thresholds checked against the live counters while waiting or watching
+        """
+        if warmup is not None and warmup < 0:
+            raise ValueError('warmup should not be negative')
+        profile = profile_options(profile)
+        self.__jobs = list(jobs)
+        self.__result = None
+        self.__slave_results = {}
+        self.__startup = {}
+        self.__pinning = {}
+        self.__run_id = uid()
+        # seconds (epoch) the running round is measured from, and the breach aborting it
+        self.__since = None
+        self.__abort = None
+        # properties
+        readonly(self, 'jobs', lambda: self.__jobs)
+        readonly(self, 'result', lambda: self.__result)
+        readonly(self, 'slave_results', lambda: self.__slave_results)
+        readonly(self, 'startup', lambda: self.__startup)
+        readonly(self, 'pinning', lambda: self.__pinning)
+        readonly(self, 'worker_num', lambda: worker_num)
+        readonly(self, 'requests', lambda: requests)
+        readonly(self, 'rate', lambda: rate)
+        readonly(self, 'profile', lambda: profile)
+        readonly(self, 'warmup', lambda: warmup)
+        readonly(self, 'thresholds', lambda: thresholds)
+        readonly(self, 'run_id', lambda: self.__run_id)
+
+    def start(self):
+        manager = DirectMaster.__manager
+        if manager is None:
+            manager = DirectMaster.__manager = WorkerManager(self.worker_num, run_id=self.run_id,
+                                                             requests=self.requests, rate=self.rate,
+                                                             profile=self.profile, warmup=self.warmup)
+        else:
+            manager.reset(self.worker_num, run_id=self.run_id, requests=self.requests, rate=self.rate,
+                          profile=self.profile, warmup=self.warmup)
+        # every job runs on this host, broadcast or not
+        [manager.dispatch(job) for job in self.jobs]
+        self.__measure()
+        manager.start()
+
+    def restart(self, **params):
+        """
+        start another round with the alive workers, the running round is dropped
+        :param params: job arguments to override, concurrency for example
+        :return:
+        """
+        self.__measure()
+        DirectMaster.__manager.restart(**params)
+
+    def collect(self):
+        """
+        stop the running round and gather its result, the workers keep alive
+        :return: AnalyseResult
+        """
+        DirectMaster.__manager.stop()
+        return self.__gather()
+
+    def wait(self):
+        """
+        block until every worker sends its share of the request budget, and
+        gather the result
+        :return: AnalyseResult
+        """
+        assert self.requests is not None
+        manager = DirectMaster.__manager
+        if self.thresholds is None:
+            manager.wait()
+            return self.__gather()
+        # the thresholds are checked meanwhile, a breach stops the workers which ends the waiting
+        waiter = Thread(target=manager.wait, daemon=True)
+        waiter.start()
+        self.__watch(lambda: not waiter.is_alive())
+        waiter.join()
+        return self.__gather()
+
+    def watch(self, timeout):
+        """
+        block until a threshold is breached, which stops the running round, or the timeout passes
+        :param timeout: seconds
+        :return: the breach, None if none
+        """
+        if self.thresholds is None:
+            time.sleep(timeout)
+            return None
+        return self.__watch(lambda: False, time.time() + timeout)
+
+    def health(self):
+        """
+        latest health samples of the running round
+        :return: host -> worker id -> sample
+        """
+        return {get_host_ip(): DirectMaster.__manager.health}
+
+    def progress(self):
+        """
+        live counters of the running round, read from the shared memory of the workers
+        :return: dict of the counters, None if no round is running
+        """
+        manager = DirectMaster.__manager
+        if manager is None or not manager.running:
+            return None
+        return manager.progress
+
+    def write_profiles(self, directory=PROFILE_DIR):
+        """
+        write the profile of the last result, and the one of this host
+        :param directory:
+        :return: paths of the written files, the merged one first
+        """
+        return write_run_profiles(self.run_id, self.result, self.slave_results, directory)
+
+    def stop(self, release=True):
+        self.collect()
+        self.close(release)
+
+    def close(self, release=True):
+        """
+        stop the running round
+        :param release: let the worker processes exit, otherwise they are kept warm
+        for the next direct master of the session
+        :return:
+        """
+        manager = DirectMaster.__manager
+        if manager is None:
+            return
+        if release:
+            DirectMaster.__manager = None
+            manager.close()
+        else:
+            manager.stop()
+
+    def __measure(self):
+        self.__since = time.time() + (self.warmup or 0)
+        self.__abort = None
+
+    def __watch(self, finished, deadline=None):
+        """
+        check the thresholds against the live counters until finished
+        :param finished: callable telling whether to stop watching
+        :param deadline: seconds (epoch) to stop watching at
+        :return: the breach, None if none
+        """
+        manager, watch = DirectMaster.__manager, ThresholdWatch(self.thresholds, self.__since)
+        while not finished():
+            if deadline is None:
+                time.sleep(HEALTH_INTERVAL)
+            else:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                time.sleep(min(HEALTH_INTERVAL, remaining))
+            if watch.observe(manager.progress) is not None:
+                self.__abort = watch.breach
+                manager.stop()
+                break
+        return self.__abort
+
+    def __gather(self):
+        # the same shape as a cluster of a single slave
+        manager, host = DirectMaster.__manager, get_host_ip()
+        self.__slave_results = {host: manager.result}
+        self.__startup = {host: manager.startup}
+        self.__pinning = {host: manager.pinning}
+        self.__result = AnalyseResult.from_results('master', [manager.result], self.__abort)
+        return self.__result
@@ -0,0 +1,49 @@
+from typing import Callable, Dict, List, Optional, Union
+
+from .interfaces import AnalyseResult
+from .job import JobContainer
+from .thresholds import Thresholds
+from .worker import WorkerManager
+from ..settings import PROFILE_DIR
+
+
+class DirectMaster:
+    __manager: Optional[WorkerManager]
+    __jobs: List[JobContainer]
+    __result: AnalyseResult
+    __slave_results: Dict[str, AnalyseResult]
+    __startup: Dict[str, Optional[int]]
+    __pinning: Dict[str, Optional[Dict]]
+    __run_id: str
+    __since: Optional[float]
+    __abort: Optional[Dict]
+
+    jobs: List[JobContainer]
+    result: AnalyseResult
+    slave_results: Dict[str, AnalyseResult]
+    startup: Dict[str, Optional[int]]
+    pinning: Dict[str, Optional[Dict]]
+    worker_num: int
+    requests: int
+    rate: float
+    profile: Optional[Dict]
+    warmup: Optional[float]
+    thresholds: Optional[Thresholds]
+    run_id: str
+
+    def __init__(self, *jobs: JobContainer, worker_num: int=None, requests: int=None, rate: float=None,
+                 profile: Union[str, Dict]=None, warmup: float=None, thresholds: Thresholds=None): pass
+
+    def start(self) -> None: pass
+    def restart(self, **params) -> None: pass
+    def collect(self) -> AnalyseResult: pass
+    def wait(self) -> AnalyseResult: pass
+    def watch(self, timeout: float) -> Optional[Dict]: pass
+    def health(self) -> Dict[str, Dict[str, Dict]]: pass
+    def progress(self) -> Optional[Dict]: pass
+    def write_profiles(self, directory: str=PROFILE_DIR) -> List[str]: pass
+    def stop(self, release: bool=True) -> None: pass
+    def close(self, release: bool=True) -> None: pass
+    def __measure(self) -> None: pass
+    def __watch(self, finished: Callable[[], bool], deadline: float=None) -> Optional[Dict]: pass
+    def __gather(self) -> AnalyseResult: pass
@@ -3,8 +3,10 @@ from abc import ABCMeta
 from enum import IntEnum
 from json import JSONDecodeError
 
+from .profiles import merge_profiles
+from .reservoir import merge_reservoirs
 from ..exception import WrongStatusException
-from ..util import Stopwatch, TimeFormat, readonly
+from ..util import Stopwatch, TimeFormat, Histogram, readonly
 
 
 class CoreStatus(IntEnum):
@@ -42,22 +44,236 @@ class AnalyseResult:
         assert 'start_time' in data
         assert 'stop_time' in data
 
+        # optional fields, results reported by older versions may not contain them
+        histogram = Histogram.from_json(data.get('histogram', {}))
+        series = {int(second): list(counts) for second, counts in data.get('series', {}).items()}
+        statuses = {int(status): count for status, count in data.get('statuses', {}).items()}
+        errors = data.get('errors', {})
+        urls = {url: cls.url_counters(**counters) for url, counters in data.get('urls', {}).items()}
+        jobs = {name: cls.from_json(job) for name, job in data.get('jobs', {}).items()}
+        health = data.get('health', {})
+        timing = {name: cls.timing_counters(**counters) for name, counters in data.get('timing', {}).items()}
+        tls = {name: cls.tls_counters(**counters) for name, counters in data.get('tls', {}).items()}
+        upload = {name: cls.upload_counters(**counters) for name, counters in data.get('upload', {}).items()}
+        profile = data.get('profile', None)
+        reservoir = data.get('reservoir', None)
+        abort = data.get('abort', None)
+        warmup = cls.from_json(data['warmup']) if data.get('warmup', None) is not None else None
+
         return AnalyseResult(_id=data['id'], total_request=data['total_request'],
                              success_request=data['success_request'], latency=data['latency'], qps=data['qps'],
-                             start_time=data['start_time'], stop_time=data['stop_time'])
+                             start_time=data['start_time'], stop_time=data['stop_time'],
+                             histogram=histogram, series=series, statuses=statuses, errors=errors, urls=urls,
+                             jobs=jobs, health=health, timing=timing, tls=tls, profile=profile, warmup=warmup,
+                             reservoir=reservoir, upload=upload, abort=abort)
 
     @classmethod
-    def from_results(cls, _id, results):
+    def from_results(cls, _id, results, abort=None):
+        """
+        :param abort: the breached threshold stopping the run, that of the results if None
+        """
         start_time = min(r.start_time for r in results)
         stop_time = max(r.stop_time for r in results)
         latency = stop_time - start_time
         total_request = sum(r.total_request for r in results)
         success_result = sum(r.success_request for r in results)
         qps = success_result * 1000 // max(1, latency)
+        # merge distributions and breakdowns
+        histogram = Histogram()
+        [histogram.merge(r.histogram) for r in results]
+        series = cls.merge_series(r.series for r in results)
+        statuses = cls.merge_counts(r.statuses for r in results)
+        errors = cls.merge_counts(r.errors for r in results)
+        urls = cls.merge_urls(r.urls for r in results)
+        job_groups = {}
+        for r in results:
+            for name, job in r.jobs.items():
+                job_groups.setdefault(name, []).append(job)
+        jobs = {name: cls.from_results(name, group) for name, group in job_groups.items()}
+        # health summaries are kept per worker
+        health = {}
+        [health.update(r.health) for r in results]
+        timing = cls.merge_timing(r.timing for r in results)
+        tls = cls.merge_tls(r.tls for r in results)
+        upload = cls.merge_upload(r.upload for r in results)
+        profile = merge_profiles(r.profile for r in results)
+        warmups = [r.warmup for r in results if r.warmup is not None]
+        warmup = cls.from_results(_id, warmups) if warmups else None
+        reservoir = merge_reservoirs(r.reservoir for r in results)
+        abort = abort or next((r.abort for r in results if r.abort is not None), None)
         return AnalyseResult(_id=_id, total_request=total_request, success_request=success_result,
-                             latency=latency, qps=qps, start_time=start_time, stop_time=stop_time)
+                             latency=latency, qps=qps, start_time=start_time, stop_time=stop_time,
+                             histogram=histogram, series=series, statuses=statuses, errors=errors, urls=urls,
+                             jobs=jobs, health=health, timing=timing, tls=tls, profile=profile, warmup=warmup,
+                             reservoir=reservoir, upload=upload, abort=abort)
+
+    @staticmethod
+    def url_counters(total_request=0, success_request=0, statuses=None, errors=None):
+        """
+        counters kept for every requested url
+        :return:
+        """
+        return {
+            'total_request': total_request,
+            'success_request': success_request,
+            'statuses': {int(status): count for status, count in (statuses or {}).items()},
+            'errors': dict(errors or {})
+        }
+
+    @classmethod
+    def merge_urls(cls, urls_list):
+        """
+        merge several url -> counters mappings
+        :param urls_list:
+        :return:
+        """
+        merged = {}
+        for urls in urls_list:
+            for url, counters in urls.items():
+                target = merged.setdefault(url, cls.url_counters())
+                target['total_request'] += counters['total_request']
+                target['success_request'] += counters['success_request']
+                target['statuses'] = cls.merge_counts((target['statuses'], counters['statuses']))
+                target['errors'] = cls.merge_counts((target['errors'], counters['errors']))
+        return merged
+
+    @staticmethod
+    def timing_counters(scheduled=0, late=0, lag=None):
+        """
+        counters of how well the requests of a replay kept to their schedule
+        :param scheduled: number of requests sent by the schedule
+        :param late: number of requests sent later than the tolerance
+        :param lag: distribution of the milliseconds every request is sent behind its schedule
+        :return:
+        """
+        return {
+            'scheduled': scheduled,
+            'late': late,
+            'lag': lag if isinstance(lag, Histogram) else Histogram.from_json(lag or {})
+        }
 
-    def __init__(self, _id, total_request, success_request, latency, qps, start_time, stop_time):
+    @classmethod
+    def merge_timing(cls, timing_list):
+        """
+        merge several job name -> timing counters mappings
+        :param timing_list:
+        :return:
+        """
+        merged = {}
+        for timing in timing_list:
+            for name, counters in timing.items():
+                target = merged.setdefault(name, cls.timing_counters())
+                target['scheduled'] += counters['scheduled']
+                target['late'] += counters['late']
+                target['lag'].merge(counters['lag'])
+        return merged
+
+    @staticmethod
+    def tls_counters(full=0, resumed=0, failed=0, full_duration=None, resumed_duration=None):
+        """
+        counters of the tls handshakes of a https or wss job
+        :param full: number of full handshakes
+        :param resumed: number of handshakes resuming a previous session
+        :param failed: number of failed handshakes
+        :param full_duration: distribution of the microseconds every full handshake takes
+        :param resumed_duration: distribution of the microseconds every resumed handshake takes
+        :return:
+        """
+        return {
+            'full': full,
+            'resumed': resumed,
+            'failed': failed,
+            'full_duration': full_duration if isinstance(full_duration, Histogram)
+            else Histogram.from_json(full_duration or {}),
+            'resumed_duration': resumed_duration if isinstance(resumed_duration, Histogram)
+            else Histogram.from_json(resumed_duration or {})
+        }
+
+    @classmethod
+    def merge_tls(cls, tls_list):
+        """
+        merge several job name -> tls counters mappings
+        :param tls_list:
+        :return:
+        """
+        merged = {}
+        for tls in tls_list:
+            for name, counters in tls.items():
+                target = merged.setdefault(name, cls.tls_counters())
+                target['full'] += counters['full']
+                target['resumed'] += counters['resumed']
+                target['failed'] += counters['failed']
+                target['full_duration'].merge(counters['full_duration'])
+                target['resumed_duration'].merge(counters['resumed_duration'])
+        return merged
+
+    @staticmethod
+    def upload_counters(requests=0, bytes=0):
+        """
+        counters of the file uploaded by a job
+        :param requests: number of requests sending the file
+        :param bytes: bytes of the file taken by the transport
+        :return:
+        """
+        return {'requests': requests, 'bytes': bytes}
+
+    @classmethod
+    def merge_upload(cls, upload_list):
+        """
+        merge several job name -> upload counters mappings
+        :param upload_list:
+        :return:
+        """
+        merged = {}
+        for upload in upload_list:
+            for name, counters in upload.items():
+                target = merged.setdefault(name, cls.upload_counters())
+                target['requests'] += counters['requests']
+                target['bytes'] += counters['bytes']
+        return merged
+
+    @staticmethod
+    def merge_counts(counts_list):
+        """
+        sum up several key -> count mappings
+        :param counts_list:
+        :return:
+        """
+        merged = {}
+        for counts in counts_list:
+            for key, count in counts.items():
+                merged[key] = merged.get(key, 0) + count
+        return merged
+
+    @staticmethod
+    def merge_series(series_list):
+        """
+        merge several per-second series, each of which maps a second
+        to a pair of [total_request, success_request]
+        :param series_list:
+        :return:
+        """
+        merged = {}
+        for series in series_list:
+            for second, (total, success) in series.items():
+                counts = merged.setdefault(second, [0, 0])
+                counts[0] += total
+                counts[1] += success
+        return merged
+
+    def __init__(self, _id, total_request, success_request, latency, qps, start_time, stop_time,
+                 histogram=None, series=None, statuses=None, errors=None, urls=None, jobs=None, health=None,
+                 timing=None, tls=None, profile=None, warmup=None, reservoir=None, upload=None, abort=None):
+        histogram = histogram or Histogram()
+        series = series or {}
+        statuses = statuses or {}
+        errors = errors or {}
+        urls = urls or {}
+        jobs = jobs or {}
+        health = health or {}
+        timing = timing or {}
+        tls = tls or {}
+        upload = upload or {}
         readonly(self, 'id', lambda: _id)
         readonly(self, 'total_request', lambda: total_request)
         readonly(self, 'success_request', lambda: success_request)
@@ -65,6 +281,35 @@ class AnalyseResult:
         readonly(self, 'qps', lambda: qps)
         readonly(self, 'start_time', lambda: start_time)
         readonly(self, 'stop_time', lambda: stop_time)
+        # latency distribution of every single request (milliseconds)
+        readonly(self, 'histogram', lambda: histogram)
+        # second -> [total_request, success_request]
+        readonly(self, 'series', lambda: series)
+        # status code -> count
+        readonly(self, 'statuses', lambda: statuses)
+        # error type phrase -> count
+        readonly(self, 'errors', lambda: errors)
+        # url -> status & error counters
+        readonly(self, 'urls', lambda: urls)
+        # job name -> AnalyseResult
+        readonly(self, 'jobs', lambda: jobs)
+        # worker id -> health summary of the load generator
+        readonly(self, 'health', lambda: health)
+        readonly(self, 'warnings', lambda: self.__warnings())
+        # job name -> schedule fidelity of a replay
+        readonly(self, 'timing', lambda: timing)
+        # job name -> tls handshake counters
+        readonly(self, 'tls', lambda: tls)
+        # profile of the worker processes merged, None unless the run is profiled
+        readonly(self, 'profile', lambda: profile)
+        # requests of the warmup period, excluded from all the counters above, None unless the run warms up
+        readonly(self, 'warmup', lambda: warmup)
+        # uniform samples of the responses and of every error class, see ResponseSampler
+        readonly(self, 'reservoir', lambda: reservoir)
+        # job name -> upload counters of a file payload
+        readonly(self, 'upload', lambda: upload)
+        # the breached threshold aborting the run and when, None unless the run is aborted
+        readonly(self, 'abort', lambda: abort)
 
     def __repr__(self):
         reprs = [
@@ -73,27 +318,123 @@ class AnalyseResult:
             'Request: %s/%s' % (self.success_request, self.total_request),
             'Latency: %s ms' % self.latency,
             'QPS: %s' % self.qps,
+            'Response Time: P50 %s ms, P90 %s ms, P99 %s ms, Max %s ms' % (
+                self.histogram.percentile(50), self.histogram.percentile(90),
+                self.histogram.percentile(99), self.histogram.max),
+            'Status: %s' % ', '.join('%s x %s' % (status, count) for status, count in sorted(self.statuses.items())),
+            'Error: %s' % ', '.join('%s x %s' % (error, count) for error, count in sorted(self.errors.items())),
             'Start Time: %s' % TimeFormat.from_millisecond(self.start_time),
-            'Stop Time: %s' % TimeFormat.from_millisecond(self.stop_time),
-            '=' * 128]
+            'Stop Time: %s' % TimeFormat.from_millisecond(self.stop_time)]
+        if self.abort is not None:
+            reprs.append('Abort: %s over the last %s s, at %s' % (
+                self.abort['threshold'], self.abort['window'], TimeFormat.from_millisecond(self.abort['time'])))
+        if self.warmup is not None:
+            reprs.append('Warmup: %s/%s excluded in %s ms, P50 %s ms, P99 %s ms, Max %s ms' % (
+                self.warmup.success_request, self.warmup.total_request, self.warmup.latency,
+                self.warmup.histogram.percentile(50), self.warmup.histogram.percentile(99), self.warmup.histogram.max))
+        reprs.extend('Timing: %s, %s/%s on time, Lag P50 %s ms, P99 %s ms, Max %s ms' % (
+            name, counters['scheduled'] - counters['late'], counters['scheduled'], counters['lag'].percentile(50),
+            counters['lag'].percentile(99), counters['lag'].max) for name, counters in sorted(self.timing.items()))
+        reprs.extend('TLS: %s, %s full P50 %s us, P99 %s us, %s resumed P50 %s us, P99 %s us, %s failed' % (
+            name, counters['full'], counters['full_duration'].percentile(50),
+            counters['full_duration'].percentile(99), counters['resumed'],
+            counters['resumed_duration'].percentile(50), counters['resumed_duration'].percentile(99),
+            counters['failed']) for name, counters in sorted(self.tls.items()))
+        reprs.extend(self.__upload_repr(name, counters) for name, counters in sorted(self.upload.items()))
+        if self.profile is not None:
+            reprs.append('Profile: %s of %s workers, %s %s' % (
+                self.profile['mode'], self.profile['workers'], len(self.profile['stats']),
+                'stacks' if self.profile['mode'] == 'sample' else 'functions'))
+        if self.reservoir is not None:
+            reprs.append('Reservoir: %s/%s responses kept' % (len(self.reservoir['responses']['items']),
+                                                               self.reservoir['responses']['seen']))
+            reprs.extend('Error Sample: %s, %s/%s kept, %s' % (
+                kind, len(reservoir['items']), reservoir['seen'], self.__sample_repr(reservoir['items'][0]))
+                for kind, reservoir in sorted(self.reservoir['errors'].items()) if reservoir['items'])
+        reprs.extend('Warning: %s' % warning for warning in self.warnings)
+        reprs.append('=' * 128)
         return '\n'.join(reprs)
 
+    def __upload_repr(self, name, counters):
+        """
+        a line of the throughput of an uploading job, next to its latency
+        :param name: job name
+        :param counters: upload counters
+        :return:
+        """
+        histogram = self.jobs[name].histogram if name in self.jobs else self.histogram
+        return 'Upload: %s, %s requests, %.2f MB, %.2f MB/s, P50 %s ms, P99 %s ms' % (
+            name, counters['requests'], counters['bytes'] / (1 << 20),
+            counters['bytes'] * 1000 / max(1, self.latency) / (1 << 20),
+            histogram.percentile(50), histogram.percentile(99))
+
+    @staticmethod
+    def __sample_repr(item, length=80):
+        """
+        a line of a sampled response
+        :param item: record of the reservoir
+        :param length: max characters of the body
+        :return:
+        """
+        detail = item['exception'] or repr((item['body'] or '')[:length])
+        return '%s %s in %s ms: %s' % (item['url'], item['status'] or item['error'], item['latency'], detail)
+
+    def __warnings(self):
+        """
+        tell whether the load generator rather than the target limited the throughput
+        :return: list of warnings
+        """
+        # the monitor loads asyncio, results are also read by the run store tools which don't need it
+        from .monitor import saturation
+        saturated = {worker: reasons for worker, reasons in
+                     ((worker, saturation(summary)) for worker, summary in self.health.items()) if reasons}
+        if not saturated:
+            return []
+        worker, reasons = max(saturated.items(), key=lambda item: len(item[1]))
+        return ['load generator saturated on %s/%s workers (%s on %s), the throughput is limited by '
+                'CamelStraw rather than the target' % (len(saturated), len(self.health), ', '.join(reasons), worker)]
+
     @property
-    def json_result(self) -> str:
+    def json_data(self) -> dict:
         """
-        return tests result in json format
+        return tests result as a json serializable dict
         :return:
         """
-        data = {
+        return {
             'id': self.id,
             'total_request': self.total_request,
             'success_request': self.success_request,
             'latency': self.latency,
             'qps': self.qps,
             'start_time': self.start_time,
-            'stop_time': self.stop_time
+            'stop_time': self.stop_time,
+            'histogram': self.histogram.to_json(),
+            'series': {str(second): counts for second, counts in self.series.items()},
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'errors': self.errors,
+            'urls': {url: dict(counters, statuses={str(status): count for status, count in
+                                                   counters['statuses'].items()})
+                     for url, counters in self.urls.items()},
+            'jobs': {name: job.json_data for name, job in self.jobs.items()},
+            'health': self.health,
+            'timing': {name: dict(counters, lag=counters['lag'].to_json()) for name, counters in self.timing.items()},
+            'tls': {name: dict(counters, full_duration=counters['full_duration'].to_json(),
+                               resumed_duration=counters['resumed_duration'].to_json())
+                    for name, counters in self.tls.items()},
+            'profile': self.profile,
+            'warmup': self.warmup.json_data if self.warmup is not None else None,
+            'reservoir': self.reservoir,
+            'upload': self.upload,
+            'abort': self.abort
         }
-        return json.dumps(data)
+
+    @property
+    def json_result(self) -> str:
+        """
+        return tests result in json format
+        :return:
+        """
+        return json.dumps(self.json_data)
 
 
 class IAnalysable(metaclass=ABCMeta):
@@ -122,6 +463,11 @@ class IAnalysable(metaclass=ABCMeta):
         self._total_request = 0
         self._success_request = 0
         self._latency = 0
+        self._histogram = Histogram()
+        self._series = {}
+        self._statuses = {}
+        self._errors = {}
+        self._urls = {}
         self._analyse_result = None
         # properties
         readonly(self, 'id', lambda: _id)
@@ -152,6 +498,36 @@ class IAnalysable(metaclass=ABCMeta):
             raise WrongStatusException('_latency is not computed')
         return self._latency
 
+    @property
+    def histogram(self) -> Histogram:
+        if self.status != CoreStatus.ANALYSED:
+            raise WrongStatusException('_histogram is not computed')
+        return self._histogram
+
+    @property
+    def series(self) -> dict:
+        if self.status != CoreStatus.ANALYSED:
+            raise WrongStatusException('_series is not computed')
+        return self._series
+
+    @property
+    def statuses(self) -> dict:
+        if self.status != CoreStatus.ANALYSED:
+            raise WrongStatusException('_statuses is not computed')
+        return self._statuses
+
+    @property
+    def errors(self) -> dict:
+        if self.status != CoreStatus.ANALYSED:
+            raise WrongStatusException('_errors is not computed')
+        return self._errors
+
+    @property
+    def urls(self) -> dict:
+        if self.status != CoreStatus.ANALYSED:
+            raise WrongStatusException('_urls is not computed')
+        return self._urls
+
     def start(self, *args, **kwargs):
         if self.status != CoreStatus.INIT:
             raise WrongStatusException('IAnalysable<%s with %s> can only be started at init status'
@@ -178,14 +554,104 @@ class IAnalysable(metaclass=ABCMeta):
         if self._analyse_result is not None:
             return
         if self._manager is not None:
-            for item in self._manager:
-                item.analyse()
-                self._total_request += item.total_request
-                self._success_request += item.success_request
+            self._collect()
             # record analyse result
             self._analyse_result = AnalyseResult(_id=self.id, total_request=self.total_request,
                                                  success_request=self.success_request, latency=self.latency,
-                                                 qps=self.qps, start_time=self.start_time, stop_time=self.stop_time)
+                                                 qps=self.qps, start_time=self.start_time, stop_time=self.stop_time,
+                                                 histogram=self.histogram, series=self.series,
+                                                 statuses=self.statuses, errors=self.errors, urls=self.urls,
+                                                 jobs=self._breakdown(), health=self._health(),
+                                                 timing=self._timing(), tls=self._tls(), profile=self._profile(),
+                                                 warmup=self._warmup(), reservoir=self._reservoir(),
+                                                 upload=self._upload())
+
+    def split(self):
+        """
+        end the warmup of a started object, what it counted so far is analysed as
+        a result of its own and it counts from scratch since then
+        :return: AnalyseResult of the warmup, None if nothing is counted by it
+        """
+        if self.status != CoreStatus.STARTED:
+            raise WrongStatusException('IAnalysable<%s with %s> can only be split at started status'
+                                       % (self.__class__.__name__, self.status))
+        start_time = self.start_time
+        self._stopwatch = Stopwatch().start()
+        if self._manager is None:
+            return None
+        return self._manager.split(self.id, start_time, self.start_time)
+
+    def _collect(self):
+        """
+        analyse all managed items and sum up their counters
+        :return:
+        """
+        items = list(self._manager)
+        for item in items:
+            item.analyse()
+            self._total_request += item.total_request
+            self._success_request += item.success_request
+            self._histogram.merge(item.histogram)
+        self._series = AnalyseResult.merge_series(item.series for item in items)
+        self._statuses = AnalyseResult.merge_counts(item.statuses for item in items)
+        self._errors = AnalyseResult.merge_counts(item.errors for item in items)
+        self._urls = AnalyseResult.merge_urls(item.urls for item in items)
+
+    def _breakdown(self):
+        """
+        sub results attached to the analyse result, keyed by name
+        :return:
+        """
+        return None
+
+    def _health(self):
+        """
+        health summaries attached to the analyse result, keyed by worker id
+        :return:
+        """
+        return None
+
+    def _timing(self):
+        """
+        schedule fidelity attached to the analyse result, keyed by job name
+        :return:
+        """
+        return None
+
+    def _tls(self):
+        """
+        tls handshake counters attached to the analyse result, keyed by job name
+        :return:
+        """
+        return None
+
+    def _profile(self):
+        """
+        profile of the process attached to the analyse result
+        :return:
+        """
+        return None
+
+    def _warmup(self):
+        """
+        result of the warmup split off, attached to the analyse result
+        :return:
+        """
+        return None
+
+    def _reservoir(self):
+        """
+        samples of the responses attached to the analyse result
+        :return:
+        """
+        return None
+
+    def _upload(self):
+        """
+        upload counters attached to the analyse result, keyed by job name
+        :return:
+        """
+        return None
 
 
 class IManager(metaclass=ABCMeta):
@@ -194,6 +660,14 @@ class IManager(metaclass=ABCMeta):
     SessionManager/JobManager/WorkerManager etc, collecting
     common logic for all managers
     """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'id', lambda: None)
+        return inst
+
     def __init__(self, _id):
         readonly(self, 'id', lambda: _id)
         self._container = []
@@ -203,3 +677,15 @@ class IManager(metaclass=ABCMeta):
 
     def add(self, obj):
         self._container.append(obj)
+
+    def split(self, _id, start_time, stop_time):
+        """
+        split every started item, see IAnalysable.split
+        :param _id: id of the merged result
+        :param start_time: milliseconds the split off period starts at
+        :param stop_time: milliseconds it stops at
+        :return: AnalyseResult of the items merged, None if there's none
+        """
+        results = [item.split() for item in self if item.status == CoreStatus.STARTED]
+        results = [result for result in results if result is not None]
+        return AnalyseResult.from_results(_id, results) if results else None
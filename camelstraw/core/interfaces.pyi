@@ -1,7 +1,7 @@
 from enum import IntEnum
-from typing import Dict, TypeVar, List, Iterable
+from typing import Dict, TypeVar, List, Iterable, Optional, Union
 
-from ..util import Stopwatch
+from ..util import Stopwatch, Histogram
 
 AnalyseResultType = TypeVar('AnalyseResultType', str, Dict)
 
@@ -16,16 +16,62 @@ class AnalyseResult:
     qps: int
     start_time: int
     stop_time: int
+    histogram: Histogram
+    series: Dict[int, List[int]]
+    statuses: Dict[int, int]
+    errors: Dict[str, int]
+    urls: Dict[str, Dict]
+    jobs: Dict[str, AnalyseResult]
+    health: Dict[str, Dict]
+    warnings: List[str]
+    timing: Dict[str, Dict]
+    tls: Dict[str, Dict]
+    profile: Optional[Dict]
+    warmup: Optional[AnalyseResult]
+    reservoir: Optional[Dict]
+    upload: Dict[str, Dict]
+    abort: Optional[Dict]
 
+    json_data: Dict
     json_result: str
 
-    def __init__(self, _id: str, total_request: int, success_request: int, latency: int, qps: int, start_time: int, stop_time: int): pass
+    def __init__(self, _id: str, total_request: int, success_request: int, latency: int, qps: int, start_time: int, stop_time: int,
+                 histogram: Histogram=None, series: Dict[int, List[int]]=None, statuses: Dict[int, int]=None,
+                 errors: Dict[str, int]=None, urls: Dict[str, Dict]=None, jobs: Dict[str, AnalyseResult]=None,
+                 health: Dict[str, Dict]=None, timing: Dict[str, Dict]=None,
+                 tls: Dict[str, Dict]=None, profile: Dict=None, warmup: AnalyseResult=None,
+                 reservoir: Dict=None, upload: Dict[str, Dict]=None, abort: Dict=None): pass
     def __repr__(self) -> str: pass
+    def __upload_repr(self, name: str, counters: Dict) -> str: pass
+    @staticmethod
+    def __sample_repr(item: Dict, length: int=80) -> str: pass
+    def __warnings(self) -> List[str]: pass
 
     @classmethod
     def from_json(cls, data: AnalyseResultType) -> AnalyseResult: pass
     @classmethod
-    def from_results(cls, _id: str, results: List) -> AnalyseResult: pass
+    def from_results(cls, _id: str, results: List, abort: Dict=None) -> AnalyseResult: pass
+    @staticmethod
+    def url_counters(total_request: int=0, success_request: int=0, statuses: Dict=None, errors: Dict=None) -> Dict: pass
+    @classmethod
+    def merge_urls(cls, urls_list: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]: pass
+    @staticmethod
+    def timing_counters(scheduled: int=0, late: int=0, lag: Union[Histogram, Dict]=None) -> Dict: pass
+    @classmethod
+    def merge_timing(cls, timing_list: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]: pass
+    @staticmethod
+    def tls_counters(full: int=0, resumed: int=0, failed: int=0, full_duration: Union[Histogram, Dict]=None,
+                     resumed_duration: Union[Histogram, Dict]=None) -> Dict: pass
+    @classmethod
+    def merge_tls(cls, tls_list: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]: pass
+    @staticmethod
+    def upload_counters(requests: int=0, bytes: int=0) -> Dict: pass
+    @classmethod
+    def merge_upload(cls, upload_list: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]: pass
+    @staticmethod
+    def merge_counts(counts_list: Iterable[Dict]) -> Dict: pass
+    @staticmethod
+    def merge_series(series_list: Iterable[Dict[int, List[int]]]) -> Dict[int, List[int]]: pass
 
 class IAnalysable:
     # fields
@@ -35,11 +81,21 @@ class IAnalysable:
     _total_request: int
     _success_request: int
     _latency: int
+    _histogram: Histogram
+    _series: Dict[int, List[int]]
+    _statuses: Dict[int, int]
+    _errors: Dict[str, int]
+    _urls: Dict[str, Dict]
     _analyse_result: AnalyseResult
 
     total_request: int
     success_request: int
     latency: int
+    histogram: Histogram
+    series: Dict[int, List[int]]
+    statuses: Dict[int, int]
+    errors: Dict[str, int]
+    urls: Dict[str, Dict]
 
     id: str
     qps: int
@@ -54,6 +110,16 @@ class IAnalysable:
     def start(self, *args, **kwargs): pass
     def stop(self, *args, **kwargs): pass
     def analyse(self) -> None: pass
+    def split(self) -> Optional[AnalyseResult]: pass
+    def _collect(self) -> None: pass
+    def _breakdown(self) -> Dict[str, AnalyseResult]: pass
+    def _health(self) -> Dict[str, Dict]: pass
+    def _timing(self) -> Dict[str, Dict]: pass
+    def _tls(self) -> Dict[str, Dict]: pass
+    def _profile(self) -> Optional[Dict]: pass
+    def _warmup(self) -> Optional[AnalyseResult]: pass
+    def _reservoir(self) -> Optional[Dict]: pass
+    def _upload(self) -> Dict[str, Dict]: pass
 
 class IManager:
     id: str
@@ -63,3 +129,4 @@ class IManager:
     def __iter__(self) -> Iterable: pass
 
     def add(self, obj: IAnalysable) -> None: pass
+    def split(self, _id: str, start_time: int, stop_time: int) -> Optional[AnalyseResult]: pass
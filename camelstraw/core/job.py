@@ -1,17 +1,23 @@
 import asyncio
+from asyncio import gather
 from abc import ABCMeta, abstractmethod
 from itertools import cycle, repeat
 from typing import Callable, Generator, Iterator
 from urllib.parse import urlparse, parse_qs, ParseResult
 
-from aiohttp import ClientSession as Client, ClientError, WSMessage
+from aiohttp import ClientSession as Client, ClientError, TCPConnector, WSMessage
 from aiohttp import WSMsgType
 from aiohttp.http_exceptions import HttpProcessingError
 
 from .session import SessionManager
-from .interfaces import IAnalysable, IManager, CoreStatus
+from .templates import check_generators, has_generators, compile_url, compile_data, compile_mapping
+from .interfaces import IAnalysable, IManager, CoreStatus, AnalyseResult
 from ..util import uid, readonly
-from ..net import Protocol, HttpMethod
+from ..net import Protocol, HttpMethod, ErrorType
+from ..net.uploads import FilePayload, MappedFile
+
+# exceptions counted as failed requests instead of breaking the request loop
+REQUEST_EXCEPTIONS = (HttpProcessingError, ClientError, asyncio.TimeoutError, OSError)
 
 
 class Job(IAnalysable):
@@ -25,32 +31,224 @@ class Job(IAnalysable):
         job = super().__new__(cls)
         readonly(job, 'protocol', lambda: None)
         readonly(job, 'url', lambda: None)
+        readonly(job, 'name', lambda: None)
         return job
 
     def __init__(self, url: str, **kwargs):
-        self.__session_manager = SessionManager()
+        self.__session_manager = SessionManager(success=kwargs.get('success', None))
         super().__init__(uid(__class__.__name__), self.__session_manager)
         self.__job_kwargs = kwargs
+        [check_generators(value) for value in (url, kwargs.get('data', None), kwargs.get('headers', None))]
+        self.__budget = None
+        self.__limiter = None
+        self.__handshakes = AnalyseResult.tls_counters()
+        self.__uploaded = AnalyseResult.upload_counters()
+        # render functions of the templates, compiled when started
+        self.__render_url = None
+        self.__render_headers = None
         # properties
         readonly(self, 'protocol', lambda: Protocol.from_url(url))
         readonly(self, 'url', lambda: url)
+        readonly(self, 'name', lambda: '%s %s' % (self.__kind(), url))
+        if isinstance(kwargs.get('data', None), FilePayload) and not self.__encodes_data():
+            raise ValueError('a file payload can only be sent by body methods or binary websocket messages')
+
+    def record_samples(self, writer, index=0):
+        """
+        write raw per-request samples of this job to the writer
+        :param writer: SampleWriter
+        :param index: job index in the sample file
+        :return:
+        """
+        self.__session_manager.record_samples(writer, index)
+
+    def record_live(self, slot):
+        """
+        count the requests of this job in the live counters of the worker process
+        :param slot: LiveSlot
+        :return:
+        """
+        self.__session_manager.record_live(slot)
+
+    def record_responses(self, sampler):
+        """
+        offer the responses of this job to the reservoirs of the worker
+        :param sampler: ResponseSampler
+        :return:
+        """
+        self.__session_manager.record_responses(sampler)
+
+    def limit(self, budget):
+        """
+        stop sending requests once the budget is used up
+        :param budget: RequestBudget shared by the jobs of a worker
+        :return:
+        """
+        self.__budget = budget
+
+    def throttle(self, limiter):
+        """
+        pace the requests by the rate limiter shared by the worker processes of the host
+        :param limiter: RateLimiter
+        :return:
+        """
+        self.__limiter = limiter
+
+    def clone(self, **kwargs):
+        """
+        create a fresh job with the same arguments, used to run the job another round
+        :param kwargs: arguments to override, concurrency for example
+        :return: Job
+        """
+        job_kwargs = dict(self.__job_kwargs)
+        job_kwargs.update(kwargs)
+        return Job(url=self.url, **job_kwargs)
+
+    def _collect(self):
+        manager = self.__session_manager
+        self._total_request = manager.total_request
+        self._success_request = manager.success_request
+        self._histogram = manager.histogram
+        self._series = manager.series
+        self._statuses = manager.statuses
+        self._errors = manager.errors
+        self._urls = manager.urls
+
+    def split(self):
+        # bytes uploaded by the warmup are not counted either
+        self.__uploaded = AnalyseResult.upload_counters()
+        return super().split()
+
+    def _upload(self):
+        if not isinstance(self.__job_kwargs.get('data', None), FilePayload):
+            return None
+        return {self.name: self.__uploaded}
+
+    def __record_upload(self, size):
+        """
+        :param size: bytes of a slice of the file taken by the transport
+        :return:
+        """
+        self.__uploaded['bytes'] += size
+
+    def __record_frame(self, size):
+        """
+        :param size: bytes of a binary websocket message out of the file
+        :return:
+        """
+        self.__uploaded['requests'] += 1
+        self.__uploaded['bytes'] += size
 
-    async def start(self) -> asyncio.coroutine:
+    def _tls(self):
+        if self.__tls() is None:
+            return None
+        return {self.name: self.__handshakes}
+
+    def __tls(self):
+        """
+        tls options of the job, None for plain http & ws or the defaults of aiohttp
+        :return: TlsOptions
+        """
+        if self.protocol != Protocol.HTTPS and self.protocol != Protocol.WSS:
+            return None
+        return self.__job_kwargs.get('tls', None)
+
+    def __record_handshake(self, resumed, duration):
+        """
+        :param resumed: whether a previous session is resumed
+        :param duration: microseconds, None if the handshake failed
+        :return:
+        """
+        handshakes = self.__handshakes
+        if duration is None:
+            handshakes['failed'] += 1
+        elif resumed:
+            handshakes['resumed'] += 1
+            handshakes['resumed_duration'].record(duration)
+        else:
+            handshakes['full'] += 1
+            handshakes['full_duration'].record(duration)
+
+    def __kind(self):
+        """
+        readable request kind, used to tell jobs apart in analyse results
+        :return:
+        """
+        if self.protocol == Protocol.WS or self.protocol == Protocol.WSS:
+            message_type = self.__job_kwargs.get('message_type', WSMsgType.TEXT)
+            return 'WebsocketBinary' if message_type == WSMsgType.BINARY else 'WebsocketText'
+        return self.__job_kwargs.get('method', HttpMethod.GET).phrase
+
+    def __acquire(self):
+        """
+        whether the next request should be sent
+        :return:
+        """
+        if self.status != CoreStatus.STARTED:
+            return False
+        return self.__budget is None or self.__budget.acquire()
+
+    def __close(self, session, status_code=200, error=None, size=0, headers=None, body=None, exception=None):
+        self.__session_manager.close(session, status_code, error, size, headers, body, exception)
+        if self.__budget is not None:
+            self.__budget.done()
+
+    def __discard(self, session):
+        self.__session_manager.discard(session)
+        if self.__budget is not None:
+            self.__budget.release()
+
+    async def start(self):
         super().start()
-        data = self.__data_iterator(self.__job_kwargs.get('data', None))
-        headers = self.__job_kwargs.get('headers', None)
+        data = self.__job_kwargs.get('data', None)
+        headers = dict(self.__job_kwargs.get('headers', None) or {})
         cookies = self.__job_kwargs.get('cookies', {})
         callback = self.__job_kwargs.get('callback', None)
-        await self.__do_request(data=data, headers=headers, cookies=cookies, callback=callback)
+        # templates are compiled in the worker process, templated headers are rendered for
+        # every request and the constant ones are set once for the client
+        encode = self.__encodes_data()
+        if encode and isinstance(data, dict) and has_generators(data):
+            headers.setdefault('Content-Type', 'application/json')
+        templated = {key: headers.pop(key) for key in list(headers) if has_generators(headers[key])}
+        self.__render_url = compile_url(self.url)
+        self.__render_headers = compile_mapping(templated) if templated else None
+        if not isinstance(data, FilePayload):
+            await self.__do_request(data=self.__data_iterator(data, encode), headers=headers or None,
+                                    cookies=cookies, callback=callback)
+            return
+        # only the path is pickled, the file is mapped in the worker process and shared by the request loops
+        upload = data.open()
+        try:
+            if self.protocol == Protocol.WS or self.protocol == Protocol.WSS:
+                data = upload.frames(self.__record_frame)
+            else:
+                headers = dict(data.headers(upload.size), **headers)
+                data = repeat(upload)
+            await self.__do_request(data=data, headers=headers, cookies=cookies, callback=callback)
+        finally:
+            upload.close()
+
+    def __encodes_data(self):
+        """
+        whether the data is sent as bytes, by http bodies and binary websocket messages
+        :return:
+        """
+        if self.protocol == Protocol.WS or self.protocol == Protocol.WSS:
+            return self.__job_kwargs.get('message_type', WSMsgType.TEXT) == WSMsgType.BINARY
+        return self.__job_kwargs.get('method', HttpMethod.GET).sends_body
 
     @staticmethod
-    def __data_iterator(data):
+    def __data_iterator(data, encode=False):
         """
         transform all types to generator
         :param data:
+        :param encode: render templates to bytes
         :return:
         """
-        if isinstance(data, Generator) or isinstance(data, Iterator):
+        if has_generators(data):
+            # rendered again for every request
+            return iter(compile_data(data, encode), None)
+        elif isinstance(data, Generator) or isinstance(data, Iterator):
             return cycle(data)
         elif isinstance(data, Callable):
             return repeat(data())
@@ -58,35 +256,75 @@ class Job(IAnalysable):
             return repeat(data or {})
 
     async def __do_request(self, data, headers=None, cookies=None, callback=None):
-        if self.protocol == Protocol.HTTP or self.protocol == Protocol.HTTPS:
-            method = self.__job_kwargs.get('method', HttpMethod.GET)
-            async with Client(headers=headers, cookies=cookies) as client:
-                await self.__do_http_request(client, method, data, callback)
-        elif self.protocol == Protocol.WS or self.protocol == Protocol.WSS:
-            message_type = self.__job_kwargs.get('message_type', WSMsgType.TEXT)
-            async with Client(headers=headers, cookies=cookies).ws_connect(self.url) as ws:
-                await self.__do_websocket_request(ws, message_type, data, callback)
+        # every job runs several request loops concurrently, all of them share the same client,
+        # unless every loop is asked to be a tls client of its own
+        concurrency = max(1, int(self.__job_kwargs.get('concurrency', 1)))
+        tls = self.__tls()
+        if tls is not None and not tls.shared:
+            await gather(*(self.__do_client(1, data, headers, cookies, callback) for _ in range(concurrency)))
+        else:
+            await self.__do_client(concurrency, data, headers, cookies, callback)
+
+    async def __do_client(self, concurrency, data, headers=None, cookies=None, callback=None):
+        tls, connector = self.__tls(), None
+        if tls is not None:
+            # ssl contexts can't be pickled, they are built in the worker process
+            connector = TCPConnector(ssl=tls.context(self.__record_handshake), force_close=tls.reconnect)
+        async with Client(headers=headers, cookies=cookies, connector=connector) as client:
+            if self.protocol == Protocol.HTTP or self.protocol == Protocol.HTTPS:
+                method = self.__job_kwargs.get('method', HttpMethod.GET)
+                await gather(*(self.__do_http_request(client, method, data, callback) for _ in range(concurrency)))
+            elif self.protocol == Protocol.WS or self.protocol == Protocol.WSS:
+                message_type = self.__job_kwargs.get('message_type', WSMsgType.TEXT)
+                await gather(*(self.__do_websocket_connect(client, message_type, data, callback)
+                               for _ in range(concurrency)))
 
     async def __do_http_request(self, client, method, data, callback=None):
-        while self.status == CoreStatus.STARTED:
-            self.__session_manager.open(self.protocol, self.url)
+        while self.__acquire():
+            if self.__limiter is not None:
+                await self.__limiter.acquire()
+            session = self.__session_manager.open(self.protocol, self.url)
             try:
-                response = None
-                if method == HttpMethod.GET:
-                    response = await client.get(self.url, params=next(data))
-                elif method == HttpMethod.POST:
-                    response = await client.post(self.url, json=next(data))
-                # record result and call callback
-                content = await response.text() if response else 'empty message'
-                self.__session_manager.close(response.status)
+                url = self.__render_url()
+                headers = self.__render_headers() if self.__render_headers is not None else None
+                # body methods send the data as json (rendered templates as they are), the others as query arguments
+                body = next(data)
+                if not method.sends_body:
+                    response = await client.request(method.verb, url, params=body, headers=headers)
+                elif isinstance(body, bytes):
+                    response = await client.request(method.verb, url, data=body, headers=headers)
+                elif isinstance(body, MappedFile):
+                    # streamed slice by slice, the next slice is taken once the transport drains
+                    self.__uploaded['requests'] += 1
+                    response = await client.request(method.verb, url, data=body.stream(self.__record_upload),
+                                                    headers=headers)
+                else:
+                    response = await client.request(method.verb, url, json=body, headers=headers)
+                # record result and call callback, the body is cached so it's read only once
+                content = await response.read()
+                self.__close(session, response.status, size=len(content), headers=response.headers, body=content)
                 if isinstance(callback, Callable):
-                    callback(status_code=response.status, content=content)
-            except (HttpProcessingError, ClientError):
-                self.__session_manager.close(400)
+                    callback(status_code=response.status, content=await response.text())
+            except REQUEST_EXCEPTIONS as e:
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
+
+    async def __do_websocket_connect(self, client, message_type, data, callback=None):
+        # reconnect as long as the job is running, a failed connection is recorded as a failed request
+        while self.__acquire():
+            session = self.__session_manager.open(self.protocol, self.url)
+            try:
+                headers = self.__render_headers() if self.__render_headers is not None else None
+                async with client.ws_connect(self.__render_url(), headers=headers) as ws:
+                    self.__discard(session)
+                    await self.__do_websocket_request(ws, message_type, data, callback)
+            except REQUEST_EXCEPTIONS as e:
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
 
     async def __do_websocket_request(self, ws, message_type, data, callback=None):
-        while self.status == CoreStatus.STARTED:
-            self.__session_manager.open(self.protocol, self.url)
+        while not ws.closed and self.__acquire():
+            if self.__limiter is not None:
+                await self.__limiter.acquire()
+            session = self.__session_manager.open(self.protocol, self.url)
             try:
                 if message_type == WSMsgType.TEXT:
                     await ws.send_str(next(data))
@@ -94,14 +332,17 @@ class Job(IAnalysable):
                     await ws.send_bytes(next(data))
                 # record result and call callback
                 msg: WSMessage = await ws.receive()
-                if msg.type == WSMsgType.TEXT:
-                    self.__session_manager.close(200)
+                if msg.type == WSMsgType.TEXT or msg.type == WSMsgType.BINARY:
+                    self.__close(session, 200, size=len(msg.data), body=msg.data)
                     if isinstance(callback, Callable):
                         callback(status_code=200, content=msg.data)
+                elif msg.type == WSMsgType.ERROR:
+                    self.__close(session, error=ErrorType.from_exception(msg.data), exception=msg.data)
                 else:
-                    self.__session_manager.close(500)
-            except (HttpProcessingError, ClientError):
-                self.__session_manager.close(400)
+                    # close frame or the connection is already closed
+                    self.__close(session, error=ErrorType.RESET)
+            except REQUEST_EXCEPTIONS as e:
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
 
 
 class JobContainer(metaclass=ABCMeta):
@@ -109,31 +350,43 @@ class JobContainer(metaclass=ABCMeta):
     transform from arguments to Job instance, expose this instead of Job because
     multi-processing environment is error prone
     """
-    def __init__(self, url, data=None, headers=None, cookies=None, callback=None, reuse_job=True):
+    def __init__(self, url, data=None, headers=None, cookies=None, callback=None, reuse_job=True, success=None,
+                 concurrency=1, broadcast=False, tls=None):
+        """
+        :param success: predicate of a response status code, every 2xx status code is a success by default
+        :param concurrency: number of request loops every worker runs for the job at the same time
+        :param broadcast: run the job on every slave instead of one of them
+        :param tls: TlsOptions of a https or wss url, the defaults of aiohttp if None
+        """
         self._job = None
         self._url = url
         self._data = data
         self._headers = headers
         self._cookies = cookies
         self._callback = callback
+        self._success = success
+        self._concurrency = concurrency
+        self._tls = tls
         # properties
         readonly(self, 'reuse_job', lambda: reuse_job)
+        readonly(self, 'url', lambda: url)
+        readonly(self, 'broadcast', lambda: broadcast)
 
     @abstractmethod
     def job(self):
         pass
 
     @staticmethod
-    def from_url(url, method):
+    def from_url(url, method, concurrency=1):
         if method == HttpMethod.GET:
-            return HttpGetJob(url=url)
+            return HttpGetJob(url=url, concurrency=concurrency)
         elif method == HttpMethod.POST:
             result: ParseResult = urlparse(url)
             url = '%s://%s%s' % (result.scheme, result.netloc, result.path)
             data = {key: value[0] for key, value in parse_qs(result.query).items()}
-            return HttpPostJob(url=url, data=data)
+            return HttpPostJob(url=url, data=data, concurrency=concurrency)
         else:
-            NotImplementedError('Only support Get and Post method.')
+            raise NotImplementedError('Only support Get and Post method.')
 
 
 class HttpGetJob(JobContainer):
@@ -144,12 +397,15 @@ class HttpGetJob(JobContainer):
         # but it's a must when used in Process & dill
         inst = super().__new__(cls)
         readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
         return inst
 
     def job(self):
         if self._job is None or self.reuse_job:
             self._job = Job(url=self._url, data=self._data, headers=self._headers, cookies=self._cookies,
-                            method=HttpMethod.GET, callback=self._callback)
+                            method=HttpMethod.GET, callback=self._callback, success=self._success,
+                            concurrency=self._concurrency, tls=self._tls)
         return self._job
 
 
@@ -161,12 +417,15 @@ class HttpPostJob(JobContainer):
         # but it's a must when used in Process & dill
         inst = super().__new__(cls)
         readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
         return inst
 
     def job(self):
         if self._job is None or self.reuse_job:
             self._job = Job(url=self._url, data=self._data, headers=self._headers, cookies=self._cookies,
-                            method=HttpMethod.POST, callback=self._callback)
+                            method=HttpMethod.POST, callback=self._callback, success=self._success,
+                            concurrency=self._concurrency, tls=self._tls)
         return self._job
 
 
@@ -178,12 +437,15 @@ class WebsocketTextJob(JobContainer):
         # but it's a must when used in Process & dill
         inst = super().__new__(cls)
         readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
         return inst
 
     def job(self):
         if self._job is None or self.reuse_job:
             self._job = Job(url=self._url, data=self._data, headers=self._headers, cookies=self._cookies,
-                            message_type=WSMsgType.TEXT, callback=self._callback)
+                            message_type=WSMsgType.TEXT, callback=self._callback, success=self._success,
+                            concurrency=self._concurrency, tls=self._tls)
         return self._job
 
 
@@ -195,12 +457,15 @@ class WebsocketBinaryJob(JobContainer):
         # but it's a must when used in Process & dill
         inst = super().__new__(cls)
         readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
         return inst
 
     def job(self):
         if self._job is None or self.reuse_job:
             self._job = Job(url=self._url, data=self._data, headers=self._headers, cookies=self._cookies
-                            , message_type=WSMsgType.BINARY, callback=self._callback)
+                            , message_type=WSMsgType.BINARY, callback=self._callback, success=self._success,
+                            concurrency=self._concurrency, tls=self._tls)
         return self._job
 
 
@@ -1,33 +1,71 @@
 import asyncio
 from abc import ABCMeta, abstractmethod
-from typing import Dict, TypeVar, Callable, Generator, Iterator
+from typing import Dict, Optional, TypeVar, Callable, Generator, Iterator, Mapping, Tuple, Type
 
 from aiohttp import ClientSession as Client, ClientWebSocketResponse, WSMsgType
 
-from .session import SessionManager
-from ..net import Protocol, HttpMethod
-from .interfaces import IAnalysable, IManager
+from .budget import RequestBudget
+from .limiter import RateLimiter
+from .live import LiveSlot
+from .reservoir import ResponseSampler
+from .samples import SampleWriter
+from .session import Session, SessionManager
+from ..net import Protocol, HttpMethod, ErrorType
+from ..net.tls import TlsOptions
+from ..net.uploads import FilePayload
+from .interfaces import AnalyseResult, IAnalysable, IManager
 
-DataType = TypeVar('DataType', Dict, str, bytes, Callable, Generator, Iterator)
+REQUEST_EXCEPTIONS: Tuple[Type[BaseException], ...]
+DataType = TypeVar('DataType', Dict, str, bytes, Callable, Generator, Iterator, FilePayload)
 
 # noinspection PyMissingConstructor
 class Job(IAnalysable):
     __session_manager: SessionManager
     __job_kwargs: Dict
+    __budget: RequestBudget
+    __limiter: RateLimiter
+    __handshakes: Dict
+    __uploaded: Dict
+    __render_url: Callable[[], str]
+    __render_headers: Callable[[], Dict[str, str]]
 
     protocol: Protocol
     url: str
+    name: str
 
     def __new__(cls, *args, **kwargs): pass
     def __init__(self, url: str, **kwargs): pass
-    
+    def __kind(self) -> str: pass
+    def record_samples(self, writer: SampleWriter, index: int=0) -> None: pass
+    def record_live(self, slot: LiveSlot) -> None: pass
+    def record_responses(self, sampler: ResponseSampler) -> None: pass
+    def limit(self, budget: RequestBudget) -> None: pass
+    def throttle(self, limiter: RateLimiter) -> None: pass
+    def clone(self, **kwargs) -> Job: pass
+    def _collect(self) -> None: pass
+    def split(self) -> Optional[AnalyseResult]: pass
+    def _upload(self) -> Optional[Dict[str, Dict]]: pass
+    def __record_upload(self, size: int) -> None: pass
+    def __record_frame(self, size: int) -> None: pass
+    def _tls(self) -> Dict[str, Dict]: pass
+    def __tls(self) -> TlsOptions: pass
+    def __record_handshake(self, resumed: bool, duration: int) -> None: pass
+    def __acquire(self) -> bool: pass
+    def __close(self, session: Session, status_code: int=200, error: ErrorType=None, size: int=0,
+                headers: Mapping=None, body: bytes=None, exception: BaseException=None) -> None: pass
+    def __discard(self, session: Session) -> None: pass
+
+    def __encodes_data(self) -> bool: pass
+
     async def start(self) -> asyncio.coroutine: pass
     async def __do_request(self, data: Iterator, headers: Dict=None, cookies: Dict=None, callback: Callable=None) -> asyncio.coroutine: pass
+    async def __do_client(self, concurrency: int, data: Iterator, headers: Dict=None, cookies: Dict=None, callback: Callable=None) -> asyncio.coroutine: pass
     async def __do_http_request(self, client: Client, method: HttpMethod, data: Iterator, callback: Callable=None) -> asyncio.coroutine: pass
+    async def __do_websocket_connect(self, client: Client, message_type: WSMsgType, data: Iterator, callback: Callable=None) -> asyncio.coroutine: pass
     async def __do_websocket_request(self, ws: ClientWebSocketResponse, message_type: WSMsgType, data: Iterator, callback: Callable=None) -> asyncio.coroutine: pass
     
     @staticmethod
-    def __data_iterator(data: DataType) -> Iterator: pass
+    def __data_iterator(data: DataType, encode: bool=False) -> Iterator: pass
 
 class JobContainer(metaclass=ABCMeta):
     _job: Job
@@ -36,15 +74,22 @@ class JobContainer(metaclass=ABCMeta):
     _headers: Dict
     _cookies: Dict
     _callback: Callable
+    _success: Callable[[int], bool]
+    _concurrency: int
+    _tls: TlsOptions
 
     reuse_job: bool
+    url: str
+    broadcast: bool
 
-    def __init__(self, url: str, data: DataType=None, headers: Dict=None, cookies: Dict=None, callback: Callable=None, reuse_job=True): pass
+    def __init__(self, url: str, data: DataType=None, headers: Dict=None, cookies: Dict=None, callback: Callable=None, reuse_job=True,
+                 success: Callable[[int], bool]=None, concurrency: int=1, broadcast: bool=False,
+                 tls: TlsOptions=None): pass
 
     @abstractmethod
     def job(self) -> Job: pass
     @staticmethod
-    def from_url(url: str, method: HttpMethod) -> JobContainer: pass
+    def from_url(url: str, method: HttpMethod, concurrency: int=1) -> JobContainer: pass
 
 class HttpGetJob(JobContainer):
     def __new__(cls, *args, **kwargs) -> JobContainer: pass
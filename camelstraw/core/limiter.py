@@ -0,0 +1,92 @@
+import time
+from asyncio import sleep
+from multiprocessing import Lock
+from multiprocessing.shared_memory import SharedMemory
+
+# slots of the shared state, all of them are doubles
+RATE, BURST, TAT, GRANTED = range(4)
+LIMITER_SIZE = 4 * 8
+
+
+class RateLimiter:
+    """
+    requests per second shared by all the worker processes of a host, the state
+    lives in shared memory and every request reserves its slot under a process
+    shared lock instead of asking another process, then sleeps until the slot
+    comes. it's a token bucket in the form of GCRA: the theoretical arrival time
+    of the next request moves forward by 1 / rate on every reservation, and may
+    lag behind now by at most burst slots after an idle period
+    """
+    def __init__(self, rate=None, burst=1):
+        self.__memory = SharedMemory(create=True, size=LIMITER_SIZE)
+        self.__lock = Lock()
+        self.__values = self.__memory.buf.cast('d')
+        self.__owner = True
+        self.set(rate, burst)
+
+    def __getstate__(self):
+        # shared by name when the pooled processes are spawned instead of forked
+        return {'name': self.__memory.name, 'lock': self.__lock}
+
+    def __setstate__(self, state):
+        self.__memory = SharedMemory(name=state['name'])
+        self.__lock = state['lock']
+        self.__values = self.__memory.buf.cast('d')
+        self.__owner = False
+
+    @property
+    def rate(self):
+        """
+        :return: requests per second, None if unlimited
+        """
+        rate = self.__values[RATE]
+        return rate if rate > 0 else None
+
+    @property
+    def granted(self):
+        """
+        :return: number of requests reserved since the limiter is created
+        """
+        return int(self.__values[GRANTED])
+
+    def set(self, rate=None, burst=1):
+        """
+        :param rate: requests per second, None or 0 means unlimited
+        :param burst: number of requests sent at once after an idle period
+        :return:
+        """
+        with self.__lock:
+            self.__values[RATE] = rate or 0
+            self.__values[BURST] = max(1, burst)
+            self.__values[TAT] = time.monotonic()
+
+    def reserve(self):
+        """
+        reserve the slot of the next request
+        :return: seconds to wait until the slot
+        """
+        values = self.__values
+        if values[RATE] <= 0:
+            return 0
+        # the monotonic clock is shared by all processes of the host
+        with self.__lock:
+            now, interval = time.monotonic(), 1 / values[RATE]
+            slot = max(values[TAT], now - (values[BURST] - 1) * interval)
+            values[TAT] = slot + interval
+            values[GRANTED] += 1
+        return slot - now
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await sleep(delay)
+
+    def close(self):
+        """
+        detach from the shared memory, which is released by the creator
+        :return:
+        """
+        self.__values.release()
+        self.__memory.close()
+        if self.__owner:
+            self.__memory.unlink()
@@ -0,0 +1,28 @@
+import asyncio
+from multiprocessing import Lock
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional
+
+RATE: int
+BURST: int
+TAT: int
+GRANTED: int
+LIMITER_SIZE: int
+
+
+class RateLimiter:
+    __memory: SharedMemory
+    __lock: Lock
+    __values: memoryview
+    __owner: bool
+
+    rate: Optional[float]
+    granted: int
+
+    def __init__(self, rate: float=None, burst: int=1): pass
+    def __getstate__(self) -> Dict: pass
+    def __setstate__(self, state: Dict) -> None: pass
+    def set(self, rate: float=None, burst: int=1) -> None: pass
+    def reserve(self) -> float: pass
+    async def acquire(self) -> asyncio.coroutine: pass
+    def close(self) -> None: pass
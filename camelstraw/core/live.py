@@ -0,0 +1,159 @@
+from multiprocessing.shared_memory import SharedMemory
+
+from ..util import Histogram
+
+# fields of a slot, all of them are signed 64 bits integers, followed by the latency buckets
+SEQUENCE, TOTAL, SUCCESS, ERRORS, BYTES = range(5)
+LIVE_FIELDS = ('total_request', 'success_request', 'errors', 'bytes')
+# latency buckets keep 2 significant digits, values below 100 ms are exact, up to 10 ^ 8 ms
+LIVE_BUCKETS = 100 + 6 * 90
+SLOT_LENGTH = 5 + LIVE_BUCKETS
+SLOT_SIZE = SLOT_LENGTH * 8
+
+
+def live_bucket(value):
+    """
+    :param value: milliseconds
+    :return: index of the bucket
+    """
+    value = max(0, int(value))
+    if value < 100:
+        return value
+    digits = len(str(value)) - 2
+    return min(100 + (digits - 1) * 90 + value // 10 ** digits - 10, LIVE_BUCKETS - 1)
+
+
+def live_bucket_value(index):
+    """
+    :param index: index of the bucket
+    :return: the lower bound of the bucket (milliseconds)
+    """
+    if index < 100:
+        return index
+    digits, mantissa = divmod(index - 100, 90)
+    return (mantissa + 10) * 10 ** (digits + 1)
+
+
+def merge_live(counters):
+    """
+    :param counters: iterable of dicts of the counters and the latency histogram
+    :return: the sum of them
+    """
+    counters = list(counters)
+    total = {field: sum(item[field] for item in counters) for field in LIVE_FIELDS}
+    total['histogram'] = Histogram()
+    [total['histogram'].merge(item['histogram']) for item in counters]
+    return total
+
+
+class LiveSlot:
+    """
+    counters of a worker process in the shared memory, the process is the only
+    writer of its slot, so writing needs no lock: the sequence is odd while the
+    counters are being changed, and readers retry until they see the same even
+    sequence before and after copying the slot
+    """
+    def __init__(self, values, offset):
+        self.__values = values
+        self.__offset = offset
+
+    def record(self, latency, success, error=False, size=0):
+        """
+        :param latency: milliseconds
+        :param success: whether the request succeeded
+        :param error: whether the request failed without a response
+        :param size: bytes received
+        :return:
+        """
+        values, offset = self.__values, self.__offset
+        values[offset] += 1
+        values[offset + TOTAL] += 1
+        values[offset + SUCCESS] += success
+        values[offset + ERRORS] += error
+        values[offset + BYTES] += size
+        values[offset + 5 + live_bucket(latency)] += 1
+        values[offset] += 1
+
+
+class LiveCounters:
+    """
+    per worker live counters in shared memory, read by the worker manager at
+    any time without any message from the workers
+    """
+    def __init__(self, slots):
+        self.__memory = SharedMemory(create=True, size=max(1, slots) * SLOT_SIZE)
+        self.__values = self.__memory.buf.cast('q')
+        self.__slots = max(1, slots)
+        self.__owner = True
+
+    def __getstate__(self):
+        # shared by name when the pooled processes are spawned instead of forked
+        return {'name': self.__memory.name, 'slots': self.__slots}
+
+    def __setstate__(self, state):
+        self.__memory = SharedMemory(name=state['name'])
+        self.__values = self.__memory.buf.cast('q')
+        self.__slots = state['slots']
+        self.__owner = False
+
+    @property
+    def slots(self):
+        return self.__slots
+
+    def slot(self, index):
+        """
+        :param index: index of the pooled process owning the slot
+        :return: LiveSlot
+        """
+        return LiveSlot(self.__values, index * SLOT_LENGTH)
+
+    def reset(self, indexes):
+        """
+        zero the slots, only while their owners are not running any round
+        :param indexes:
+        :return:
+        """
+        for index in indexes:
+            offset = index * SLOT_LENGTH
+            self.__values[offset:offset + SLOT_LENGTH] = memoryview(bytes(SLOT_SIZE)).cast('q')
+
+    def read(self, index):
+        """
+        a consistent copy of a slot
+        :param index:
+        :return: dict of the counters and the latency histogram
+        """
+        values, offset = self.__values, index * SLOT_LENGTH
+        while True:
+            sequence = values[offset]
+            if sequence & 1:
+                continue
+            copied = values[offset:offset + SLOT_LENGTH].tolist()
+            if values[offset] == sequence:
+                break
+        counters = dict(zip(LIVE_FIELDS, copied[TOTAL:BYTES + 1]))
+        histogram = Histogram()
+        for bucket, count in enumerate(copied[5:]):
+            if count > 0:
+                histogram.record(live_bucket_value(bucket), count)
+        counters['histogram'] = histogram
+        return counters
+
+    def snapshot(self, indexes):
+        """
+        consistent copies of several slots and their sum
+        :param indexes:
+        :return: dict of 'workers' (index -> counters) and 'total'
+        """
+        workers = {index: self.read(index) for index in indexes}
+        return {'workers': workers, 'total': merge_live(workers.values())}
+
+    def close(self):
+        """
+        detach from the shared memory, which is released by the creator
+        :return:
+        """
+        self.__values.release()
+        self.__memory.close()
+        if self.__owner:
+            self.__memory.unlink()
@@ -0,0 +1,43 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterable, Tuple
+
+SEQUENCE: int
+TOTAL: int
+SUCCESS: int
+ERRORS: int
+BYTES: int
+LIVE_FIELDS: Tuple[str, ...]
+LIVE_BUCKETS: int
+SLOT_LENGTH: int
+SLOT_SIZE: int
+
+
+def live_bucket(value: float) -> int: pass
+def live_bucket_value(index: int) -> int: pass
+def merge_live(counters: Iterable[Dict]) -> Dict: pass
+
+
+class LiveSlot:
+    __values: memoryview
+    __offset: int
+
+    def __init__(self, values: memoryview, offset: int): pass
+    def record(self, latency: int, success: bool, error: bool=False, size: int=0) -> None: pass
+
+
+class LiveCounters:
+    __memory: SharedMemory
+    __values: memoryview
+    __slots: int
+    __owner: bool
+
+    slots: int
+
+    def __init__(self, slots: int): pass
+    def __getstate__(self) -> Dict: pass
+    def __setstate__(self, state: Dict) -> None: pass
+    def slot(self, index: int) -> LiveSlot: pass
+    def reset(self, indexes: Iterable[int]) -> None: pass
+    def read(self, index: int) -> Dict: pass
+    def snapshot(self, indexes: Iterable[int]) -> Dict: pass
+    def close(self) -> None: pass
@@ -1,15 +1,22 @@
-from asyncio import get_event_loop, ensure_future, gather
+import time
+from asyncio import new_event_loop, ensure_future, gather, wait_for, Event, TimeoutError as AsyncTimeoutError
 from multiprocessing import Process
 from typing import List
 
 import dill
-from aiohttp import web, ClientSession as Client, WSMsgType
+from aiohttp import web, ClientSession as Client, WSCloseCode, WSMsgType
 from aiohttp.web_app import Application
 
+from .budget import RequestBudget
 from .job import JobContainer
 from .interfaces import AnalyseResult
-from ..settings import SLAVES, MASTER_PORT, MASTER
-from ..util import singleton, readonly
+from .live import merge_live
+from .profiles import profile_options, write_run_profiles
+from .thresholds import Thresholds, ThresholdWatch
+from ..net import ws_connect
+from ..settings import SLAVES, MASTER_PORT, MASTER, MASTER_CONNECT_RETRY, WORKER_PINNING, CONTROL_CORES, \
+    RATE_REBALANCE_INTERVAL, RATE_SLACK, PROFILE_DIR
+from ..util import uid, singleton, readonly, plan_cpus, pin_cpus, Histogram
 
 
 @singleton
@@ -17,19 +24,52 @@ class MasterService:
     """
     global controller
     """
-    def __init__(self, jobs, worker_num=None, host='0.0.0.0', port=MASTER_PORT):
+    def __init__(self, jobs, worker_num=None, run_id=None, requests=None, rate=None, profile=None, warmup=None,
+                 thresholds=None, host='0.0.0.0', port=MASTER_PORT):
         self.__app = Application()
         self.__master = None
+        # direct children, slaves or relays, and the child every leaf slave is reached through
         self.__slaves = {}
+        self.__leaves = {}
         self.__results = {}
+        # milliseconds from issuing the round to the first request, per slave
+        self.__startup = {}
+        # cpus the processes of every slave are pinned to
+        self.__pinning = {}
+        # latest health samples streamed by every slave, per worker
+        self.__health = {}
+        # latest live counters streamed by every slave
+        self.__progress = {}
+        # rate share of every child owning jobs, the share it starts with, and the rates they
+        # achieve since the last rebalance
+        self.__shares = {}
+        self.__weights = {}
+        self.__granted = {}
+        self.__achieved = {}
+        # set once all the slaves are initialized
+        self.__ready = None
+        # the thresholds checked against the live counters of the running round, and the breach aborting it
+        self.__watch = None
+        self.__aborted = None
         # properties
         readonly(self, 'jobs', lambda: jobs)
         readonly(self, 'worker_num', lambda: worker_num)
+        readonly(self, 'run_id', lambda: run_id)
+        readonly(self, 'requests', lambda: requests)
+        readonly(self, 'rate', lambda: rate)
+        readonly(self, 'profile', lambda: profile)
+        readonly(self, 'warmup', lambda: warmup)
+        readonly(self, 'thresholds', lambda: thresholds)
         readonly(self, 'host', lambda: host)
         readonly(self, 'port', lambda: port)
         readonly(self, 'result', lambda: self.__results.get('master', None))
 
     def start(self):
+        # keep the service off the cpus of the workers
+        if WORKER_PINNING:
+            pin_cpus(plan_cpus(CONTROL_CORES)[0])
+        self.__app.on_startup.append(self.__on_startup)
+        self.__app.on_shutdown.append(self.__on_shutdown)
         # execute websocket server in another process
         self.__app.add_routes([
             # communicate with slaves
@@ -39,21 +79,116 @@ class MasterService:
         ])
         web.run_app(self.__app, host=self.host, port=self.port)
 
-    async def __init_slave(self, slave, jobs, worker_num):
-        ws = self.__slaves[slave]
+    async def __on_startup(self, app):
+        self.__ready = Event()
+        self.__aborted = Event()
+
+    async def __on_shutdown(self, app):
+        # disconnect the slaves at once, so that they can wait for the next master
+        await gather(*(ws.close(code=WSCloseCode.GOING_AWAY) for ws in self.__slaves.values()))
+
+    def __measure_at(self):
+        """
+        time (milliseconds) the warmup of the round ends at, every slave starts
+        measuring at the same moment however long it takes to start
+        :return: None if the run doesn't warm up
+        """
+        if not self.warmup:
+            return None
+        return int((time.time() + self.warmup) * 1000)
+
+    async def __init_slave(self, slave, jobs, worker_num, requests=None, partition=None, rate=None,
+                           measure_at=None):
+        # a leaf behind a relay is initialized through the relay
+        ws = self.__slaves[self.__leaves[slave]]
         await ws.send_json({
             'command': 'init',
+            'slave': slave,
+            'run': self.run_id,
             'worker_num': worker_num,
+            'requests': requests,
+            'partition': partition,
+            'rate': rate,
+            'profile': self.profile,
+            'warmup': self.warmup,
+            'measure_at': measure_at,
             'jobs': [list(dill.dumps(job)) for job in jobs]
         })
 
-    def __init_slaves(self):
-        tasks, job_groups = [], [[] for _ in range(len(self.__slaves))]
-        for i, job in enumerate(self.jobs):
-            job_groups[i % len(self.__slaves)].append(job)
-        for i, slave in enumerate(self.__slaves.keys()):
-            tasks.append(self.__init_slave(slave, job_groups[i], self.worker_num))
-        ensure_future(gather(*tasks))
+    async def __init_slaves(self):
+        # jobs are split across the leaf slaves, wherever they are in the tree
+        slaves = list(self.__leaves.keys())
+        tasks, job_groups = [], [[] for _ in range(len(slaves))]
+        # broadcast jobs run on every slave, each of which takes a share of them
+        for job in self.jobs:
+            if job.broadcast:
+                [group.append(job) for group in job_groups]
+        for i, job in enumerate(job for job in self.jobs if not job.broadcast):
+            job_groups[i % len(slaves)].append(job)
+        # split the request budget exactly across the slaves owning jobs, and the rate evenly
+        shares = [None] * len(job_groups)
+        busy = [i for i, group in enumerate(job_groups) if group]
+        if self.requests is not None:
+            for i, share in zip(busy, RequestBudget.split(self.requests, len(busy))):
+                shares[i] = share
+        rates = {slaves[i]: self.rate / len(busy) for i in busy} if self.rate is not None else {}
+        # the rate is rebalanced across the direct children, a relay holds the shares of its leaves
+        self.__shares = {}
+        for slave, rate in rates.items():
+            child = self.__leaves[slave]
+            self.__shares[child] = self.__shares.get(child, 0) + rate
+        self.__weights = dict(self.__shares)
+        measure_at = self.__measure_at()
+        self.__watch_round(measure_at)
+        for i, slave in enumerate(slaves):
+            tasks.append(self.__init_slave(slave, job_groups[i], self.worker_num, shares[i],
+                                           [i, len(slaves)], rates.get(slave, None), measure_at))
+        await gather(*tasks)
+        self.__ready.set()
+
+    async def __restart_slave(self, slave, params, measure_at=None):
+        ws = self.__slaves[slave]
+        await ws.send_json({
+            'command': 'restart',
+            'params': params,
+            'measure_at': measure_at
+        })
+
+    async def __restart_slaves(self, params):
+        await self.__ready.wait()
+        self.__results = {}
+        self.__health = {}
+        self.__progress = {}
+        self.__granted = {}
+        self.__achieved = {}
+        self.__master = None
+        measure_at = self.__measure_at()
+        self.__watch_round(measure_at)
+        await gather(*(self.__restart_slave(slave, params, measure_at) for slave in self.__slaves))
+
+    def __watch_round(self, measure_at=None):
+        """
+        check the thresholds from scratch for a new round, from the end of its warmup
+        :param measure_at: milliseconds the warmup ends at
+        :return:
+        """
+        self.__aborted.clear()
+        if self.thresholds is not None:
+            self.__watch = ThresholdWatch(self.thresholds, measure_at / 1000 if measure_at is not None else None)
+
+    def __check(self):
+        """
+        check the thresholds against the latest live counters of all the slaves,
+        the whole cluster is stopped once one is breached
+        :return:
+        """
+        if self.__watch is None or self.__aborted.is_set() or not self.__progress:
+            return
+        progress = merge_live(dict(counters, histogram=Histogram.from_json(counters['histogram']))
+                              for counters in self.__progress.values())
+        if self.__watch.observe(progress) is not None:
+            self.__aborted.set()
+            self.__stop_slaves()
 
     async def __stop_slave(self, slave):
         ws = self.__slaves[slave]
@@ -61,6 +196,9 @@ class MasterService:
             'command': 'stop'
         })
 
+    async def __close_slaves(self):
+        await gather(*(ws.send_json({'command': 'close'}) for ws in self.__slaves.values()))
+
     def __stop_slaves(self):
         tasks = [self.__stop_slave(slave) for slave in self.__slaves]
         ensure_future(gather(*tasks))
@@ -68,16 +206,25 @@ class MasterService:
     async def __gather_result(self):
         if 'master' in self.__results:
             return
+        abort = self.__watch.breach if self.__watch is not None else None
         self.__results['master'] = AnalyseResult\
-            .from_results('master', list(self.__results.values()))
-        # send data to master
+            .from_results('master', list(self.__results.values()), abort)
+        # the master may be not waiting for the result yet
+        if self.__master is not None:
+            await self.__send_result()
+
+    async def __send_result(self):
         await self.__master.send_json({
             'command': 'report',
-            'result': self.result.json_result
+            'result': self.result.json_result,
+            'slaves': {slave: result.json_result for slave, result in self.__results.items() if slave != 'master'},
+            'startup': self.__startup,
+            'pinning': self.__pinning
         })
 
     async def __slave_handler(self, request):
-        ws = web.WebSocketResponse()
+        # results may be large, profiled ones especially
+        ws = web.WebSocketResponse(max_msg_size=0)
         await ws.prepare(request)
         async for msg in ws:
             assert msg.type == WSMsgType.TEXT
@@ -85,23 +232,82 @@ class MasterService:
             assert 'command' in data and 'slave' in data
             # init command
             if 'init' == data['command']:
-                # record the websocket
+                # record the websocket, a relay brings the leaf slaves behind it
                 self.__slaves[data['slave']] = ws
+                for leaf in data.get('slaves', [data['slave']]):
+                    self.__leaves[leaf] = data['slave']
                 # collected all the slave websockets
-                if len(self.__slaves) >= len(SLAVES):
-                    self.__init_slaves()
+                if len(self.__leaves) >= len(SLAVES):
+                    await self.__init_slaves()
             # report command
             elif 'report' == data['command']:
                 assert 'result' in data
                 result = AnalyseResult.from_json(data['result'])
                 self.__results[data['slave']] = result
-                # collected all the results
-                if len(self.__results) >= len(SLAVES):
+                self.__startup[data['slave']] = data.get('startup', None)
+                self.__pinning[data['slave']] = data.get('pinning', None)
+                # collected all the results, a relay reports the merged result of its leaves
+                if len(self.__results) >= len(self.__slaves):
                     await self.__gather_result()
+            # live health of the workers
+            elif 'health' == data['command']:
+                self.__health[data['slave']] = data.get('health', {})
+                if data.get('progress', None) is not None:
+                    self.__progress[data['slave']] = data['progress']
+                    self.__check()
+                if self.rate is not None and data.get('granted', None) is not None:
+                    self.__measure(data['slave'], data['granted'])
+                    await self.__rebalance()
         return ws
 
+    def __measure(self, slave, granted):
+        """
+        track the rate a slave achieves, by the requests its workers are granted
+        :param slave:
+        :param granted: number of granted requests since the workers of the slave are forked
+        :return:
+        """
+        now = time.time()
+        if slave not in self.__granted:
+            self.__granted[slave] = (granted, now)
+            return
+        last, since = self.__granted[slave]
+        if now - since >= RATE_REBALANCE_INTERVAL:
+            self.__achieved[slave] = (granted - last) / (now - since)
+            self.__granted[slave] = (granted, now)
+
+    async def __rebalance(self):
+        """
+        move the rate share of the children falling behind to the others, and give it
+        back step by step once they recover, every child is entitled to the share it
+        starts with, which is larger for the relays of more slaves
+        :return:
+        """
+        if not self.__shares or not set(self.__shares) <= set(self.__achieved):
+            return
+        achieved, self.__achieved = self.__achieved, {}
+        weights = self.__weights
+        caps = {}
+        for slave, share in self.__shares.items():
+            if achieved[slave] < share * (1 - RATE_SLACK):
+                caps[slave] = achieved[slave] * (1 + RATE_SLACK)
+            elif share < weights[slave]:
+                caps[slave] = share * (1 + RATE_SLACK)
+        caps = {slave: cap for slave, cap in caps.items() if cap < weights[slave]}
+        free = [slave for slave in self.__shares if slave not in caps]
+        # every child falls behind, the cluster can't reach the rate anyway
+        if not free:
+            return
+        rest = (self.rate - sum(caps.values())) / sum(weights[slave] for slave in free)
+        shares = dict(caps, **{slave: rest * weights[slave] for slave in free})
+        changed = [slave for slave, share in shares.items() if share != self.__shares[slave]]
+        self.__shares = shares
+        await gather(*(self.__slaves[slave].send_json({'command': 'rate', 'rate': shares[slave]})
+                       for slave in changed))
+
     async def __master_handler(self, request):
-        ws = web.WebSocketResponse()
+        # results may be large, profiled ones especially
+        ws = web.WebSocketResponse(max_msg_size=0)
         await ws.prepare(request)
         async for msg in ws:
             assert msg.type == WSMsgType.TEXT
@@ -109,45 +315,238 @@ class MasterService:
             assert 'command' in data
             if 'stop' == data['command']:
                 self.__master = ws
-                self.__stop_slaves()
+                # request count bounded rounds may be finished already
+                if self.result is not None:
+                    await self.__send_result()
+                else:
+                    self.__stop_slaves()
+            # wait until the request budget is used up
+            elif 'wait' == data['command']:
+                self.__master = ws
+                if self.result is not None:
+                    await self.__send_result()
+            # finish the running round and start another one with the alive slaves & workers
+            elif 'restart' == data['command']:
+                await self.__restart_slaves(data.get('params', {}))
+                await ws.send_json({'command': 'restarted'})
+            # release the slaves, they exit instead of waiting for the next master
+            elif 'close' == data['command']:
+                await self.__close_slaves()
+                await ws.send_json({'command': 'closed'})
+            # block until a threshold is breached or the timeout passes
+            elif 'watch' == data['command']:
+                try:
+                    await wait_for(self.__aborted.wait(), data.get('timeout', None))
+                except AsyncTimeoutError:
+                    pass
+                abort = self.__watch.breach if self.__watch is not None else None
+                await ws.send_json({'command': 'watched', 'abort': abort})
+            # latest health samples of the running round
+            elif 'health' == data['command']:
+                await ws.send_json({'command': 'health', 'health': self.__health})
+            # latest live counters of the running round
+            elif 'progress' == data['command']:
+                await ws.send_json({'command': 'progress', 'progress': self.__progress})
         return ws
 
 
-def start_service(jobs_bytes, worker_num):
+def start_service(jobs_bytes, worker_num, run_id=None, requests=None, rate=None, profile=None, warmup=None,
+                  thresholds=None):
     jobs: List[JobContainer] = dill.loads(jobs_bytes)
-    service: MasterService = MasterService(jobs=jobs, worker_num=worker_num)
+    service: MasterService = MasterService(jobs=jobs, worker_num=worker_num, run_id=run_id, requests=requests,
+                                           rate=rate, profile=profile, warmup=warmup,
+                                           thresholds=Thresholds.from_json(thresholds))
     service.start()
 
 
-@singleton
 class Master:
 
-    def __init__(self, *jobs, worker_num=None):
+    def __init__(self, *jobs, worker_num=None, requests=None, rate=None, profile=None, warmup=None,
+                 thresholds=None):
+        """
+        :param rate: requests per second of the whole cluster, it's split across the slaves
+        and shifted away from the slaves falling behind
+        :param profile: profile every worker, 'cprofile', 'sample' or the dict of profile_options
+        :param warmup: seconds every round runs before it's measured, the requests sent meanwhile open
+        the connections and are reported apart as the warmup of the result
+        :param thresholds: Thresholds checked by the master service against the live counters of the
+        cluster, which is stopped once one is breached
+        """
+        if warmup is not None and warmup < 0:
+            raise ValueError('warmup should not be negative')
+        profile = profile_options(profile)
         self.__process = None
         self.__jobs = list(jobs)
         self.__result = None
+        self.__slave_results = {}
+        self.__startup = {}
+        self.__pinning = {}
+        self.__run_id = uid()
         # properties
         readonly(self, 'jobs', lambda: self.__jobs)
         readonly(self, 'result', lambda: self.__result)
+        readonly(self, 'slave_results', lambda: self.__slave_results)
+        readonly(self, 'startup', lambda: self.__startup)
+        readonly(self, 'pinning', lambda: self.__pinning)
         readonly(self, 'worker_num', lambda: worker_num)
+        readonly(self, 'requests', lambda: requests)
+        readonly(self, 'rate', lambda: rate)
+        readonly(self, 'profile', lambda: profile)
+        readonly(self, 'warmup', lambda: warmup)
+        readonly(self, 'thresholds', lambda: thresholds)
+        readonly(self, 'run_id', lambda: self.__run_id)
 
     def start(self):
+        thresholds = self.thresholds.to_json() if self.thresholds is not None else None
         self.__process = Process(target=start_service, args=(
-            dill.dumps(self.jobs), self.worker_num))
+            dill.dumps(self.jobs), self.worker_num, self.run_id, self.requests, self.rate, self.profile, self.warmup,
+            thresholds))
         self.__process.start()
 
-    def stop(self):
-        loop = get_event_loop()
-        loop.run_until_complete(self.__stop())
-        loop.close()
+    def restart(self, **params):
+        """
+        start another round on the alive cluster, the running round is dropped,
+        blocks until all slaves are initialized and told to restart
+        :param params: job arguments to override, concurrency for example
+        :return:
+        """
+        self.__run(self.__restart(params))
+
+    def collect(self):
+        """
+        stop the running round and gather its result, the cluster keeps alive
+        :return: AnalyseResult
+        """
+        self.__run(self.__collect('stop'))
+        return self.result
+
+    def wait(self):
+        """
+        block until every worker sends its share of the request budget, and
+        gather the result
+        :return: AnalyseResult
+        """
+        assert self.requests is not None
+        self.__run(self.__collect('wait'))
+        return self.result
+
+    def watch(self, timeout):
+        """
+        block until a threshold is breached, which stops the running round, or the timeout passes
+        :param timeout: seconds
+        :return: the breach, None if none
+        """
+        if self.thresholds is None:
+            time.sleep(timeout)
+            return None
+        return self.__run(self.__watch(timeout))
+
+    def health(self):
+        """
+        latest health samples of the running round: event loop lag, cpu, resident
+        memory and pending tasks of every worker
+        :return: slave -> worker id -> sample
+        """
+        return self.__run(self.__health())
+
+    def progress(self):
+        """
+        live counters of the running round summed across the slaves: total, successful
+        and failed requests, received bytes and the latency histogram
+        :return: dict of the counters, None before any slave reports
+        """
+        progress = self.__run(self.__progress())
+        if len(progress) == 0:
+            return None
+        return merge_live(dict(counters, histogram=Histogram.from_json(counters['histogram']))
+                          for counters in progress.values())
+
+    def write_profiles(self, directory=PROFILE_DIR):
+        """
+        write the profile of the last result merged across the cluster, and the one of every slave
+        :param directory:
+        :return: paths of the written files, the merged one first
+        """
+        return write_run_profiles(self.run_id, self.result, self.slave_results, directory)
+
+    def stop(self, release=True):
+        self.collect()
+        self.close(release)
+
+    def close(self, release=True):
+        """
+        shutdown the master service
+        :param release: let the slaves release their worker processes, otherwise they
+        keep the processes warm and wait for the next master
+        :return:
+        """
+        if release:
+            self.__run(self.__release())
         self.__process.terminate()
 
-    async def __stop(self):
-        async with Client().ws_connect('ws://%s:%s/master/' % (MASTER, MASTER_PORT)) as ws:
-            # send stop request
-            await ws.send_json({'command': 'stop'})
-            # receive result
-            data = await ws.receive_json()
-            assert 'command' in data and 'report' == data['command']
-            assert 'result' in data
-            self.__result = AnalyseResult.from_json(data['result'])
+    @staticmethod
+    def __run(coroutine):
+        loop = new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    async def __restart(self, params):
+        async with Client() as client:
+            async with await ws_connect(client, 'ws://%s:%s/master/' % (MASTER, MASTER_PORT),
+                                        MASTER_CONNECT_RETRY) as ws:
+                await ws.send_json({'command': 'restart', 'params': params})
+                data = await ws.receive_json()
+                assert 'command' in data and 'restarted' == data['command']
+
+    async def __watch(self, timeout):
+        async with Client() as client:
+            async with await ws_connect(client, 'ws://%s:%s/master/' % (MASTER, MASTER_PORT),
+                                        MASTER_CONNECT_RETRY) as ws:
+                await ws.send_json({'command': 'watch', 'timeout': timeout})
+                data = await ws.receive_json()
+                assert 'command' in data and 'watched' == data['command']
+                return data.get('abort', None)
+
+    async def __health(self):
+        async with Client() as client:
+            async with await ws_connect(client, 'ws://%s:%s/master/' % (MASTER, MASTER_PORT),
+                                        MASTER_CONNECT_RETRY) as ws:
+                await ws.send_json({'command': 'health'})
+                data = await ws.receive_json()
+                assert 'command' in data and 'health' == data['command']
+                return data.get('health', {})
+
+    async def __progress(self):
+        async with Client() as client:
+            async with await ws_connect(client, 'ws://%s:%s/master/' % (MASTER, MASTER_PORT),
+                                        MASTER_CONNECT_RETRY) as ws:
+                await ws.send_json({'command': 'progress'})
+                data = await ws.receive_json()
+                assert 'command' in data and 'progress' == data['command']
+                return data.get('progress', {})
+
+    async def __release(self):
+        async with Client() as client:
+            async with await ws_connect(client, 'ws://%s:%s/master/' % (MASTER, MASTER_PORT),
+                                        MASTER_CONNECT_RETRY) as ws:
+                await ws.send_json({'command': 'close'})
+                data = await ws.receive_json()
+                assert 'command' in data and 'closed' == data['command']
+
+    async def __collect(self, command):
+        async with Client() as client:
+            async with await ws_connect(client, 'ws://%s:%s/master/' % (MASTER, MASTER_PORT),
+                                        MASTER_CONNECT_RETRY) as ws:
+                # send stop or wait request
+                await ws.send_json({'command': command})
+                # receive result
+                data = await ws.receive_json()
+                assert 'command' in data and 'report' == data['command']
+                assert 'result' in data
+                self.__result = AnalyseResult.from_json(data['result'])
+                self.__slave_results = {slave: AnalyseResult.from_json(result)
+                                        for slave, result in data.get('slaves', {}).items()}
+                self.__startup = data.get('startup', {})
+                self.__pinning = data.get('pinning', {})
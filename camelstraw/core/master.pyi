@@ -1,6 +1,6 @@
 import asyncio
 from multiprocessing import Process
-from typing import Dict, List
+from typing import Coroutine, Dict, List, Optional, Tuple, Union
 
 from aiohttp import web
 from aiohttp.web_app import Application
@@ -8,44 +8,108 @@ from aiohttp.web_request import Request
 
 from .interfaces import AnalyseResult
 from .job import JobContainer
-from ..settings import MASTER_PORT
+from .thresholds import Thresholds, ThresholdWatch
+from ..settings import MASTER_PORT, PROFILE_DIR
 
 class MasterService:
     __app: Application
     __master: web.WebSocketResponse
     __slaves: Dict[str, web.WebSocketResponse]
+    __leaves: Dict[str, str]
     __results: Dict[str, AnalyseResult]
+    __startup: Dict[str, Optional[int]]
+    __pinning: Dict[str, Optional[Dict]]
+    __health: Dict[str, Dict[str, Dict]]
+    __progress: Dict[str, Dict]
+    __shares: Dict[str, float]
+    __weights: Dict[str, float]
+    __granted: Dict[str, Tuple[int, float]]
+    __achieved: Dict[str, float]
+    __ready: asyncio.Event
+    __watch: Optional[ThresholdWatch]
+    __aborted: asyncio.Event
 
     jobs: List[JobContainer]
     worker_num: int
+    run_id: str
+    requests: int
+    rate: float
+    profile: Optional[Dict]
+    warmup: Optional[float]
+    thresholds: Optional[Thresholds]
     host: str
     port: int
     result: AnalyseResult
 
-    def __init__(self, jobs: List[JobContainer], worker_num: int=None, host: str='0.0.0.0', port: int=MASTER_PORT): pass
+    def __init__(self, jobs: List[JobContainer], worker_num: int=None, run_id: str=None, requests: int=None,
+                 rate: float=None, profile: Dict=None, warmup: float=None, thresholds: Thresholds=None,
+                 host: str='0.0.0.0', port: int=MASTER_PORT): pass
 
     def start(self) -> None: pass
-    async def __init_slave(self, slave: str, jobs: List[JobContainer], worker_num: int) -> asyncio.coroutine: pass
-    def __init_slaves(self) -> None: pass
+    async def __on_startup(self, app: Application) -> None: pass
+    async def __on_shutdown(self, app: Application) -> None: pass
+    def __measure_at(self) -> Optional[int]: pass
+    async def __init_slave(self, slave: str, jobs: List[JobContainer], worker_num: int, requests: int=None,
+                           partition: List[int]=None, rate: float=None,
+                           measure_at: int=None) -> asyncio.coroutine: pass
+    async def __init_slaves(self) -> asyncio.coroutine: pass
+    async def __restart_slave(self, slave: str, params: Dict, measure_at: int=None) -> asyncio.coroutine: pass
+    async def __restart_slaves(self, params: Dict) -> asyncio.coroutine: pass
+    def __watch_round(self, measure_at: int=None) -> None: pass
+    def __check(self) -> None: pass
     async def __stop_slave(self, slave: str) -> asyncio.coroutine: pass
     def __stop_slaves(self) -> None: pass
+    async def __close_slaves(self) -> asyncio.coroutine: pass
     async def __gather_result(self) -> None: pass
+    async def __send_result(self) -> None: pass
     async def __slave_handler(self, request: Request) -> asyncio.coroutine: pass
+    def __measure(self, slave: str, granted: int) -> None: pass
+    async def __rebalance(self) -> asyncio.coroutine: pass
     async def __master_handler(self, request: Request) -> asyncio.coroutine: pass
 
-def start_service(jobs_bytes: bytes, worker_num: int) -> None: pass
+def start_service(jobs_bytes: bytes, worker_num: int, run_id: str=None, requests: int=None,
+                  rate: float=None, profile: Dict=None, warmup: float=None, thresholds: Dict=None) -> None: pass
 
 class Master:
     __process: Process
     __jobs: List[JobContainer]
     __result: AnalyseResult
+    __slave_results: Dict[str, AnalyseResult]
+    __startup: Dict[str, Optional[int]]
+    __pinning: Dict[str, Optional[Dict]]
+    __run_id: str
 
     jobs: List[JobContainer]
     result: AnalyseResult
+    slave_results: Dict[str, AnalyseResult]
+    startup: Dict[str, Optional[int]]
+    pinning: Dict[str, Optional[Dict]]
     worker_num: int
+    requests: int
+    rate: float
+    profile: Optional[Dict]
+    warmup: Optional[float]
+    thresholds: Optional[Thresholds]
+    run_id: str
 
-    def __init__(self, *jobs: JobContainer, worker_num: int=None): pass
+    def __init__(self, *jobs: JobContainer, worker_num: int=None, requests: int=None, rate: float=None,
+                 profile: Union[str, Dict]=None, warmup: float=None, thresholds: Thresholds=None): pass
 
     def start(self) -> None: pass
-    def stop(self) -> None: pass
-    async def __stop(self) -> asyncio.coroutine: pass
+    def restart(self, **params) -> None: pass
+    def collect(self) -> AnalyseResult: pass
+    def wait(self) -> AnalyseResult: pass
+    def watch(self, timeout: float) -> Optional[Dict]: pass
+    def health(self) -> Dict[str, Dict[str, Dict]]: pass
+    def progress(self) -> Optional[Dict]: pass
+    def write_profiles(self, directory: str=PROFILE_DIR) -> List[str]: pass
+    def stop(self, release: bool=True) -> None: pass
+    def close(self, release: bool=True) -> None: pass
+    @staticmethod
+    def __run(coroutine: Coroutine): pass
+    async def __restart(self, params: Dict) -> asyncio.coroutine: pass
+    async def __watch(self, timeout: float) -> asyncio.coroutine: pass
+    async def __health(self) -> asyncio.coroutine: pass
+    async def __progress(self) -> asyncio.coroutine: pass
+    async def __release(self) -> asyncio.coroutine: pass
+    async def __collect(self, command: str) -> asyncio.coroutine: pass
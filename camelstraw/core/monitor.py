@@ -0,0 +1,115 @@
+import os
+import time
+from asyncio import get_event_loop, sleep, all_tasks
+
+from ..settings import HEALTH_INTERVAL, HEALTH_LAG_LIMIT, HEALTH_CPU_LIMIT
+from ..util import readonly, Histogram
+
+
+def resident_memory():
+    """
+    resident set size of the current process
+    :return: bytes
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # peak instead of current size off linux
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def saturation(summary, lag_limit=HEALTH_LAG_LIMIT, cpu_limit=HEALTH_CPU_LIMIT):
+    """
+    reasons a worker limited the throughput by itself rather than the target
+    :param summary: health summary of a worker
+    :param lag_limit: milliseconds
+    :param cpu_limit: percent of a cpu
+    :return: list of reasons, empty if the worker is healthy
+    """
+    reasons = []
+    if summary.get('lag_p99', 0) > lag_limit:
+        reasons.append('event loop lag p99 %s ms' % summary['lag_p99'])
+    if summary.get('cpu_mean', 0) > cpu_limit:
+        reasons.append('cpu %s%%' % summary['cpu_mean'])
+    return reasons
+
+
+class HealthMonitor:
+    """
+    samples the health of a worker process while its round is running: the
+    lag of the event loop waking up a sleeping task, the cpu utilisation of
+    the process, its resident memory and the number of pending tasks
+    """
+    def __init__(self, interval=HEALTH_INTERVAL):
+        self.__interval = interval
+        self.__samples = 0
+        self.__lag = Histogram()
+        self.__lag_sum = 0.0
+        self.__cpu_sum = 0.0
+        self.__cpu_max = 0.0
+        self.__rss_max = 0
+        self.__tasks_max = 0
+        self.__last = None
+        # properties
+        readonly(self, 'interval', lambda: interval)
+        readonly(self, 'last', lambda: self.__last)
+        readonly(self, 'summary', lambda: self.__summary())
+
+    async def run(self, worker):
+        """
+        sample until the worker is stopped, every sample is streamed to the
+        worker manager as soon as it's taken
+        :param worker:
+        :return:
+        """
+        loop = get_event_loop()
+        wall, cpu = time.perf_counter(), time.process_time()
+        while True:
+            scheduled = loop.time()
+            await sleep(self.__interval)
+            lag = max(0.0, (loop.time() - scheduled - self.__interval) * 1000)
+            now_wall, now_cpu = time.perf_counter(), time.process_time()
+            utilisation = (now_cpu - cpu) * 100 / max(now_wall - wall, 1e-6)
+            wall, cpu = now_wall, now_cpu
+            self.record(lag, utilisation, resident_memory(), len(all_tasks(loop)))
+            if worker.queue is not None:
+                worker.queue.put(('health', worker.id, self.__last))
+
+    def record(self, lag, cpu, rss, tasks):
+        """
+        :param lag: milliseconds
+        :param cpu: percent of a cpu
+        :param rss: bytes
+        :param tasks:
+        :return:
+        """
+        self.__samples += 1
+        self.__lag.record(lag)
+        self.__lag_sum += lag
+        self.__cpu_sum += cpu
+        self.__cpu_max = max(self.__cpu_max, cpu)
+        self.__rss_max = max(self.__rss_max, rss)
+        self.__tasks_max = max(self.__tasks_max, tasks)
+        self.__last = {
+            'time': int(time.time() * 1000),
+            'lag': round(lag, 1),
+            'cpu': round(cpu, 1),
+            'rss': rss,
+            'tasks': tasks
+        }
+
+    def __summary(self):
+        if self.__samples == 0:
+            return None
+        return {
+            'samples': self.__samples,
+            'lag_mean': round(self.__lag_sum / self.__samples, 1),
+            'lag_p99': self.__lag.percentile(99),
+            'lag_max': self.__lag.max,
+            'cpu_mean': round(self.__cpu_sum / self.__samples, 1),
+            'cpu_max': round(self.__cpu_max, 1),
+            'rss_max': self.__rss_max,
+            'tasks_max': self.__tasks_max
+        }
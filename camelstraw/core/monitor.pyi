@@ -0,0 +1,29 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from ..util import Histogram
+
+
+def resident_memory() -> int: pass
+def saturation(summary: Dict, lag_limit: float=..., cpu_limit: float=...) -> List[str]: pass
+
+
+class HealthMonitor:
+    __interval: float
+    __samples: int
+    __lag: Histogram
+    __lag_sum: float
+    __cpu_sum: float
+    __cpu_max: float
+    __rss_max: int
+    __tasks_max: int
+    __last: Optional[Dict]
+
+    interval: float
+    last: Optional[Dict]
+    summary: Optional[Dict]
+
+    def __init__(self, interval: float=...): pass
+    async def run(self, worker) -> asyncio.coroutine: pass
+    def record(self, lag: float, cpu: float, rss: int, tasks: int) -> None: pass
+    def __summary(self) -> Optional[Dict]: pass
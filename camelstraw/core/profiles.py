@@ -0,0 +1,202 @@
+import cProfile
+import marshal
+import os
+import re
+import signal
+
+from ..settings import PROFILE_INTERVAL
+
+# cProfile traces every call, sample only reads the stack on a cpu timer signal
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+def profile_options(mode, window=None, interval=None):
+    """
+    profiling option of a run, passed from the master to every worker
+    :param mode: 'cprofile' or 'sample'
+    :param window: seconds profiled from the start of every round, the whole round if None
+    :param interval: seconds of cpu time between two samples, PROFILE_INTERVAL by default
+    :return: dict, None if mode is None
+    """
+    if mode is None:
+        return None
+    if isinstance(mode, dict):
+        return profile_options(**mode)
+    if mode not in PROFILE_MODES:
+        raise ValueError('Unknown profile mode %s, expected one of %s' % (mode, ', '.join(PROFILE_MODES)))
+    if mode == 'sample' and not hasattr(signal, 'setitimer'):
+        raise ValueError('sampling needs setitimer, which is not available on this platform')
+    if window is not None and window <= 0:
+        raise ValueError('profile window should be positive')
+    return {'mode': mode, 'window': window, 'interval': interval or PROFILE_INTERVAL}
+
+
+def label(code):
+    """
+    frame name of a code object in collapsed stacks, there's no space or semicolon in it
+    :param code:
+    :return:
+    """
+    return '%s@%s:%s' % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+def function_key(function):
+    """
+    :param function: (filename, line, name) of pstats
+    :return: str key of the function in json, tab separated
+    """
+    return '%s\t%s\t%s' % function
+
+
+def function_tuple(key):
+    """
+    reverse of function_key
+    :param key:
+    :return:
+    """
+    filename, line, name = key.split('\t', 2)
+    return filename, int(line), name
+
+
+class Profiler:
+    """
+    profile the process running a worker for a window of the round, the
+    result is a json serializable dict so that it's shipped with the result
+    of the worker and merged by the slaves and the master
+    """
+    def __init__(self, mode, window=None, interval=None):
+        self.__mode = mode
+        self.__window = window
+        self.__interval = interval or PROFILE_INTERVAL
+        self.__profile = None
+        self.__stacks = {}
+        self.__labels = {}
+        self.__handler = None
+        self.__running = False
+        self.__result = None
+
+    @property
+    def result(self):
+        """
+        :return: dict of 'mode', 'workers' and 'stats', None until stopped
+        """
+        return self.__result
+
+    def start(self, loop=None):
+        """
+        :param loop: event loop of the round, the profiler stops itself on it once the window passes
+        :return:
+        """
+        if self.__mode == 'cprofile':
+            self.__profile = cProfile.Profile()
+            self.__profile.enable()
+        else:
+            self.__handler = signal.signal(signal.SIGPROF, self.__sample)
+            signal.setitimer(signal.ITIMER_PROF, self.__interval, self.__interval)
+        self.__running = True
+        if loop is not None and self.__window is not None:
+            loop.call_later(self.__window, self.stop)
+
+    def stop(self):
+        if not self.__running:
+            return
+        self.__running = False
+        if self.__mode == 'cprofile':
+            self.__profile.disable()
+            self.__profile.create_stats()
+            stats = {function_key(function): [cc, nc, tt, ct, {function_key(caller): list(counts)
+                                                                  for caller, counts in callers.items()}]
+                     for function, (cc, nc, tt, ct, callers) in self.__profile.stats.items()}
+            self.__profile = None
+        else:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.__handler or signal.SIG_DFL)
+            stats = self.__stacks
+        self.__result = {'mode': self.__mode, 'workers': 1, 'stats': stats}
+
+    def __sample(self, signum, frame):
+        labels, stack = self.__labels, []
+        while frame is not None:
+            code = frame.f_code
+            name = labels.get(code, None)
+            if name is None:
+                name = labels[code] = label(code)
+            stack.append(name)
+            frame = frame.f_back
+        key = ';'.join(reversed(stack))
+        self.__stacks[key] = self.__stacks.get(key, 0) + 1
+
+
+def merge_profiles(profiles):
+    """
+    merge the profiles of several workers, or of several slaves
+    :param profiles: iterable of profile dicts, None ones are skipped
+    :return: dict, None if there's no profile
+    """
+    merged = None
+    for profile in profiles:
+        if profile is None:
+            continue
+        if merged is None:
+            merged = {'mode': profile['mode'], 'workers': 0, 'stats': {}}
+        if profile['mode'] != merged['mode']:
+            raise ValueError('Profiles of %s and %s can not be merged' % (merged['mode'], profile['mode']))
+        merged['workers'] += profile['workers']
+        stats = merged['stats']
+        if profile['mode'] == 'sample':
+            for stack, count in profile['stats'].items():
+                stats[stack] = stats.get(stack, 0) + count
+            continue
+        for function, (cc, nc, tt, ct, callers) in profile['stats'].items():
+            target = stats.setdefault(function, [0, 0, 0.0, 0.0, {}])
+            target[0] += cc
+            target[1] += nc
+            target[2] += tt
+            target[3] += ct
+            for caller, counts in callers.items():
+                total = target[4].get(caller, None)
+                target[4][caller] = list(counts) if total is None else [a + b for a, b in zip(total, counts)]
+    return merged
+
+
+def write_profile(profile, prefix):
+    """
+    write a profile as a pstats file (python -m pstats, snakeviz) or as collapsed stacks
+    (flamegraph.pl, speedscope)
+    :param profile: profile dict
+    :param prefix: path without the extension
+    :return: path of the written file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+    if profile['mode'] == 'sample':
+        path = '%s.collapsed' % prefix
+        with open(path, 'w') as file:
+            for stack, count in sorted(profile['stats'].items()):
+                file.write('%s %s\n' % (stack, count))
+        return path
+    path = '%s.pstats' % prefix
+    stats = {function_tuple(function): (cc, nc, tt, ct, {function_tuple(caller): tuple(counts)
+                                                         for caller, counts in callers.items()})
+             for function, (cc, nc, tt, ct, callers) in profile['stats'].items()}
+    with open(path, 'wb') as file:
+        marshal.dump(stats, file)
+    return path
+
+
+def write_run_profiles(run_id, result, slave_results, directory):
+    """
+    write the profile of a run merged across the cluster, and the one of every slave
+    :param run_id:
+    :param result: AnalyseResult of the whole run
+    :param slave_results: slave -> AnalyseResult
+    :param directory:
+    :return: paths of the written files, the merged one first
+    """
+    if result is None or result.profile is None:
+        return []
+    paths = [write_profile(result.profile, os.path.join(directory, run_id))]
+    for slave, slave_result in sorted(slave_results.items()):
+        if slave_result.profile is not None:
+            name = '%s-%s' % (run_id, re.sub(r'[^\w.-]', '_', slave))
+            paths.append(write_profile(slave_result.profile, os.path.join(directory, name)))
+    return paths
@@ -0,0 +1,37 @@
+import cProfile
+from asyncio import AbstractEventLoop
+from types import CodeType, FrameType
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .interfaces import AnalyseResult
+
+PROFILE_MODES: Tuple[str, ...]
+
+
+def profile_options(mode: Union[str, Dict, None], window: float=None, interval: float=None) -> Optional[Dict]: pass
+def label(code: CodeType) -> str: pass
+def function_key(function: Tuple[str, int, str]) -> str: pass
+def function_tuple(key: str) -> Tuple[str, int, str]: pass
+def merge_profiles(profiles: Iterable[Optional[Dict]]) -> Optional[Dict]: pass
+def write_profile(profile: Dict, prefix: str) -> str: pass
+def write_run_profiles(run_id: str, result: AnalyseResult, slave_results: Dict[str, AnalyseResult],
+                       directory: str) -> List[str]: pass
+
+
+class Profiler:
+    __mode: str
+    __window: float
+    __interval: float
+    __profile: cProfile.Profile
+    __stacks: Dict[str, int]
+    __labels: Dict[CodeType, str]
+    __handler: object
+    __running: bool
+    __result: Dict
+
+    result: Optional[Dict]
+
+    def __init__(self, mode: str, window: float=None, interval: float=None): pass
+    def start(self, loop: AbstractEventLoop=None) -> None: pass
+    def stop(self) -> None: pass
+    def __sample(self, signum: int, frame: FrameType) -> None: pass
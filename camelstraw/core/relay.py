@@ -0,0 +1,251 @@
+from asyncio import new_event_loop, ensure_future, gather, sleep, Event
+from multiprocessing import Process
+
+from aiohttp import web, ClientSession as Client, ClientConnectorError, WSCloseCode, WSMsgType
+
+from .interfaces import AnalyseResult
+from .live import merge_live
+from ..net import get_host_ip, ws_connect
+from ..settings import MASTER, MASTER_PORT, MASTER_CONNECT_RETRY, SLAVE_LINGER, HEALTH_INTERVAL, RELAYS, RELAY_PORT
+from ..util import singleton, readonly, Histogram
+
+
+def upstream_url(host, relay=False):
+    """
+    websocket url a slave or a relay of the host connects to
+    :param host: ip of the host
+    :param relay: whether it's the relay of the host connecting, which never connects to itself
+    :return: url of the relay owning the host, of the master if none
+    """
+    # the slave of a relay host belongs to its own relay once the relay lists it
+    if not relay and host in RELAYS.get(host, ()):
+        return 'ws://%s:%s/slave/' % (host, RELAY_PORT)
+    for parent, hosts in RELAYS.items():
+        if parent != host and host in hosts:
+            return 'ws://%s:%s/slave/' % (parent, RELAY_PORT)
+    return 'ws://%s:%s/slave/' % (MASTER, MASTER_PORT)
+
+
+def is_relay(host):
+    """
+    :param host: ip of the host
+    :return: whether the host runs a relay
+    """
+    return host in RELAYS
+
+
+@singleton
+class RelayService:
+    """
+    an inner node of the aggregation tree. it looks like a single slave to its
+    parent (the master or another relay) and like the master to its children,
+    control commands are fanned out to the children, while the health, the
+    live counters and the results of the children are merged before sent up,
+    so the master only hears from its direct children however large the fleet is
+    """
+    def __init__(self, host=None, port=RELAY_PORT):
+        host = host or get_host_ip()
+        # children connected to the relay, and the child every leaf slave is reached through
+        self.__children = {}
+        self.__routes = {}
+        # set once every expected child is connected
+        self.__complete = Event()
+        self.__upstream = None
+        # rate share of every leaf, the share of a child is the sum of its leaves
+        self.__rates = {}
+        # reports, health, live counters and granted requests of the children in the running round
+        self.__results = {}
+        self.__health = {}
+        self.__progress = {}
+        self.__granted = {}
+        self.__fresh = False
+        # properties
+        readonly(self, 'name', lambda: 'relay@%s' % host)
+        readonly(self, 'host', lambda: host)
+        readonly(self, 'port', lambda: port)
+        readonly(self, 'expected', lambda: len(RELAYS.get(host, ())))
+
+    def start(self):
+        loop = new_event_loop()
+        try:
+            loop.run_until_complete(self.__serve())
+        finally:
+            loop.close()
+
+    async def __serve(self):
+        app = web.Application()
+        app.add_routes([web.get('/slave/', self.__child_handler)])
+        runner = web.AppRunner(app, access_log=None, handle_signals=False)
+        await runner.setup()
+        await web.TCPSite(runner, '0.0.0.0', self.port).start()
+        pusher = ensure_future(self.__push_health())
+        try:
+            await self.__upstream_handler()
+        finally:
+            pusher.cancel()
+            await gather(pusher, return_exceptions=True)
+            # the children find the relay gone and exit once they can't reconnect
+            await gather(*(ws.close(code=WSCloseCode.GOING_AWAY) for ws in list(self.__children.values())))
+            await runner.cleanup()
+
+    async def __upstream_handler(self):
+        await self.__complete.wait()
+        async with Client() as client:
+            retry, interval = MASTER_CONNECT_RETRY, 1
+            while True:
+                try:
+                    ws = await ws_connect(client, upstream_url(self.host, relay=True), retry, interval)
+                except ClientConnectorError:
+                    break
+                async with ws:
+                    self.__upstream = ws
+                    released = await self.__relay(ws)
+                    self.__upstream = None
+                if released:
+                    break
+                # the parent is gone without releasing us, the children keep their workers warm
+                await self.__broadcast({'command': 'stop'})
+                self.__reset()
+                retry, interval = SLAVE_LINGER * 10, 0.1
+
+    async def __relay(self, ws):
+        """
+        forward the commands of the parent until it's gone
+        :param ws:
+        :return: whether the parent releases the relay
+        """
+        await ws.send_json({'command': 'init', 'slave': self.name, 'slaves': list(self.__routes)})
+        async for msg in ws:
+            assert msg.type == WSMsgType.TEXT
+            data = msg.json()
+            assert 'command' in data
+            # jobs of a leaf, only its own child gets them
+            if 'init' == data['command']:
+                child = self.__routes[data['slave']]
+                self.__rates[data['slave']] = data.get('rate', None)
+                self.__results.pop(child, None)
+                await self.__children[child].send_str(msg.data)
+            elif 'restart' == data['command']:
+                self.__reset()
+                await self.__broadcast(data)
+            # the share of the relay is split in proportion to the shares the children start with
+            elif 'rate' == data['command']:
+                await self.__split_rate(data.get('rate', None))
+            elif 'stop' == data['command']:
+                await self.__broadcast(data)
+            elif 'close' == data['command']:
+                await self.__broadcast(data)
+                return True
+        return False
+
+    async def __child_handler(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        async for msg in ws:
+            assert msg.type == WSMsgType.TEXT
+            data = msg.json()
+            assert 'command' in data and 'slave' in data
+            child = data['slave']
+            if 'init' == data['command']:
+                self.__children[child] = ws
+                for leaf in data.get('slaves', [child]):
+                    self.__routes[leaf] = child
+                if len(self.__children) >= self.expected:
+                    self.__complete.set()
+            elif 'report' == data['command']:
+                self.__results[child] = data
+                if len(self.__results) >= len(self.__children):
+                    await self.__report()
+            elif 'health' == data['command']:
+                self.__health[child] = data.get('health', {})
+                if data.get('progress', None) is not None:
+                    self.__progress[child] = data['progress']
+                if data.get('granted', None) is not None:
+                    self.__granted[child] = data['granted']
+                self.__fresh = True
+        return ws
+
+    async def __report(self):
+        reports, self.__results = self.__results, {}
+        if self.__upstream is None or self.__upstream.closed:
+            return
+        result = AnalyseResult.from_results(self.name, [AnalyseResult.from_json(report['result'])
+                                                        for report in reports.values()])
+        startup = [report['startup'] for report in reports.values() if report.get('startup', None) is not None]
+        await self.__upstream.send_json({
+            'command': 'report',
+            'slave': self.name,
+            'result': result.json_result,
+            # the slowest child starts the round
+            'startup': max(startup) if startup else None,
+            'pinning': {child: report.get('pinning', None) for child, report in reports.items()}
+        })
+
+    async def __push_health(self):
+        """
+        send the merged health and live counters of the children up, at most once an interval
+        :return:
+        """
+        while True:
+            await sleep(HEALTH_INTERVAL)
+            ws = self.__upstream
+            if not self.__fresh or ws is None or ws.closed:
+                continue
+            self.__fresh = False
+            health = {}
+            [health.update(workers) for workers in self.__health.values()]
+            progress = None
+            if self.__progress:
+                progress = merge_live(dict(counters, histogram=Histogram.from_json(counters['histogram']))
+                                      for counters in self.__progress.values())
+                progress['histogram'] = progress['histogram'].to_json()
+            await ws.send_json({
+                'command': 'health',
+                'slave': self.name,
+                'health': health,
+                'granted': sum(self.__granted.values()) if self.__granted else None,
+                'progress': progress
+            })
+
+    async def __split_rate(self, rate):
+        shares = {}
+        for leaf, share in self.__rates.items():
+            if share is not None:
+                child = self.__routes[leaf]
+                shares[child] = shares.get(child, 0) + share
+        total = sum(shares.values())
+        await gather(*(self.__children[child].send_json({
+            'command': 'rate',
+            'rate': None if rate is None or total == 0 else rate * share / total
+        }) for child, share in shares.items()))
+
+    async def __broadcast(self, data):
+        await gather(*(ws.send_json(data) for ws in self.__children.values() if not ws.closed))
+
+    def __reset(self):
+        self.__results = {}
+        self.__health = {}
+        self.__progress = {}
+        self.__granted = {}
+        self.__fresh = False
+
+
+def start_service():
+    service = RelayService()
+    service.start()
+
+
+@singleton
+class Relay:
+    """
+    run the relay of this host in its own process, so that merging never
+    delays the slave of the same host
+    """
+    def __init__(self):
+        self.__process = None
+
+    def start(self):
+        if self.__process is not None and self.__process.is_alive():
+            return
+        self.__process = Process(target=start_service)
+        self.__process.start()
@@ -0,0 +1,51 @@
+import asyncio
+from multiprocessing import Process
+from typing import Dict, Optional
+
+from aiohttp import web, ClientWebSocketResponse
+
+from ..settings import RELAY_PORT
+
+
+def upstream_url(host: str, relay: bool=False) -> str: pass
+def is_relay(host: str) -> bool: pass
+
+
+class RelayService:
+    __children: Dict[str, web.WebSocketResponse]
+    __routes: Dict[str, str]
+    __complete: asyncio.Event
+    __upstream: Optional[ClientWebSocketResponse]
+    __rates: Dict[str, Optional[float]]
+    __results: Dict[str, Dict]
+    __health: Dict[str, Dict[str, Dict]]
+    __progress: Dict[str, Dict]
+    __granted: Dict[str, int]
+    __fresh: bool
+
+    name: str
+    host: str
+    port: int
+    expected: int
+
+    def __init__(self, host: str=None, port: int=RELAY_PORT): pass
+    def start(self) -> None: pass
+    async def __serve(self) -> asyncio.coroutine: pass
+    async def __upstream_handler(self) -> asyncio.coroutine: pass
+    async def __relay(self, ws: ClientWebSocketResponse) -> bool: pass
+    async def __child_handler(self, request: web.Request) -> web.WebSocketResponse: pass
+    async def __report(self) -> asyncio.coroutine: pass
+    async def __push_health(self) -> asyncio.coroutine: pass
+    async def __split_rate(self, rate: Optional[float]) -> asyncio.coroutine: pass
+    async def __broadcast(self, data: Dict) -> asyncio.coroutine: pass
+    def __reset(self) -> None: pass
+
+
+def start_service() -> None: pass
+
+
+class Relay:
+    __process: Process
+
+    def __init__(self): pass
+    def start(self) -> None: pass
@@ -0,0 +1,365 @@
+import json
+import re
+import zlib
+from asyncio import get_event_loop, ensure_future, gather, sleep, Semaphore
+from collections import namedtuple
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+from aiohttp import ClientSession as Client
+
+from .job import REQUEST_EXCEPTIONS, JobContainer
+from .session import SessionManager
+from .templates import check_constant
+from .interfaces import IAnalysable, CoreStatus, AnalyseResult
+from ..settings import REPLAY_TOLERANCE, REPLAY_CONCURRENCY
+from ..util import uid, readonly, Histogram
+from ..net import Protocol, HttpMethod, ErrorType
+
+# a recorded request, time is the unix timestamp (seconds) it was sent at
+ReplayEntry = namedtuple('ReplayEntry', ('time', 'method', 'url', 'headers', 'body', 'key'))
+
+# $remote_addr - $remote_user [$time_local] "$request" $status $body_bytes_sent "$http_referer" "$http_user_agent"
+NGINX_COMBINED = re.compile(r'(?P<addr>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" '
+                            r'\d{3} \S+(?: "(?P<referer>[^"]*)" "(?P<agent>[^"]*)")?')
+NGINX_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+# headers of a har entry which are not replayed as they are
+HAR_SKIPPED_HEADERS = ('host', 'content-length', 'connection', 'transfer-encoding')
+# characters read from a har file at a time
+HAR_CHUNK_SIZE = 1 << 16
+
+
+def rebase(url, base):
+    """
+    point the url to another target, keeping its path and query
+    :param url:
+    :param base: scheme and host of the target, 'http://staging:8080' for example
+    :return:
+    """
+    if base is None:
+        return url
+    target, parts = urlsplit(base), urlsplit(url)
+    return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, ''))
+
+
+def read_access_log(path, base):
+    """
+    stream the requests of an nginx access log in the combined format, lines
+    not matching the format are skipped
+    :param path:
+    :param base: scheme and host of the target, the log doesn't record them
+    :return: generator of ReplayEntry, keyed by the client address
+    """
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = NGINX_COMBINED.match(line)
+            if match is None:
+                continue
+            try:
+                method = HttpMethod.from_verb(match.group('method'))
+            except ValueError:
+                continue
+            headers = {}
+            if match.group('agent') and match.group('agent') != '-':
+                headers['User-Agent'] = match.group('agent')
+            if match.group('referer') and match.group('referer') != '-':
+                headers['Referer'] = match.group('referer')
+            timestamp = datetime.strptime(match.group('time'), NGINX_TIME_FORMAT).timestamp()
+            yield ReplayEntry(timestamp, method, rebase(match.group('path'), base), headers, None,
+                              match.group('addr'))
+
+
+def read_har(path, base=None, chunk_size=HAR_CHUNK_SIZE):
+    """
+    stream the requests of a har file, entries are decoded one at a time instead
+    of loading the whole document
+    :param path:
+    :param base: scheme and host of another target, the recorded one by default
+    :param chunk_size: characters read at a time
+    :return: generator of ReplayEntry, keyed by the url path
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        # skip to the entries array
+        buffer = ''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buffer += chunk
+            start = buffer.find('"entries"')
+            bracket = buffer.find('[', start) if start >= 0 else -1
+            if bracket >= 0:
+                buffer = buffer[bracket + 1:]
+                break
+            if start < 0:
+                buffer = buffer[-len('"entries"'):]
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,')
+            if buffer.startswith(']'):
+                return
+            try:
+                entry, end = decoder.raw_decode(buffer)
+            except ValueError:
+                # the entry is not complete yet, read as much as buffered so that large entries are not decoded
+                # over and over again
+                chunk = f.read(max(chunk_size, len(buffer)))
+                if not chunk:
+                    return
+                buffer += chunk
+                continue
+            buffer = buffer[end:]
+            request = entry['request']
+            try:
+                method = HttpMethod.from_verb(request['method'])
+            except ValueError:
+                continue
+            headers = {header['name']: header['value'] for header in request.get('headers', [])
+                       if not header['name'].startswith(':') and header['name'].lower() not in HAR_SKIPPED_HEADERS}
+            body = request.get('postData', {}).get('text', None)
+            timestamp = datetime.fromisoformat(entry['startedDateTime'].replace('Z', '+00:00')).timestamp()
+            url = rebase(request['url'], base)
+            yield ReplayEntry(timestamp, method, url, headers, body, urlsplit(url).path)
+
+
+class ReplayJob(IAnalysable):
+    """
+    execution unit of a replay, the recorded requests are streamed from the file
+    and sent open-loop at their recorded times scaled by the speed, so a slow
+    target doesn't slow down the schedule, but a saturated worker shows up as lag
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        job = super().__new__(cls)
+        readonly(job, 'protocol', lambda: None)
+        readonly(job, 'url', lambda: None)
+        readonly(job, 'name', lambda: None)
+        readonly(job, 'path', lambda: None)
+        readonly(job, 'timing', lambda: None)
+        return job
+
+    def __init__(self, path, **kwargs):
+        self.__session_manager = SessionManager(success=kwargs.get('success', None))
+        super().__init__(uid(__class__.__name__), self.__session_manager)
+        self.__job_kwargs = kwargs
+        self.__budget = None
+        self.__limiter = None
+        # (index, total) of every level the stream is split by, slaves then workers
+        self.__partitions = []
+        self.__scheduled = 0
+        self.__late = 0
+        self.__lag = Histogram()
+        # properties
+        readonly(self, 'protocol', lambda: Protocol.from_url(kwargs.get('base', None) or 'http'))
+        readonly(self, 'url', lambda: path)
+        readonly(self, 'name', lambda: 'Replay %s' % path)
+        readonly(self, 'path', lambda: path)
+        readonly(self, 'timing', lambda: AnalyseResult.timing_counters(self.__scheduled, self.__late, self.__lag))
+
+    def record_samples(self, writer, index=0):
+        """
+        write raw per-request samples of this job to the writer
+        :param writer: SampleWriter
+        :param index: job index in the sample file
+        :return:
+        """
+        self.__session_manager.record_samples(writer, index)
+
+    def record_live(self, slot):
+        """
+        count the requests of this job in the live counters of the worker process
+        :param slot: LiveSlot
+        :return:
+        """
+        self.__session_manager.record_live(slot)
+
+    def record_responses(self, sampler):
+        """
+        offer the responses of this job to the reservoirs of the worker
+        :param sampler: ResponseSampler
+        :return:
+        """
+        self.__session_manager.record_responses(sampler)
+
+    def limit(self, budget):
+        """
+        stop sending requests once the budget is used up
+        :param budget: RequestBudget shared by the jobs of a worker
+        :return:
+        """
+        self.__budget = budget
+
+    def throttle(self, limiter):
+        """
+        pace the requests behind their schedule by the rate limiter shared by the worker processes of the host
+        :param limiter: RateLimiter
+        :return:
+        """
+        self.__limiter = limiter
+
+    def partition(self, partitions):
+        """
+        replay only a share of the stream
+        :param partitions: (index, total) of every level the stream is split by, slaves then workers
+        :return:
+        """
+        self.__partitions = list(partitions)
+
+    def clone(self, **kwargs):
+        """
+        create a fresh job with the same arguments, used to replay another round
+        :param kwargs: arguments to override, speed for example
+        :return: ReplayJob
+        """
+        job_kwargs = dict(self.__job_kwargs)
+        job_kwargs.update(kwargs)
+        job = ReplayJob(self.path, **job_kwargs)
+        job.partition(self.__partitions)
+        return job
+
+    def _collect(self):
+        manager = self.__session_manager
+        self._total_request = manager.total_request
+        self._success_request = manager.success_request
+        self._histogram = manager.histogram
+        self._series = manager.series
+        self._statuses = manager.statuses
+        self._errors = manager.errors
+        self._urls = manager.urls
+
+    def _timing(self):
+        return {self.name: self.timing}
+
+    def __entries(self):
+        """
+        stream the share of the recorded requests owned by this job
+        :return:
+        """
+        kind = self.__job_kwargs.get('kind', 'nginx')
+        base = self.__job_kwargs.get('base', None)
+        entries = read_har(self.path, base) if kind == 'har' else read_access_log(self.path, base)
+        split, key = self.__job_kwargs.get('split', 'time'), self.__job_kwargs.get('key', None)
+        for index, entry in enumerate(entries):
+            # requests of a key stay together, otherwise they are dealt round robin in time order
+            if split == 'key':
+                index = zlib.crc32(str(key(entry) if key is not None else entry.key).encode())
+            owned = True
+            for part, total in self.__partitions:
+                if index % total != part:
+                    owned = False
+                    break
+                index //= total
+            yield entry, owned
+
+    async def start(self):
+        super().start()
+        speed = float(self.__job_kwargs.get('speed', 1.0))
+        tolerance = self.__job_kwargs.get('tolerance', REPLAY_TOLERANCE)
+        slots = Semaphore(max(1, int(self.__job_kwargs.get('concurrency', None) or REPLAY_CONCURRENCY)))
+        loop, pending = get_event_loop(), set()
+        begin, origin = loop.time(), None
+        async with Client(headers=self.__job_kwargs.get('headers', None),
+                          cookies=self.__job_kwargs.get('cookies', None)) as client:
+            for entry, owned in self.__entries():
+                # all partitions share the same origin, the first recorded request
+                if origin is None:
+                    origin = entry.time
+                if not owned:
+                    continue
+                due = begin + (entry.time - origin) / speed
+                # sleep in short slices so that a stopped job doesn't wait for a far request
+                while self.status == CoreStatus.STARTED and loop.time() < due:
+                    await sleep(min(due - loop.time(), 1))
+                await slots.acquire()
+                if not self.__acquire():
+                    slots.release()
+                    break
+                if self.__limiter is not None:
+                    await self.__limiter.acquire()
+                lag = max(0.0, (loop.time() - due) * 1000)
+                self.__scheduled += 1
+                self.__late += lag > tolerance
+                self.__lag.record(lag)
+                task = ensure_future(self.__send(client, entry, slots))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await gather(*pending)
+
+    def __acquire(self):
+        if self.status != CoreStatus.STARTED:
+            return False
+        return self.__budget is None or self.__budget.acquire()
+
+    async def __send(self, client, entry, slots):
+        # urls are counted without their query arguments to keep the counters small
+        parts = urlsplit(entry.url)
+        session = self.__session_manager.open(self.protocol, '%s://%s%s' % (parts.scheme, parts.netloc, parts.path))
+        try:
+            async with client.request(entry.method.verb, entry.url, headers=entry.headers,
+                                      data=entry.body) as response:
+                content = await response.read()
+                self.__session_manager.close(session, response.status, size=len(content), headers=response.headers,
+                                             body=content)
+        except REQUEST_EXCEPTIONS as e:
+            self.__session_manager.close(session, error=ErrorType.from_exception(e), exception=e)
+        finally:
+            slots.release()
+            if self.__budget is not None:
+                self.__budget.done()
+
+
+class Replay(JobContainer):
+    """
+    replay the requests of an nginx access log (combined format) or a har file
+    at their recorded times, the file is streamed instead of loaded into memory,
+    and it must be readable at the same path on every slave, as the stream is
+    split across all slaves and their workers
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
+        return inst
+
+    def __init__(self, path, kind=None, base=None, speed=1.0, split='time', key=None, headers=None, cookies=None,
+                 reuse_job=True, success=None, concurrency=None, tolerance=REPLAY_TOLERANCE):
+        """
+        :param kind: 'nginx' or 'har', guessed by the file extension by default
+        :param base: scheme and host of the target, required by access logs which don't record them
+        :param speed: 2 replays twice as fast as recorded, 0.5 half as fast
+        :param split: 'time' deals the requests round robin in time order, 'key' keeps the requests
+        of a key (client address of a log, url path of a har) on the same worker
+        :param key: callable of a ReplayEntry, overrides the key of the entries
+        :param concurrency: max number of requests in flight per worker, REPLAY_CONCURRENCY by default
+        :param tolerance: milliseconds a request can be sent behind its schedule without being late
+        """
+        kind = kind or ('har' if path.endswith('.har') else 'nginx')
+        if kind == 'nginx' and base is None:
+            raise ValueError('access log replay needs the base of the target')
+        if speed <= 0:
+            raise ValueError('speed should be positive')
+        # recorded requests are replayed as they are
+        check_constant(headers, 'the headers of a replay')
+        check_constant(cookies, 'the cookies of a replay')
+        # every slave replays its share of the stream
+        super().__init__(path, headers=headers, cookies=cookies, reuse_job=reuse_job, success=success,
+                         concurrency=concurrency, broadcast=True)
+        self._kind = kind
+        self._base = base
+        self._speed = speed
+        self._split = split
+        self._key = key
+        self._tolerance = tolerance
+
+    def job(self):
+        if self._job is None or self.reuse_job:
+            self._job = ReplayJob(self._url, kind=self._kind, base=self._base, speed=self._speed, split=self._split,
+                                  key=self._key, headers=self._headers, cookies=self._cookies, success=self._success,
+                                  concurrency=self._concurrency, tolerance=self._tolerance)
+        return self._job
@@ -0,0 +1,78 @@
+from asyncio import Semaphore
+from collections import namedtuple
+from typing import Callable, Dict, Generator, Iterator, List, Pattern, Tuple
+
+from aiohttp import ClientSession as Client
+
+from .budget import RequestBudget
+from .limiter import RateLimiter
+from .job import JobContainer
+from .live import LiveSlot
+from .reservoir import ResponseSampler
+from .samples import SampleWriter
+from .session import SessionManager
+from .interfaces import IAnalysable
+from ..net import Protocol
+from ..util import Histogram
+
+ReplayEntry = namedtuple('ReplayEntry', ('time', 'method', 'url', 'headers', 'body', 'key'))
+
+NGINX_COMBINED: Pattern
+NGINX_TIME_FORMAT: str
+HAR_SKIPPED_HEADERS: Tuple[str, ...]
+HAR_CHUNK_SIZE: int
+
+
+def rebase(url: str, base: str) -> str: pass
+def read_access_log(path: str, base: str) -> Generator[ReplayEntry, None, None]: pass
+def read_har(path: str, base: str=None, chunk_size: int=HAR_CHUNK_SIZE) -> Generator[ReplayEntry, None, None]: pass
+
+
+# noinspection PyMissingConstructor
+class ReplayJob(IAnalysable):
+    __session_manager: SessionManager
+    __job_kwargs: Dict
+    __budget: RequestBudget
+    __limiter: RateLimiter
+    __partitions: List[Tuple[int, int]]
+    __scheduled: int
+    __late: int
+    __lag: Histogram
+
+    protocol: Protocol
+    url: str
+    name: str
+    path: str
+    timing: Dict
+
+    def __new__(cls, *args, **kwargs) -> ReplayJob: pass
+    def __init__(self, path: str, **kwargs): pass
+    def record_samples(self, writer: SampleWriter, index: int=0) -> None: pass
+    def record_live(self, slot: LiveSlot) -> None: pass
+    def record_responses(self, sampler: ResponseSampler) -> None: pass
+    def limit(self, budget: RequestBudget) -> None: pass
+    def throttle(self, limiter: RateLimiter) -> None: pass
+    def partition(self, partitions: List[Tuple[int, int]]) -> None: pass
+    def clone(self, **kwargs) -> ReplayJob: pass
+    def _collect(self) -> None: pass
+    def _timing(self) -> Dict[str, Dict]: pass
+    def __entries(self) -> Iterator[Tuple[ReplayEntry, bool]]: pass
+    def __acquire(self) -> bool: pass
+
+    async def start(self) -> None: pass
+    async def __send(self, client: Client, entry: ReplayEntry, slots: Semaphore) -> None: pass
+
+
+class Replay(JobContainer):
+    _kind: str
+    _base: str
+    _speed: float
+    _split: str
+    _key: Callable[[ReplayEntry], str]
+    _tolerance: float
+
+    def __new__(cls, *args, **kwargs) -> Replay: pass
+    def __init__(self, path: str, kind: str=None, base: str=None, speed: float=1.0, split: str='time',
+                 key: Callable[[ReplayEntry], str]=None, headers: Dict=None, cookies: Dict=None, reuse_job: bool=True,
+                 success: Callable[[int], bool]=None, concurrency: int=None, tolerance: float=...): pass
+    def job(self) -> ReplayJob: pass
@@ -0,0 +1,157 @@
+import random
+
+from ..settings import RESERVOIR_SIZE, RESERVOIR_BODY_SIZE
+
+
+class Reservoir:
+    """
+    a uniform sample of fixed size out of a stream of unknown length (algorithm R),
+    an item which is not kept costs a counter and a random number
+    """
+    def __init__(self, size):
+        self.__size = size
+        self.__seen = 0
+        self.__items = []
+
+    @property
+    def seen(self):
+        return self.__seen
+
+    @property
+    def items(self):
+        return self.__items
+
+    def offer(self):
+        """
+        count a new item of the stream in
+        :return: position to keep the item at, None if it's not kept
+        """
+        self.__seen += 1
+        if len(self.__items) < self.__size:
+            return len(self.__items)
+        index = int(random.random() * self.__seen)
+        return index if index < self.__size else None
+
+    def put(self, index, item):
+        """
+        :param index: the position returned by offer
+        :param item:
+        :return:
+        """
+        if index == len(self.__items):
+            self.__items.append(item)
+        else:
+            self.__items[index] = item
+
+    def to_json(self):
+        return {'seen': self.__seen, 'items': self.__items}
+
+
+class ResponseSampler:
+    """
+    reservoirs of the responses of a worker, one of all of them and one of every
+    error class: the error type of a failed request, or the status code of a response
+    which is not a success. a response is only rendered into a record once it's kept
+    """
+    def __init__(self, size=RESERVOIR_SIZE, body_size=RESERVOIR_BODY_SIZE):
+        """
+        :param size: number of responses kept by every reservoir
+        :param body_size: bytes of the body kept for every response
+        """
+        self.__size = size
+        self.__body_size = body_size
+        self.__responses = Reservoir(size)
+        self.__errors = {}
+
+    def record(self, session, status_code=200, error=None, success=True, size=0, headers=None, body=None,
+               exception=None):
+        """
+        :param session: the closed session
+        :param status_code:
+        :param error: ErrorType of a failed request
+        :param success: whether the request is counted as a success
+        :param size: bytes received
+        :param headers: headers of the response
+        :param body: body of the response, str or bytes
+        :param exception: the exception failing the request
+        :return:
+        """
+        kept = []
+        index = self.__responses.offer()
+        if index is not None:
+            kept.append((self.__responses, index))
+        if not success:
+            kind = error.phrase if error is not None else str(status_code)
+            reservoir = self.__errors.get(kind, None)
+            if reservoir is None:
+                reservoir = self.__errors[kind] = Reservoir(self.__size)
+            index = reservoir.offer()
+            if index is not None:
+                kept.append((reservoir, index))
+        if not kept:
+            return
+        if isinstance(body, str):
+            body = body.encode()
+        item = {
+            'url': session.url,
+            'status': status_code if error is None else None,
+            'error': error.phrase if error is not None else None,
+            'exception': '%s: %s' % (exception.__class__.__name__, exception) if exception is not None else None,
+            'headers': dict(headers) if headers is not None else None,
+            'body': bytes(body[:self.__body_size]).decode('utf-8', 'replace') if body is not None else None,
+            'size': size,
+            'start_time': session.start_time,
+            'latency': session._latency
+        }
+        [reservoir.put(index, item) for reservoir, index in kept]
+
+    def to_json(self):
+        """
+        :return: dict of 'size', 'responses' and 'errors', error class -> reservoir
+        """
+        return {
+            'size': self.__size,
+            'responses': self.__responses.to_json(),
+            'errors': {kind: reservoir.to_json() for kind, reservoir in self.__errors.items()}
+        }
+
+
+def merge_reservoir(reservoirs, size):
+    """
+    merge several reservoirs into one as if it sampled all their streams: an item
+    stands for seen / kept items of its stream, and the items are drawn by weighted
+    sampling without replacement (a-es)
+    :param reservoirs: iterable of reservoir dicts of 'seen' and 'items'
+    :param size: number of items kept
+    :return: reservoir dict
+    """
+    seen, keyed = 0, []
+    for reservoir in reservoirs:
+        seen += reservoir['seen']
+        if not reservoir['items']:
+            continue
+        weight = reservoir['seen'] / len(reservoir['items'])
+        keyed.extend((random.random() ** (1 / weight), item) for item in reservoir['items'])
+    keyed.sort(key=lambda pair: pair[0], reverse=True)
+    return {'seen': seen, 'items': [item for _, item in keyed[:size]]}
+
+
+def merge_reservoirs(samples):
+    """
+    merge the response samples of several workers, or of several slaves
+    :param samples: iterable of the dicts of ResponseSampler.to_json, None ones are skipped
+    :return: dict, None if there's no sample
+    """
+    samples = [sample for sample in samples if sample is not None]
+    if not samples:
+        return None
+    size = max(sample['size'] for sample in samples)
+    groups = {}
+    for sample in samples:
+        for kind, reservoir in sample['errors'].items():
+            groups.setdefault(kind, []).append(reservoir)
+    return {
+        'size': size,
+        'responses': merge_reservoir((sample['responses'] for sample in samples), size),
+        'errors': {kind: merge_reservoir(group, size) for kind, group in groups.items()}
+    }
@@ -0,0 +1,35 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+
+from .session import Session
+from ..net import ErrorType
+from ..settings import RESERVOIR_SIZE, RESERVOIR_BODY_SIZE
+
+
+class Reservoir:
+    __size: int
+    __seen: int
+    __items: List[Dict]
+
+    seen: int
+    items: List[Dict]
+
+    def __init__(self, size: int): pass
+    def offer(self) -> Optional[int]: pass
+    def put(self, index: int, item: Dict) -> None: pass
+    def to_json(self) -> Dict: pass
+
+
+class ResponseSampler:
+    __size: int
+    __body_size: int
+    __responses: Reservoir
+    __errors: Dict[str, Reservoir]
+
+    def __init__(self, size: int=RESERVOIR_SIZE, body_size: int=RESERVOIR_BODY_SIZE): pass
+    def record(self, session: Session, status_code: int=200, error: ErrorType=None, success: bool=True, size: int=0,
+               headers: Mapping=None, body: Union[str, bytes]=None, exception: BaseException=None) -> None: pass
+    def to_json(self) -> Dict: pass
+
+
+def merge_reservoir(reservoirs: Iterable[Dict], size: int) -> Dict: pass
+def merge_reservoirs(samples: Iterable[Optional[Dict]]) -> Optional[Dict]: pass
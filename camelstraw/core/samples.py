@@ -0,0 +1,65 @@
+import json
+import os
+import struct
+
+# little-endian record: start time (ms), latency (ms), status code, job index, flags
+SAMPLE_FORMAT = '<qihHB'
+SAMPLE_STRUCT = struct.Struct(SAMPLE_FORMAT)
+SAMPLE_FIELDS = ('start', 'latency', 'status', 'job', 'flags')
+# flags of a record: counted as a success by the job, sent during the warmup
+SAMPLE_SUCCESS = 1
+SAMPLE_WARMUP = 2
+# records written before the flags were added, whose success is decided by the reader
+LEGACY_SAMPLE_FORMAT = '<qihH'
+# bytes buffered before flushing to disk
+SAMPLE_BUFFER_SIZE = 1 << 16
+
+
+class SampleWriter:
+    """
+    append fixed size per-request records to a binary file, the job names
+    indexed by the records are kept in a json file next to it, so that the
+    samples can be memory-mapped without parsing
+    """
+    def __init__(self, path, names, warmup=False):
+        """
+        :param path:
+        :param names: job names indexed by the records
+        :param warmup: mark the records as the warmup until measure is called
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.__file = open(path, 'ab')
+        self.__buffer = bytearray()
+        self.__count = 0
+        self.__path = path
+        self.__names = list(names)
+        self.__warmup = warmup
+
+    def measure(self):
+        """
+        the warmup is over, the following records are measured
+        :return:
+        """
+        self.__warmup = False
+
+    def write(self, start, latency, status, job=0, success=True):
+        flags = (SAMPLE_SUCCESS if success else 0) | (SAMPLE_WARMUP if self.__warmup else 0)
+        self.__buffer += SAMPLE_STRUCT.pack(start, latency, status, job, flags)
+        self.__count += 1
+        if len(self.__buffer) >= SAMPLE_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.__file.write(self.__buffer)
+        self.__buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.__file.close()
+        with open(self.__path + '.json', 'w') as f:
+            json.dump({
+                'format': SAMPLE_FORMAT,
+                'fields': SAMPLE_FIELDS,
+                'jobs': self.__names,
+                'count': self.__count
+            }, f)
@@ -0,0 +1,25 @@
+from struct import Struct
+from typing import BinaryIO, Iterable, List, Tuple
+
+SAMPLE_FORMAT: str
+SAMPLE_STRUCT: Struct
+SAMPLE_FIELDS: Tuple[str, ...]
+SAMPLE_SUCCESS: int
+SAMPLE_WARMUP: int
+LEGACY_SAMPLE_FORMAT: str
+SAMPLE_BUFFER_SIZE: int
+
+
+class SampleWriter:
+    __file: BinaryIO
+    __buffer: bytearray
+    __count: int
+    __path: str
+    __names: List[str]
+    __warmup: bool
+
+    def __init__(self, path: str, names: Iterable[str], warmup: bool=False): pass
+    def measure(self) -> None: pass
+    def write(self, start: int, latency: int, status: int, job: int=0, success: bool=True) -> None: pass
+    def flush(self) -> None: pass
+    def close(self) -> None: pass
@@ -0,0 +1,436 @@
+import json
+import re
+from asyncio import gather, sleep
+from typing import Callable
+
+from aiohttp import ClientSession as Client, TCPConnector, CookieJar
+
+from .job import REQUEST_EXCEPTIONS, JobContainer
+from .session import SessionManager
+from .templates import check_constant, check_generators, has_generators, compile_text, compile_data, escape_url
+from .interfaces import IAnalysable, IManager, CoreStatus
+from ..util import uid, readonly
+from ..net import Protocol, HttpMethod, ErrorType
+
+# exceptions of extracting a missing value from a response
+EXTRACT_EXCEPTIONS = (KeyError, IndexError, TypeError, ValueError)
+# {variable} placeholders, an identifier in single braces, any other brace is kept as it is
+VARIABLE = re.compile(r'(?<!\{)\{([A-Za-z_]\w*)\}(?!\})')
+
+
+def is_template(value):
+    """
+    whether the value is rendered for every request, by the variables of a virtual user
+    or by generators
+    :param value:
+    :return:
+    """
+    if isinstance(value, str):
+        return '{' in value and (VARIABLE.search(value) is not None or has_generators(value))
+    if isinstance(value, dict):
+        return any(is_template(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(is_template(item) for item in value)
+    return isinstance(value, Callable)
+
+
+def compile_string(text, escape=None):
+    """
+    compile a string with {variable} and {{generator}} placeholders into a function of
+    the variables. the constant fragments are split out once, rendering only looks the
+    variables up, calls the generators and joins their values with the fragments
+    :param text:
+    :param escape: function applied to the values of the generators, see compile_text
+    :return: function of variables, KeyError if a variable is missing
+    """
+    parts, slots, position = [], [], 0
+
+    def constant(fragment):
+        if has_generators(fragment):
+            generate = compile_text(fragment, escape=escape)
+            slots.append((len(parts), lambda variables: generate()))
+            parts.append(None)
+        else:
+            parts.append(fragment)
+
+    for match in VARIABLE.finditer(text):
+        constant(text[position:match.start()])
+        slots.append((len(parts), lambda variables, name=match.group(1): str(variables[name])))
+        parts.append(None)
+        position = match.end()
+    constant(text[position:])
+    if len(slots) == 0:
+        joined = ''.join(parts)
+        return lambda variables: joined
+    if len(slots) == 1:
+        # the most common case needs neither the list nor the loop
+        prefix, suffix, fill = ''.join(parts[:slots[0][0]]), ''.join(parts[slots[0][0] + 1:]), slots[0][1]
+        return lambda variables: prefix + fill(variables) + suffix
+
+    def render(variables):
+        for index, fill in slots:
+            parts[index] = fill(variables)
+        return ''.join(parts)
+    return render
+
+
+def compile_template(template, escape=None):
+    """
+    compile a value into a function of the variables of a virtual user, strings are
+    filled with the variables ('Bearer {token}') and generators ('{{uuid}}'), callables
+    are called with them, dicts and lists are compiled item by item and constants are
+    shared as they are
+    :param template:
+    :param escape: see compile_string
+    :return: function of variables
+    """
+    if not is_template(template):
+        return lambda variables: template
+    if isinstance(template, str):
+        return compile_string(template, escape)
+    if isinstance(template, dict):
+        items = [(key, compile_template(value)) for key, value in template.items()]
+        return lambda variables: {key: render(variables) for key, render in items}
+    if isinstance(template, (list, tuple)):
+        items = [compile_template(value) for value in template]
+        return lambda variables: [render(variables) for render in items]
+    return template
+
+
+def compile_extractor(extractor):
+    """
+    compile an extractor into a function of the response
+    :param extractor: dotted path into the json body ('data.items.0.id'), or a callable
+    of status_code & content like a job callback
+    :return: function of status code, text content and parsed json body
+    """
+    if isinstance(extractor, Callable):
+        return lambda status_code, content, body: extractor(status_code=status_code, content=content)
+    keys = [int(key) if key.lstrip('-').isdigit() else key for key in str(extractor).split('.')]
+
+    def extract(status_code, content, body):
+        for key in keys:
+            body = body[key]
+        return body
+    return extract
+
+
+class Step:
+    """
+    one request of a scenario, its url, headers and the values of its json body or
+    query arguments may contain {variable} placeholders filled by the variables of
+    the virtual user, and values of the response are extracted into the variables
+    for the following steps. {{generator}} placeholders are rendered for every
+    request as those of a job, in the raw body as well
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        step = super().__new__(cls)
+        readonly(step, 'url', lambda: None)
+        readonly(step, 'method', lambda: None)
+        readonly(step, 'data', lambda: None)
+        readonly(step, 'headers', lambda: None)
+        readonly(step, 'extract', lambda: None)
+        readonly(step, 'name', lambda: None)
+        readonly(step, 'success', lambda: None)
+        readonly(step, 'think_time', lambda: None)
+        return step
+
+    def __init__(self, url, method=HttpMethod.GET, data=None, headers=None, extract=None, name=None, success=None,
+                 think_time=0):
+        """
+        :param data: query arguments of GET like methods, json body of the others, str or bytes
+        are sent as the raw body as they are, without {variable} placeholders
+        :param extract: variable name -> dotted json path or callable of status_code & content
+        :param name: name of the step in the results, the url by default
+        :param success: predicate of the status code, the scenario's by default
+        :param think_time: seconds the virtual user pauses after the step
+        """
+        [check_generators(value) for value in (url, data, headers)]
+        readonly(self, 'url', lambda: url)
+        readonly(self, 'method', lambda: method)
+        readonly(self, 'data', lambda: data)
+        readonly(self, 'headers', lambda: headers)
+        readonly(self, 'extract', lambda: dict(extract or {}))
+        readonly(self, 'name', lambda: name or url)
+        readonly(self, 'success', lambda: success)
+        readonly(self, 'think_time', lambda: think_time)
+
+
+class StepJob(IAnalysable):
+    """
+    metrics of one step of a scenario
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        job = super().__new__(cls)
+        readonly(job, 'step', lambda: None)
+        readonly(job, 'name', lambda: None)
+        readonly(job, 'session_manager', lambda: None)
+        return job
+
+    def __init__(self, index, step, success=None):
+        self.__session_manager = SessionManager(success=step.success or success)
+        super().__init__(uid(__class__.__name__), self.__session_manager)
+        # properties
+        readonly(self, 'step', lambda: step)
+        readonly(self, 'name', lambda: '%s %s %s' % (index + 1, step.method.phrase, step.name))
+        readonly(self, 'session_manager', lambda: self.__session_manager)
+
+    def _collect(self):
+        manager = self.__session_manager
+        self._total_request = manager.total_request
+        self._success_request = manager.success_request
+        self._histogram = manager.histogram
+        self._series = manager.series
+        self._statuses = manager.statuses
+        self._errors = manager.errors
+        self._urls = manager.urls
+
+
+class StepManager(IManager):
+    """
+    maintain the steps of a scenario in order
+    """
+    def __init__(self):
+        super().__init__(uid(__class__.__name__))
+
+
+class ScenarioJob(IAnalysable):
+    """
+    execution unit of a scenario, every request loop is a virtual user running
+    the steps in order with its own variables and cookies, the steps are compiled
+    once per round so that a virtual user only awaits a chain of closures
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        job = super().__new__(cls)
+        readonly(job, 'protocol', lambda: None)
+        readonly(job, 'url', lambda: None)
+        readonly(job, 'name', lambda: None)
+        readonly(job, 'steps', lambda: None)
+        return job
+
+    def __init__(self, name, steps, **kwargs):
+        self.__step_manager = StepManager()
+        [self.__step_manager.add(StepJob(index, step, kwargs.get('success', None)))
+         for index, step in enumerate(steps)]
+        super().__init__(uid(__class__.__name__), self.__step_manager)
+        self.__scenario = name
+        self.__job_kwargs = kwargs
+        self.__budget = None
+        self.__limiter = None
+        # properties
+        readonly(self, 'protocol', lambda: Protocol.from_url(steps[0].url))
+        readonly(self, 'url', lambda: steps[0].url)
+        readonly(self, 'name', lambda: 'Scenario %s' % name)
+        readonly(self, 'steps', lambda: list(steps))
+
+    def record_samples(self, writer, index=0):
+        """
+        write raw per-request samples of all the steps to the writer
+        :param writer: SampleWriter
+        :param index: job index in the sample file
+        :return:
+        """
+        [step.session_manager.record_samples(writer, index) for step in self.__step_manager]
+
+    def record_live(self, slot):
+        """
+        count the requests of all the steps in the live counters of the worker process
+        :param slot: LiveSlot
+        :return:
+        """
+        [step.session_manager.record_live(slot) for step in self.__step_manager]
+
+    def record_responses(self, sampler):
+        """
+        offer the responses of all the steps to the reservoirs of the worker
+        :param sampler: ResponseSampler
+        :return:
+        """
+        [step.session_manager.record_responses(sampler) for step in self.__step_manager]
+
+    def limit(self, budget):
+        """
+        stop sending requests once the budget is used up, every step takes a ticket
+        :param budget: RequestBudget shared by the jobs of a worker
+        :return:
+        """
+        self.__budget = budget
+
+    def throttle(self, limiter):
+        """
+        pace the requests by the rate limiter shared by the worker processes of the host
+        :param limiter: RateLimiter
+        :return:
+        """
+        self.__limiter = limiter
+
+    def clone(self, **kwargs):
+        """
+        create a fresh scenario with the same arguments, used to run it another round
+        :param kwargs: arguments to override, concurrency (number of virtual users) for example
+        :return: ScenarioJob
+        """
+        job_kwargs = dict(self.__job_kwargs)
+        job_kwargs.update(kwargs)
+        return ScenarioJob(self.__scenario, self.steps, **job_kwargs)
+
+    def _breakdown(self):
+        return {step.name: step.result for step in self.__step_manager}
+
+    def __acquire(self):
+        if self.status != CoreStatus.STARTED:
+            return False
+        return self.__budget is None or self.__budget.acquire()
+
+    def __done(self):
+        if self.__budget is not None:
+            self.__budget.done()
+
+    async def start(self):
+        super().start()
+        [step.start() for step in self.__step_manager]
+        steps = [self.__compile(step) for step in self.__step_manager]
+        concurrency = max(1, int(self.__job_kwargs.get('concurrency', 1)))
+        # virtual users share the connections but not the cookies
+        async with TCPConnector(limit=0) as connector:
+            await gather(*(self.__virtual_user(connector, steps, user) for user in range(concurrency)))
+
+    async def __virtual_user(self, connector, steps, user):
+        variables = dict(self.__job_kwargs.get('variables', None) or {}, user=user)
+        async with Client(connector=connector, connector_owner=False, cookie_jar=CookieJar(unsafe=True),
+                          headers=self.__job_kwargs.get('headers', None),
+                          cookies=self.__job_kwargs.get('cookies', None)) as client:
+            cookies = self.__job_kwargs.get('cookies', None) or {}
+            while self.status == CoreStatus.STARTED:
+                # every iteration is a new session of the user
+                scope = dict(variables)
+                client.cookie_jar.clear()
+                client.cookie_jar.update_cookies(cookies)
+                for step in steps:
+                    passed = await step(client, scope)
+                    # the budget is used up
+                    if passed is None:
+                        return
+                    # the following steps depend on this one
+                    if not passed:
+                        break
+
+    def __compile(self, step_job):
+        """
+        compile a step into a coroutine function of the client and variables of a virtual user
+        :param step_job: StepJob
+        :return: coroutine function returning whether the step passed, None if no more requests
+        should be sent
+        """
+        step, manager = step_job.step, step_job.session_manager
+        method, protocol, url_name = step.method.name, self.protocol, step.url
+        url, headers = compile_template(step.url, escape_url), compile_template(step.headers)
+        if isinstance(step.data, (str, bytes)):
+            # a raw body may be any text, a json one for example, so it's never filled with variables
+            argument = 'data'
+            raw = compile_data(step.data) if has_generators(step.data) else lambda: step.data
+            data = lambda variables: raw()
+        else:
+            argument = 'json' if step.method.sends_body else 'params'
+            data = compile_template(step.data)
+        extractors = [(variable, compile_extractor(extractor)) for variable, extractor in step.extract.items()]
+        parse = any(not isinstance(extractor, Callable) for extractor in step.extract.values())
+        think_time = step.think_time
+        acquire, done, limiter = self.__acquire, self.__done, self.__limiter
+
+        async def run(client, variables):
+            if not acquire():
+                return None
+            if limiter is not None:
+                await limiter.acquire()
+            session = manager.open(protocol, url_name)
+            try:
+                async with client.request(method, url(variables), headers=headers(variables),
+                                          **{argument: data(variables)}) as response:
+                    status_code, raw = response.status, await response.read()
+                    headers_received, size = response.headers, len(raw)
+                    content = await response.text()
+            except REQUEST_EXCEPTIONS as e:
+                manager.close(session, error=ErrorType.from_exception(e), exception=e)
+                done()
+                return False
+            except KeyError:
+                # a placeholder without variable, which is extracted by a failed step
+                manager.close(session, error=ErrorType.EXTRACT)
+                done()
+                return False
+            except ValueError as e:
+                # a callable template failing on the variables, the request can't be built
+                manager.close(session, error=ErrorType.OTHER, exception=e)
+                done()
+                return False
+            if not manager.is_success(status_code):
+                manager.close(session, status_code, size=size, headers=headers_received, body=raw)
+                done()
+                return False
+            try:
+                body = json.loads(content) if parse else None
+                for variable, extract in extractors:
+                    variables[variable] = extract(status_code, content, body)
+            except EXTRACT_EXCEPTIONS as e:
+                manager.close(session, error=ErrorType.EXTRACT, size=size, headers=headers_received, body=raw,
+                              exception=e)
+                done()
+                return False
+            manager.close(session, status_code, size=size, headers=headers_received, body=raw)
+            done()
+            if think_time > 0:
+                await sleep(think_time)
+            return True
+        return run
+
+
+class Scenario(JobContainer):
+    """
+    ordered steps run by every virtual user, login -> fetch the profile with the
+    returned token -> post an order for example, the concurrency is the number
+    of virtual users of every worker
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
+        return inst
+
+    def __init__(self, name, *steps, headers=None, cookies=None, variables=None, reuse_job=True, success=None,
+                 concurrency=1):
+        """
+        :param steps: Step list
+        :param variables: initial variables of every virtual user, 'user' is set to the index
+        of the virtual user in the worker
+        """
+        if len(steps) == 0:
+            raise ValueError('Scenario needs at least one step')
+        # they're the defaults of the clients of the virtual users
+        check_constant(headers, 'the headers of a scenario, put them in those of its steps')
+        check_constant(cookies, 'the cookies of a scenario')
+        super().__init__(steps[0].url, headers=headers, cookies=cookies, reuse_job=reuse_job, success=success,
+                         concurrency=concurrency)
+        self._name = name
+        self._steps = list(steps)
+        self._variables = variables
+
+    def job(self):
+        if self._job is None or self.reuse_job:
+            self._job = ScenarioJob(self._name, self._steps, headers=self._headers, cookies=self._cookies,
+                                    variables=self._variables, success=self._success,
+                                    concurrency=self._concurrency)
+        return self._job
@@ -0,0 +1,100 @@
+import re
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, Type, Union
+
+from aiohttp import ClientSession as Client, TCPConnector
+
+from .budget import RequestBudget
+from .limiter import RateLimiter
+from .job import JobContainer
+from .live import LiveSlot
+from .reservoir import ResponseSampler
+from .samples import SampleWriter
+from .session import SessionManager
+from .interfaces import IAnalysable, IManager, AnalyseResult
+from ..net import Protocol, HttpMethod
+
+EXTRACT_EXCEPTIONS: Tuple[Type[BaseException], ...]
+VARIABLE: re.Pattern
+ExtractorType = Union[str, Callable[..., Any]]
+CompiledStep = Callable[[Client, Dict], Coroutine[Any, Any, Optional[bool]]]
+
+
+def is_template(value: Any) -> bool: pass
+def compile_string(text: str, escape: Callable[[str], str]=None) -> Callable[[Dict], str]: pass
+def compile_template(template: Any, escape: Callable[[str], str]=None) -> Callable[[Dict], Any]: pass
+def compile_extractor(extractor: ExtractorType) -> Callable[[int, str, Any], Any]: pass
+
+
+class Step:
+    url: str
+    method: HttpMethod
+    data: Any
+    headers: Dict
+    extract: Dict[str, ExtractorType]
+    name: str
+    success: Callable[[int], bool]
+    think_time: float
+
+    def __new__(cls, *args, **kwargs) -> Step: pass
+    def __init__(self, url: str, method: HttpMethod=HttpMethod.GET, data: Any=None, headers: Dict=None,
+                 extract: Dict[str, ExtractorType]=None, name: str=None, success: Callable[[int], bool]=None,
+                 think_time: float=0): pass
+
+
+# noinspection PyMissingConstructor
+class StepJob(IAnalysable):
+    __session_manager: SessionManager
+
+    step: Step
+    name: str
+    session_manager: SessionManager
+
+    def __new__(cls, *args, **kwargs) -> StepJob: pass
+    def __init__(self, index: int, step: Step, success: Callable[[int], bool]=None): pass
+    def _collect(self) -> None: pass
+
+
+# noinspection PyMissingConstructor
+class StepManager(IManager):
+    def __init__(self): pass
+
+
+# noinspection PyMissingConstructor
+class ScenarioJob(IAnalysable):
+    __step_manager: StepManager
+    __scenario: str
+    __job_kwargs: Dict
+    __budget: RequestBudget
+    __limiter: RateLimiter
+
+    protocol: Protocol
+    url: str
+    name: str
+    steps: List[Step]
+
+    def __new__(cls, *args, **kwargs) -> ScenarioJob: pass
+    def __init__(self, name: str, steps: List[Step], **kwargs): pass
+    def record_samples(self, writer: SampleWriter, index: int=0) -> None: pass
+    def record_live(self, slot: LiveSlot) -> None: pass
+    def record_responses(self, sampler: ResponseSampler) -> None: pass
+    def limit(self, budget: RequestBudget) -> None: pass
+    def throttle(self, limiter: RateLimiter) -> None: pass
+    def clone(self, **kwargs) -> ScenarioJob: pass
+    def _breakdown(self) -> Dict[str, AnalyseResult]: pass
+    def __acquire(self) -> bool: pass
+    def __done(self) -> None: pass
+
+    async def start(self) -> None: pass
+    async def __virtual_user(self, connector: TCPConnector, steps: List[CompiledStep], user: int) -> None: pass
+    def __compile(self, step_job: StepJob) -> CompiledStep: pass
+
+
+class Scenario(JobContainer):
+    _name: str
+    _steps: List[Step]
+    _variables: Dict
+
+    def __new__(cls, *args, **kwargs) -> Scenario: pass
+    def __init__(self, name: str, *steps: Step, headers: Dict=None, cookies: Dict=None, variables: Dict=None,
+                 reuse_job: bool=True, success: Callable[[int], bool]=None, concurrency: int=1): pass
+    def job(self) -> ScenarioJob: pass
@@ -1,5 +1,6 @@
-from .interfaces import IAnalysable, IManager
-from ..util import uid, readonly
+from .interfaces import IAnalysable, IManager, AnalyseResult
+from ..net import is_success
+from ..util import uid, readonly, Histogram
 
 
 class Session(IAnalysable):
@@ -9,47 +10,188 @@ class Session(IAnalysable):
     def __init__(self, _protocol, _url):
         super().__init__(uid(__class__.__name__))
         self.__status_code: int = 200
+        self.__error = None
         # properties
         readonly(self, 'protocol', lambda: _protocol)
         readonly(self, 'url', lambda: _url)
         readonly(self, 'status_code', lambda: self.__status_code)
+        readonly(self, 'error', lambda: self.__error)
 
-    def stop(self, _status_code=200):
+    def stop(self, _status_code=200, _error=None):
         super().stop()
         self.__status_code = _status_code
+        self.__error = _error
 
     def analyse(self):
         super().analyse()
         self._total_request = 1
-        self._success_request = 1 if self.status_code == 200 else 0
+        self._success_request = 1 if self.error is None and is_success(self.status_code) else 0
 
 
 class SessionManager(IManager):
     """
-    maintain a session list, provide a pair of convenient functions
-    for adding a new session
+    maintain the counters of finished sessions, provide a pair of
+    convenient functions for recording a new session
     """
-    def __init__(self):
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        manager = super().__new__(cls)
+        readonly(manager, 'total_request', lambda: None)
+        readonly(manager, 'success_request', lambda: None)
+        readonly(manager, 'histogram', lambda: None)
+        readonly(manager, 'series', lambda: None)
+        readonly(manager, 'statuses', lambda: None)
+        readonly(manager, 'errors', lambda: None)
+        readonly(manager, 'urls', lambda: None)
+        return manager
+
+    def __init__(self, success=None):
         super().__init__(uid(__class__.__name__))
-        # temporary saved session object, a open & close operation
-        # is a complete life cycle of the session
-        self.__session = None
+        self.__success = success or is_success
+        # counters of closed sessions, sessions themselves are dropped once closed
+        self.__total_request = 0
+        self.__success_request = 0
+        self.__histogram = Histogram()
+        self.__series = {}
+        self.__statuses = {}
+        self.__errors = {}
+        self.__urls = {}
+        # optional raw sample recording
+        self.__sample_writer = None
+        self.__sample_index = 0
+        # optional live counters in shared memory
+        self.__live = None
+        # optional reservoirs of the responses
+        self.__sampler = None
+        # properties
+        readonly(self, 'total_request', lambda: self.__total_request)
+        readonly(self, 'success_request', lambda: self.__success_request)
+        readonly(self, 'histogram', lambda: self.__histogram)
+        readonly(self, 'series', lambda: self.__series)
+        readonly(self, 'statuses', lambda: self.__statuses)
+        readonly(self, 'errors', lambda: self.__errors)
+        readonly(self, 'urls', lambda: self.__urls)
 
-    def open(self, protocol, url):
+    def record_samples(self, writer, index=0):
         """
-        open a new session
-        :return: the session object
+        write every closed session to the sample writer
+        :param writer: SampleWriter
+        :param index: job index of the records
+        :return: None
         """
-        self.__session = Session(_protocol=protocol, _url=url)
-        self.__session.start()
-        return self.__session
+        self.__sample_writer = writer
+        self.__sample_index = index
 
-    def close(self, status_code):
+    def record_live(self, slot):
         """
-        close and save the opened session
+        count every closed session in the live counters as well
+        :param slot: LiveSlot of the worker process
+        :return: None
+        """
+        self.__live = slot
+
+    def record_responses(self, sampler):
+        """
+        offer every closed session to the reservoirs of the responses
+        :param sampler: ResponseSampler of the worker
+        :return: None
+        """
+        self.__sampler = sampler
+
+    def is_success(self, status_code):
+        """
+        whether the status code is a success to this manager
         :param status_code:
+        :return:
+        """
+        return self.__success(status_code)
+
+    def split(self, _id, start_time, stop_time):
+        """
+        analyse the counters of the closed sessions as a result of their own, and count from scratch
+        :param _id: id of the result
+        :param start_time: milliseconds the counted period starts at
+        :param stop_time: milliseconds it stops at
+        :return: AnalyseResult
+        """
+        latency = stop_time - start_time
+        result = AnalyseResult(_id=_id, total_request=self.__total_request, success_request=self.__success_request,
+                               latency=latency, qps=self.__success_request * 1000 // max(1, latency),
+                               start_time=start_time, stop_time=stop_time, histogram=self.__histogram,
+                               series=self.__series, statuses=self.__statuses, errors=self.__errors, urls=self.__urls)
+        self.__total_request = 0
+        self.__success_request = 0
+        self.__histogram = Histogram()
+        self.__series = {}
+        self.__statuses = {}
+        self.__errors = {}
+        self.__urls = {}
+        return result
+
+    @staticmethod
+    def open(protocol, url):
+        """
+        open a new session, a open & close operation is a complete
+        life cycle of the session, several sessions can be opened at
+        the same time by concurrent requests
+        :return: the session object
+        """
+        session = Session(_protocol=protocol, _url=url)
+        session.start()
+        return session
+
+    @staticmethod
+    def discard(session):
+        """
+        drop an opened session without counting it in
+        :param session:
+        :return: None
+        """
+        session.stop()
+
+    def close(self, session, status_code=200, error=None, size=0, headers=None, body=None, exception=None):
+        """
+        close the opened session and count it in
+        :param session: the session returned by open
+        :param status_code: response status code, ignored if error is given
+        :param error: ErrorType of a failed request
+        :param size: bytes received
+        :param headers: response headers, only read if the response is sampled
+        :param body: response body, only read if the response is sampled
+        :param exception: the exception failing the request, only read if it's sampled
         :return: None
         """
-        self.__session.stop(_status_code=status_code)
-        self._container.append(self.__session)
-        self.__session = None
+        session.stop(_status_code=status_code, _error=error)
+        success = error is None and self.__success(status_code)
+        latency = session._latency
+        # request counters
+        self.__total_request += 1
+        self.__success_request += success
+        self.__histogram.record(latency)
+        counts = self.__series.get(session.start_time // 1000)
+        if counts is None:
+            counts = self.__series[session.start_time // 1000] = [0, 0]
+        counts[0] += 1
+        counts[1] += success
+        # status & error counters, both in total and per url
+        url = self.__urls.get(session.url)
+        if url is None:
+            url = self.__urls[session.url] = AnalyseResult.url_counters()
+        url['total_request'] += 1
+        url['success_request'] += success
+        if error is None:
+            self.__statuses[status_code] = self.__statuses.get(status_code, 0) + 1
+            url['statuses'][status_code] = url['statuses'].get(status_code, 0) + 1
+        else:
+            self.__errors[error.phrase] = self.__errors.get(error.phrase, 0) + 1
+            url['errors'][error.phrase] = url['errors'].get(error.phrase, 0) + 1
+        if self.__sample_writer is not None:
+            # errors are written as negative status codes
+            self.__sample_writer.write(session.start_time, latency,
+                                       status_code if error is None else -error.value, self.__sample_index, success)
+        if self.__live is not None:
+            self.__live.record(latency, success, error is not None, size)
+        if self.__sampler is not None:
+            self.__sampler.record(session, status_code, error, success, size, headers, body, exception)
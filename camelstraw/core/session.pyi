@@ -1,5 +1,11 @@
-from .interfaces import IAnalysable, IManager
-from ..net import Protocol
+from typing import Callable, Dict, List, Mapping, Union
+
+from .interfaces import IAnalysable, IManager, AnalyseResult
+from .live import LiveSlot
+from .reservoir import ResponseSampler
+from .samples import SampleWriter
+from ..net import Protocol, ErrorType
+from ..util import Histogram
 
 
 # noinspection PyMissingConstructor
@@ -7,18 +13,47 @@ class Session(IAnalysable):
     protocol: Protocol
     url: str
     status_code: int
+    error: ErrorType
 
     def __init__(self, _protocol: Protocol, _url: str): pass
 
-    def stop(self, _status_code: int=200) -> None: pass
+    def stop(self, _status_code: int=200, _error: ErrorType=None, size: int=0) -> None: pass
     def analyse(self) -> None: pass
 
 
 # noinspection PyMissingConstructor
 class SessionManager(IManager):
-    __session: Session
-
-    def __init__(self): pass
-
-    def open(self, protocol: Protocol, url: str) -> Session: pass
-    def close(self, status_code: int=200) -> None: pass
+    __success: Callable[[int], bool]
+    __total_request: int
+    __success_request: int
+    __histogram: Histogram
+    __series: Dict[int, List[int]]
+    __statuses: Dict[int, int]
+    __errors: Dict[str, int]
+    __urls: Dict[str, Dict]
+    __sample_writer: SampleWriter
+    __sample_index: int
+    __live: LiveSlot
+    __sampler: ResponseSampler
+
+    total_request: int
+    success_request: int
+    histogram: Histogram
+    series: Dict[int, List[int]]
+    statuses: Dict[int, int]
+    errors: Dict[str, int]
+    urls: Dict[str, Dict]
+
+    def __init__(self, success: Callable[[int], bool]=None): pass
+    def record_samples(self, writer: SampleWriter, index: int=0) -> None: pass
+    def record_live(self, slot: LiveSlot) -> None: pass
+    def record_responses(self, sampler: ResponseSampler) -> None: pass
+    def is_success(self, status_code: int) -> bool: pass
+    def split(self, _id: str, start_time: int, stop_time: int) -> AnalyseResult: pass
+
+    @staticmethod
+    def open(protocol: Protocol, url: str) -> Session: pass
+    @staticmethod
+    def discard(session: Session) -> None: pass
+    def close(self, session: Session, status_code: int=200, error: ErrorType=None, size: int=0,
+              headers: Mapping=None, body: Union[str, bytes]=None, exception: BaseException=None) -> None: pass
@@ -1,12 +1,13 @@
-from asyncio import get_event_loop, new_event_loop, set_event_loop
+from asyncio import get_event_loop, ensure_future, sleep, gather
 from multiprocessing import Process
 
 import dill
-from aiohttp import ClientSession as Client, WSMsgType
+from aiohttp import ClientSession as Client, ClientConnectorError, WSMsgType
 
 from .job import JobContainer
-from ..net import get_host_ip
-from ..settings import MASTER, MASTER_PORT
+from .relay import Relay, upstream_url, is_relay
+from ..net import get_host_ip, ws_connect
+from ..settings import MASTER_CONNECT_RETRY, SLAVE_LINGER, HEALTH_INTERVAL
 from ..util import uid, singleton, readonly
 from .worker import WorkerManager
 
@@ -17,8 +18,13 @@ class SlaveService:
     Synchronize operations extracted from Slave, for the purpose
     that main program can interact with slave without being blocked
     """
-    def __init__(self, _id=uid('Slave-Service')):
+    def __init__(self, _id=None):
+        _id = _id or uid('Slave-Service')
         self.__worker_manager = None
+        # increased by every round, reports of the replaced rounds are dropped
+        self.__round = 0
+        # forwards the health of the running round to the master
+        self.__streaming = None
         # properties
         readonly(self, 'id', lambda: _id)
         readonly(self, 'result', lambda: self.__worker_manager.result)
@@ -29,36 +35,126 @@ class SlaveService:
         loop.close()
 
     async def __handler(self):
-        async with Client().ws_connect('ws://%s:%s/slave/' % (MASTER, MASTER_PORT)) as ws:
-            # send init request
+        async with Client() as client:
+            retry, interval = MASTER_CONNECT_RETRY, 1
+            while True:
+                try:
+                    # the master, or the relay of this host in a large fleet
+                    ws = await ws_connect(client, upstream_url(get_host_ip()), retry, interval)
+                except ClientConnectorError:
+                    # no master shows up any more
+                    break
+                async with ws:
+                    released = await self.__serve(ws)
+                if released or self.__worker_manager is None:
+                    break
+                # the master is gone without releasing us, keep the workers warm for the next master
+                self.__worker_manager.stop()
+                retry, interval = SLAVE_LINGER * 10, 0.1
+        if self.__streaming is not None:
+            self.__streaming.cancel()
+            await gather(self.__streaming, return_exceptions=True)
+        # release all worker processes
+        if self.__worker_manager is not None:
+            self.__worker_manager.close()
+
+    async def __serve(self, ws):
+        """
+        handle the commands of a master until it's gone
+        :param ws:
+        :return: whether the master releases the slave
+        """
+        # send init request
+        await ws.send_json({
+            'command': 'init',
+            'slave': get_host_ip()
+        })
+        # loop messages from master
+        async for msg in ws:
+            # handle exceptions
+            assert msg.type == WSMsgType.TEXT
+            data = msg.json()
+            assert 'command' in data
+            # init command, the worker processes forked for a previous master are reused
+            if 'init' == data['command']:
+                worker_num = data.get('worker_num', None)
+                run_id, requests = data.get('run', None), data.get('requests', None)
+                partition, rate = data.get('partition', None), data.get('rate', None)
+                profile, warmup = data.get('profile', None), data.get('warmup', None)
+                if self.__worker_manager is None:
+                    self.__worker_manager = WorkerManager(worker_num, run_id=run_id, requests=requests,
+                                                          partition=partition, rate=rate, profile=profile,
+                                                          warmup=warmup)
+                else:
+                    self.__worker_manager.reset(worker_num, run_id=run_id, requests=requests, partition=partition,
+                                                rate=rate, profile=profile, warmup=warmup)
+                assert 'jobs' in data
+                for job_bytes in data['jobs']:
+                    job: JobContainer = dill.loads(bytes(job_bytes))
+                    self.__worker_manager.dispatch(job)
+                # the warmup ends at the moment given by the master, the same for every slave
+                self.__worker_manager.start(data.get('measure_at', None))
+                self.__watch(ws)
+            # start another round with the alive workers
+            elif 'restart' == data['command']:
+                self.__worker_manager.restart(data.get('measure_at', None), **data.get('params', {}))
+                self.__watch(ws)
+            # the share of the global rate is moved by the master
+            elif 'rate' == data['command']:
+                self.__worker_manager.throttle(data.get('rate', None))
+            # the round is reported by the watcher once all workers are stopped
+            elif 'stop' == data['command']:
+                self.__worker_manager.stop()
+            # no more runs, the worker processes can be released
+            elif 'close' == data['command']:
+                return True
+        return False
+
+    def __watch(self, ws):
+        """
+        report the running round as soon as all workers finish it
+        :param ws:
+        :return:
+        """
+        self.__round += 1
+        ensure_future(self.__report(ws, self.__round))
+        if self.__streaming is not None:
+            self.__streaming.cancel()
+        self.__streaming = ensure_future(self.__stream_health(ws, self.__round))
+
+    async def __stream_health(self, ws, _round):
+        """
+        forward the latest health samples and live counters of the workers while the round is running
+        :param ws:
+        :param _round:
+        :return:
+        """
+        while True:
+            await sleep(HEALTH_INTERVAL)
+            if _round != self.__round or ws.closed or not self.__worker_manager.running:
+                return
+            # live counters are read from the shared memory of the workers, not sent by them
+            progress = self.__worker_manager.progress
             await ws.send_json({
-                'command': 'init',
-                'slave': get_host_ip()
+                'command': 'health',
+                'slave': get_host_ip(),
+                'health': self.__worker_manager.health,
+                'granted': self.__worker_manager.granted,
+                'progress': dict(progress, histogram=progress['histogram'].to_json())
             })
-            # loop messages from master
-            async for msg in ws:
-                # handle exceptions
-                assert msg.type == WSMsgType.TEXT
-                data = msg.json()
-                assert 'command' in data
-                # init command
-                if 'init' == data['command']:
-                    worker_num = data.get('worker_num', None)
-                    self.__worker_manager = WorkerManager(worker_num)
-                    assert 'jobs' in data
-                    for job_bytes in data['jobs']:
-                        job: JobContainer = dill.loads(bytes(job_bytes))
-                        self.__worker_manager.dispatch(job)
-                    self.__worker_manager.start()
-                elif 'stop' == data['command']:
-                    self.__worker_manager.stop()
-                    report_data = {
-                        'command': 'report',
-                        'slave': get_host_ip(),
-                        'result': self.result.json_result
-                    }
-                    await ws.send_json(report_data)
-                    break
+
+    async def __report(self, ws, _round):
+        # wait in another thread so that the stop command can still be received
+        await get_event_loop().run_in_executor(None, self.__worker_manager.wait)
+        if _round != self.__round or ws.closed:
+            return
+        await ws.send_json({
+            'command': 'report',
+            'slave': get_host_ip(),
+            'result': self.result.json_result,
+            'startup': self.__worker_manager.startup,
+            'pinning': self.__worker_manager.pinning
+        })
 
 
 def start_service():
@@ -69,11 +165,18 @@ def start_service():
 @singleton
 class Slave:
 
-    def __init__(self, _id=uid('Slave')):
+    def __init__(self, _id=None):
+        _id = _id or uid('Slave')
         self.__process = None
         # properties
         readonly(self, 'id', lambda: _id)
 
     def start(self):
+        # the slave process is kept warm between runs unless released by the master
+        if self.__process is not None and self.__process.is_alive():
+            return
+        # a relay host runs its relay next to the slave
+        if is_relay(get_host_ip()):
+            Relay().start()
         self.__process = Process(target=start_service)
         self.__process.start()
@@ -1,21 +1,27 @@
 import asyncio
 from multiprocessing import Process
 
-from aiohttp import ClientSession as Client, WSMsgType
+from aiohttp import ClientSession as Client, ClientWebSocketResponse, WSMsgType
 
 from .interfaces import AnalyseResult
 from .worker import WorkerManager
-from ..util import uid
 
 class SlaveService:
     __worker_manager: WorkerManager
+    __round: int
+    __streaming: asyncio.Task
     id: str
     result: AnalyseResult
-    def __init__(self, _id=uid('Slave')): pass
+    def __init__(self, _id: str=None): pass
     def start(self) -> None: pass
     async def __handler(self) -> asyncio.coroutine: pass
+    async def __serve(self, ws: ClientWebSocketResponse) -> bool: pass
+    def __watch(self, ws: ClientWebSocketResponse) -> None: pass
+    async def __report(self, ws: ClientWebSocketResponse, _round: int) -> asyncio.coroutine: pass
+    async def __stream_health(self, ws: ClientWebSocketResponse, _round: int) -> asyncio.coroutine: pass
 
 class Slave:
     __process: Process
     id: str
+    def __init__(self, _id: str=None): pass
     def start(self) -> None: pass
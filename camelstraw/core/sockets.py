@@ -0,0 +1,337 @@
+import asyncio
+from asyncio import DatagramProtocol, Queue, gather, get_event_loop, open_connection, sleep, wait_for
+from itertools import cycle, repeat
+from typing import Callable, Generator, Iterator
+from urllib.parse import urlsplit
+
+from .job import REQUEST_EXCEPTIONS, JobContainer
+from .session import SessionManager
+from .interfaces import IAnalysable, CoreStatus
+from .templates import check_generators, has_generators, compile_data
+from ..settings import SOCKET_TIMEOUT, SOCKET_READ_SIZE
+from ..util import uid, readonly
+from ..net import Protocol, ErrorType
+from ..net.framing import framing as normalize_framing
+
+
+class DatagramClient(DatagramProtocol):
+    """
+    queue every datagram received, and every error reported, of a udp endpoint
+    """
+    def __init__(self):
+        self.queue = Queue()
+
+    def datagram_received(self, data, addr):
+        self.queue.put_nowait(data)
+
+    def error_received(self, exc):
+        self.queue.put_nowait(exc)
+
+    def connection_lost(self, exc):
+        self.queue.put_nowait(exc or ConnectionResetError('udp endpoint closed'))
+
+
+class SocketJob(IAnalysable):
+    """
+    execution unit of a raw tcp or udp service, every request loop holds a
+    connection (an endpoint for udp) and sends the payloads one after another,
+    a response is told apart by the framing of tcp, or is a datagram of udp
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        job = super().__new__(cls)
+        readonly(job, 'protocol', lambda: None)
+        readonly(job, 'url', lambda: None)
+        readonly(job, 'name', lambda: None)
+        return job
+
+    def __init__(self, url, **kwargs):
+        self.__session_manager = SessionManager(success=kwargs.get('success', None))
+        super().__init__(uid(__class__.__name__), self.__session_manager)
+        self.__job_kwargs = kwargs
+        check_generators(kwargs.get('data', None))
+        self.__budget = None
+        self.__limiter = None
+        # properties
+        readonly(self, 'protocol', lambda: Protocol.from_url(url))
+        readonly(self, 'url', lambda: url)
+        readonly(self, 'name', lambda: '%s %s' % (self.protocol.phrase, url))
+
+    def record_samples(self, writer, index=0):
+        """
+        write raw per-request samples of this job to the writer
+        :param writer: SampleWriter
+        :param index: job index in the sample file
+        :return:
+        """
+        self.__session_manager.record_samples(writer, index)
+
+    def record_live(self, slot):
+        """
+        count the requests of this job in the live counters of the worker process
+        :param slot: LiveSlot
+        :return:
+        """
+        self.__session_manager.record_live(slot)
+
+    def record_responses(self, sampler):
+        """
+        offer the responses of this job to the reservoirs of the worker
+        :param sampler: ResponseSampler
+        :return:
+        """
+        self.__session_manager.record_responses(sampler)
+
+    def limit(self, budget):
+        """
+        stop sending requests once the budget is used up
+        :param budget: RequestBudget shared by the jobs of a worker
+        :return:
+        """
+        self.__budget = budget
+
+    def throttle(self, limiter):
+        """
+        pace the requests by the rate limiter shared by the worker processes of the host
+        :param limiter: RateLimiter
+        :return:
+        """
+        self.__limiter = limiter
+
+    def clone(self, **kwargs):
+        """
+        create a fresh job with the same arguments, used to run the job another round
+        :param kwargs: arguments to override, concurrency for example
+        :return: SocketJob
+        """
+        job_kwargs = dict(self.__job_kwargs)
+        job_kwargs.update(kwargs)
+        return SocketJob(url=self.url, **job_kwargs)
+
+    def _collect(self):
+        manager = self.__session_manager
+        self._total_request = manager.total_request
+        self._success_request = manager.success_request
+        self._histogram = manager.histogram
+        self._series = manager.series
+        self._statuses = manager.statuses
+        self._errors = manager.errors
+        self._urls = manager.urls
+
+    def __acquire(self):
+        """
+        whether the next request should be sent
+        :return:
+        """
+        if self.status != CoreStatus.STARTED:
+            return False
+        return self.__budget is None or self.__budget.acquire()
+
+    def __close(self, session, status_code=200, error=None, size=0, body=None, exception=None):
+        self.__session_manager.close(session, status_code, error, size, body=body, exception=exception)
+        if self.__budget is not None:
+            self.__budget.done()
+
+    def __discard(self, session):
+        self.__session_manager.discard(session)
+        if self.__budget is not None:
+            self.__budget.release()
+
+    async def start(self):
+        super().start()
+        address = urlsplit(self.url)
+        payloads = self.__payloads(self.__job_kwargs.get('data', None))
+        callback = self.__job_kwargs.get('callback', None)
+        concurrency = max(1, int(self.__job_kwargs.get('concurrency', 1)))
+        if self.protocol == Protocol.TCP:
+            framing = normalize_framing(self.__job_kwargs.get('framing', None))
+            await gather(*(self.__do_tcp_connect(address.hostname, address.port, payloads, framing, callback)
+                           for _ in range(concurrency)))
+        elif self.protocol == Protocol.UDP:
+            reply = self.__job_kwargs.get('reply', False)
+            await gather(*(self.__do_udp_connect(address.hostname, address.port, payloads, reply, callback)
+                           for _ in range(concurrency)))
+
+    @staticmethod
+    def __payloads(data):
+        """
+        transform all types to an iterator of bytes
+        :param data:
+        :return:
+        """
+        if has_generators(data):
+            # rendered again for every request
+            return iter(compile_data(data, encode=True), None)
+        elif isinstance(data, Generator) or isinstance(data, Iterator):
+            return cycle(item.encode() if isinstance(item, str) else item for item in data)
+        elif isinstance(data, Callable):
+            data = data()
+        return repeat(data.encode() if isinstance(data, str) else bytes(data or b''))
+
+    async def __do_tcp_connect(self, host, port, payloads, framing, callback=None):
+        # reconnect as long as the job is running, a failed connection is recorded as a failed request
+        timeout = self.__job_kwargs.get('timeout', SOCKET_TIMEOUT)
+        while self.__acquire():
+            session = self.__session_manager.open(self.protocol, self.url)
+            try:
+                reader, writer = await wait_for(open_connection(host, port), timeout)
+            except REQUEST_EXCEPTIONS as e:
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
+                continue
+            self.__discard(session)
+            try:
+                await self.__do_tcp_request(reader, writer, payloads, framing, timeout, callback)
+            finally:
+                writer.close()
+
+    async def __do_tcp_request(self, reader, writer, payloads, framing, timeout, callback=None):
+        # bytes received but not framed yet, a response may arrive in several reads and a read
+        # may hold the beginning of the next response
+        buffer = bytearray()
+        while self.__acquire():
+            if self.__limiter is not None:
+                await self.__limiter.acquire()
+            session = self.__session_manager.open(self.protocol, self.url)
+            try:
+                writer.write(next(payloads))
+                await writer.drain()
+                if framing is None:
+                    # nothing to wait for, let the other loops run
+                    self.__close(session, 200)
+                    await sleep(0)
+                    continue
+                size = framing(buffer)
+                while size is None:
+                    chunk = await wait_for(reader.read(SOCKET_READ_SIZE), timeout)
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(bytes(buffer), None)
+                    buffer += chunk
+                    size = framing(buffer)
+                response = bytes(buffer[:size])
+                del buffer[:size]
+                self.__close(session, 200, size=size, body=response)
+                if isinstance(callback, Callable):
+                    callback(status_code=200, content=response)
+            except REQUEST_EXCEPTIONS as e:
+                # the connection is in an unknown state, start over with a new one
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
+                return
+
+    async def __do_udp_connect(self, host, port, payloads, reply, callback=None):
+        timeout = self.__job_kwargs.get('timeout', SOCKET_TIMEOUT)
+        while self.__acquire():
+            session = self.__session_manager.open(self.protocol, self.url)
+            try:
+                transport, client = await get_event_loop().create_datagram_endpoint(
+                    DatagramClient, remote_addr=(host, port))
+            except REQUEST_EXCEPTIONS as e:
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
+                continue
+            self.__discard(session)
+            try:
+                await self.__do_udp_request(transport, client.queue, payloads, reply, timeout, callback)
+            finally:
+                transport.close()
+
+    async def __do_udp_request(self, transport, queue, payloads, reply, timeout, callback=None):
+        while self.__acquire():
+            if self.__limiter is not None:
+                await self.__limiter.acquire()
+            session = self.__session_manager.open(self.protocol, self.url)
+            try:
+                # replies arriving after their requests timed out are dropped
+                while not queue.empty():
+                    queue.get_nowait()
+                transport.sendto(next(payloads))
+                if not reply:
+                    self.__close(session, 200)
+                    await sleep(0)
+                    continue
+                response = await wait_for(queue.get(), timeout)
+                if isinstance(response, BaseException):
+                    raise response
+                self.__close(session, 200, size=len(response), body=response)
+                if isinstance(callback, Callable):
+                    callback(status_code=200, content=response)
+            except asyncio.TimeoutError as e:
+                # a lost datagram doesn't break the endpoint
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
+            except REQUEST_EXCEPTIONS as e:
+                self.__close(session, error=ErrorType.from_exception(e), exception=e)
+                return
+
+
+class TcpJob(JobContainer):
+    """
+    send byte payloads over tcp connections, tcp://host:port
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
+        return inst
+
+    def __init__(self, url, data=None, framing=None, callback=None, reuse_job=True, concurrency=1, broadcast=False,
+                 timeout=SOCKET_TIMEOUT):
+        """
+        :param data: payload of every request, bytes, str, a {{generator}} template, an iterator or a callable
+        :param framing: delimiter (str or bytes), fixed length (int) or a callable of the bytes received so far
+        returning the length of the first response (None until it's complete), no response is waited for if None
+        :param timeout: seconds to wait for connecting or a response
+        """
+        parts = urlsplit(url)
+        if parts.scheme != 'tcp' or parts.hostname is None or parts.port is None:
+            raise ValueError('tcp job needs a url of tcp://host:port, got %s' % url)
+        normalize_framing(framing)
+        super().__init__(url, data=data, callback=callback, reuse_job=reuse_job, concurrency=concurrency,
+                         broadcast=broadcast)
+        self._framing = framing
+        self._timeout = timeout
+
+    def job(self):
+        if self._job is None or self.reuse_job:
+            self._job = SocketJob(url=self._url, data=self._data, framing=self._framing, callback=self._callback,
+                                  concurrency=self._concurrency, timeout=self._timeout)
+        return self._job
+
+
+class UdpJob(JobContainer):
+    """
+    send byte payloads as udp datagrams, udp://host:port
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'reuse_job', lambda: None)
+        readonly(inst, 'url', lambda: None)
+        readonly(inst, 'broadcast', lambda: None)
+        return inst
+
+    def __init__(self, url, data=None, reply=False, callback=None, reuse_job=True, concurrency=1, broadcast=False,
+                 timeout=SOCKET_TIMEOUT):
+        """
+        :param data: payload of every datagram, bytes, str, a {{generator}} template, an iterator or a callable
+        :param reply: wait for a datagram in reply to every one sent, a request is done once it's sent if not
+        :param timeout: seconds to wait for a reply, a request without a reply in time fails
+        """
+        parts = urlsplit(url)
+        if parts.scheme != 'udp' or parts.hostname is None or parts.port is None:
+            raise ValueError('udp job needs a url of udp://host:port, got %s' % url)
+        super().__init__(url, data=data, callback=callback, reuse_job=reuse_job, concurrency=concurrency,
+                         broadcast=broadcast)
+        self._reply = reply
+        self._timeout = timeout
+
+    def job(self):
+        if self._job is None or self.reuse_job:
+            self._job = SocketJob(url=self._url, data=self._data, reply=self._reply, callback=self._callback,
+                                  concurrency=self._concurrency, timeout=self._timeout)
+        return self._job
@@ -0,0 +1,81 @@
+from asyncio import DatagramProtocol, DatagramTransport, Queue, StreamReader, StreamWriter
+from typing import Callable, Dict, Iterator, Optional, Union
+
+from .budget import RequestBudget
+from .job import DataType, JobContainer
+from .limiter import RateLimiter
+from .live import LiveSlot
+from .reservoir import ResponseSampler
+from .samples import SampleWriter
+from .session import Session, SessionManager
+from .interfaces import IAnalysable
+from ..net import Protocol, ErrorType
+from ..net.framing import FramingType
+
+
+class DatagramClient(DatagramProtocol):
+    queue: Queue
+    def __init__(self): pass
+    def datagram_received(self, data: bytes, addr: tuple) -> None: pass
+    def error_received(self, exc: Exception) -> None: pass
+    def connection_lost(self, exc: Optional[Exception]) -> None: pass
+
+
+# noinspection PyMissingConstructor
+class SocketJob(IAnalysable):
+    __session_manager: SessionManager
+    __job_kwargs: Dict
+    __budget: RequestBudget
+    __limiter: RateLimiter
+
+    protocol: Protocol
+    url: str
+    name: str
+
+    def __new__(cls, *args, **kwargs): pass
+    def __init__(self, url: str, **kwargs): pass
+    def record_samples(self, writer: SampleWriter, index: int=0) -> None: pass
+    def record_live(self, slot: LiveSlot) -> None: pass
+    def record_responses(self, sampler: ResponseSampler) -> None: pass
+    def limit(self, budget: RequestBudget) -> None: pass
+    def throttle(self, limiter: RateLimiter) -> None: pass
+    def clone(self, **kwargs) -> SocketJob: pass
+    def _collect(self) -> None: pass
+    def __acquire(self) -> bool: pass
+    def __close(self, session: Session, status_code: int=200, error: ErrorType=None, size: int=0,
+                body: bytes=None, exception: BaseException=None) -> None: pass
+    def __discard(self, session: Session) -> None: pass
+
+    async def start(self) -> None: pass
+    async def __do_tcp_connect(self, host: str, port: int, payloads: Iterator[bytes], framing: FramingType,
+                               callback: Callable=None) -> None: pass
+    async def __do_tcp_request(self, reader: StreamReader, writer: StreamWriter, payloads: Iterator[bytes],
+                               framing: FramingType, timeout: float, callback: Callable=None) -> None: pass
+    async def __do_udp_connect(self, host: str, port: int, payloads: Iterator[bytes], reply: bool,
+                               callback: Callable=None) -> None: pass
+    async def __do_udp_request(self, transport: DatagramTransport, queue: Queue, payloads: Iterator[bytes],
+                               reply: bool, timeout: float, callback: Callable=None) -> None: pass
+
+    @staticmethod
+    def __payloads(data: DataType) -> Iterator[bytes]: pass
+
+
+class TcpJob(JobContainer):
+    _framing: Union[str, bytes, int, FramingType]
+    _timeout: float
+
+    def __new__(cls, *args, **kwargs) -> JobContainer: pass
+    def __init__(self, url: str, data: DataType=None, framing: Union[str, bytes, int, FramingType]=None,
+                 callback: Callable=None, reuse_job: bool=True, concurrency: int=1, broadcast: bool=False,
+                 timeout: float=10): pass
+    def job(self) -> SocketJob: pass
+
+
+class UdpJob(JobContainer):
+    _reply: bool
+    _timeout: float
+
+    def __new__(cls, *args, **kwargs) -> JobContainer: pass
+    def __init__(self, url: str, data: DataType=None, reply: bool=False, callback: Callable=None,
+                 reuse_job: bool=True, concurrency: int=1, broadcast: bool=False, timeout: float=10): pass
+    def job(self) -> SocketJob: pass
@@ -0,0 +1,228 @@
+import json
+import random
+import re
+import time
+from itertools import count
+from urllib.parse import quote
+
+# {{generator arg ...}}, rendered again for every request
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)((?:\s+[^\s{}]+)*)\s*\}\}')
+
+
+def counter(start=0, step=1):
+    """
+    {{counter}}, {{counter 1000}} or {{counter 0 2}}, counted per worker process
+    """
+    return map(str, count(int(start), int(step))).__next__
+
+
+def random_range(low=0, high=2 ** 31 - 1):
+    """
+    {{random 1 100}}, an integer between low and high, both of them included
+    """
+    low, high, randint = int(low), int(high), random.randint
+    return lambda: str(randint(low, high))
+
+
+def unique_id():
+    """
+    {{uuid}}, a random version 4 uuid, from the random module instead of the os
+    since it needs to be unique rather than unpredictable
+    """
+    bits, clear, variant = random.getrandbits, ~(0xf000 << 64 | 0xc000 << 48), 0x4000 << 64 | 0x8000 << 48
+
+    def generate():
+        value = '%032x' % (bits(128) & clear | variant)
+        return '%s-%s-%s-%s-%s' % (value[:8], value[8:12], value[12:16], value[16:20], value[20:])
+    return generate
+
+
+def choice(path):
+    """
+    {{choice users.txt}}, a random line of the file, which is read once per worker process
+    """
+    with open(path, encoding='utf-8') as file:
+        values = [line.rstrip('\r\n') for line in file if line.strip()]
+    if len(values) == 0:
+        raise ValueError('No value to choose from in %s' % path)
+    pick = random.choice
+    return lambda: pick(values)
+
+
+def now(unit='s'):
+    """
+    {{time}}, {{time ms}} or {{time iso}}, the current time in seconds, milliseconds or iso 8601 (utc)
+    """
+    if unit == 's':
+        return lambda: str(int(time.time()))
+    if unit == 'ms':
+        return lambda: str(int(time.time() * 1000))
+    if unit == 'iso':
+        return lambda: time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    raise ValueError('Unknown time unit %s, expected one of s, ms, iso' % unit)
+
+
+GENERATORS = {
+    'counter': counter,
+    'random': random_range,
+    'uuid': unique_id,
+    'choice': choice,
+    'time': now
+}
+# generators whose values never need escaping in urls or json strings
+SAFE_GENERATORS = {'counter', 'random', 'uuid', 'time'}
+
+
+def has_generators(value):
+    """
+    whether the value contains any {{generator}} placeholder
+    :param value: str, or dict & list of them
+    :return:
+    """
+    if isinstance(value, str):
+        return '{{' in value and PLACEHOLDER.search(value) is not None
+    if isinstance(value, dict):
+        return any(has_generators(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(has_generators(item) for item in value)
+    return False
+
+
+def check_constant(value, name):
+    """
+    raise ValueError for {{generator}} placeholders in a value which is sent as it is
+    :param value: str, or dict & list of them
+    :param name: what the value is, told by the error
+    :return:
+    """
+    if has_generators(value):
+        raise ValueError('{{generator}} placeholders are not rendered in %s' % name)
+
+
+def check_generators(value):
+    """
+    raise ValueError for unknown generators early, before the value is compiled in the workers
+    :param value: str, or dict & list of them
+    :return:
+    """
+    if isinstance(value, str):
+        for match in PLACEHOLDER.finditer(value):
+            if match.group(1) not in GENERATORS:
+                raise ValueError('Unknown generator %s, expected one of %s'
+                                 % (match.group(1), ', '.join(sorted(GENERATORS))))
+    elif isinstance(value, dict):
+        [check_generators(item) for item in value.values()]
+    elif isinstance(value, (list, tuple)):
+        [check_generators(item) for item in value]
+
+
+def generator(name, args):
+    """
+    :param name: name of the generator
+    :param args: str arguments of the generator
+    :return: function of no arguments returning the next str value
+    """
+    if name not in GENERATORS:
+        raise ValueError('Unknown generator %s, expected one of %s' % (name, ', '.join(sorted(GENERATORS))))
+    try:
+        return GENERATORS[name](*args)
+    except TypeError:
+        raise ValueError('Wrong arguments of generator %s: %s' % (name, ' '.join(args)))
+
+
+def compile_text(text, escape=None, encoding=None):
+    """
+    compile a text with {{generator arg ...}} placeholders into a render function. the
+    constant fragments are split out (and encoded) once, rendering only calls the
+    generators and joins their values with the fragments
+    :param text:
+    :param escape: function applied to the values of the generators that may produce any character
+    :param encoding: render bytes of this encoding instead of str
+    :return: function of no arguments
+    """
+    parts, slots, position = [], [], 0
+    for match in PLACEHOLDER.finditer(text):
+        parts.append(text[position:match.start()])
+        name, generate = match.group(1), generator(match.group(1), match.group(2).split())
+        if escape is not None and name not in SAFE_GENERATORS:
+            generate = __compose(escape, generate)
+        if encoding is not None:
+            generate = __compose(lambda value: value.encode(encoding), generate)
+        slots.append((len(parts), generate))
+        parts.append(None)
+        position = match.end()
+    parts.append(text[position:])
+    if encoding is not None:
+        parts = [part.encode(encoding) if part is not None else None for part in parts]
+    join = (b'' if encoding is not None else '').join
+    if len(slots) == 0:
+        constant = join(parts)
+        return lambda: constant
+    if len(slots) == 1:
+        # the most common case needs neither the list nor the loop
+        prefix, suffix, generate = join(parts[:slots[0][0]]), join(parts[slots[0][0] + 1:]), slots[0][1]
+        return lambda: prefix + generate() + suffix
+
+    def render():
+        for index, generate in slots:
+            parts[index] = generate()
+        return join(parts)
+    return render
+
+
+def escape_url(value):
+    """
+    :param value: value of a generator put into a url
+    :return: the value quoted, slashes included
+    """
+    return quote(value, safe='')
+
+
+def compile_url(url):
+    """
+    :param url: url with placeholders in its path or query
+    :return: function of no arguments returning the url, values of any character are quoted
+    """
+    return compile_text(url, escape=escape_url)
+
+
+def compile_json(value, encoding='utf-8'):
+    """
+    :param value: json serializable value, placeholders may be in any str of it
+    :return: function of no arguments returning the json bytes
+    """
+    return compile_text(json.dumps(value), escape=lambda item: json.dumps(item)[1:-1], encoding=encoding)
+
+
+def compile_mapping(mapping):
+    """
+    :param mapping: dict of str values, some of which have placeholders, query arguments or headers
+    :return: function of no arguments returning a new dict, constant values are kept as they are
+    """
+    constants = {key: value for key, value in mapping.items() if not has_generators(value)}
+    templates = [(key, compile_text(value)) for key, value in mapping.items() if has_generators(value)]
+
+    def render():
+        values = dict(constants)
+        for key, generate in templates:
+            values[key] = generate()
+        return values
+    return render
+
+
+def compile_data(data, encode=False):
+    """
+    :param data: str, or dict of the json body or query arguments
+    :param encode: render bytes, json bytes for a dict, as they are sent as a body
+    :return: function of no arguments
+    """
+    if isinstance(data, str):
+        return compile_text(data, encoding='utf-8' if encode else None)
+    if encode:
+        return compile_json(data)
+    return compile_mapping(data)
+
+
+def __compose(outer, inner):
+    return lambda: outer(inner())
+
@@ -0,0 +1,24 @@
+import re
+from typing import Callable, Dict, List, Union
+
+PLACEHOLDER: re.Pattern
+GENERATORS: Dict[str, Callable[..., Callable[[], str]]]
+SAFE_GENERATORS: set
+
+def counter(start: str=0, step: str=1) -> Callable[[], str]: pass
+def random_range(low: str=0, high: str=2 ** 31 - 1) -> Callable[[], str]: pass
+def unique_id() -> Callable[[], str]: pass
+def choice(path: str) -> Callable[[], str]: pass
+def now(unit: str='s') -> Callable[[], str]: pass
+def has_generators(value: Union[str, Dict, List]) -> bool: pass
+def check_constant(value: Union[str, Dict, List], name: str) -> None: pass
+def check_generators(value: Union[str, Dict, List]) -> None: pass
+def generator(name: str, args: List[str]) -> Callable[[], str]: pass
+def compile_text(text: str, escape: Callable[[str], str]=None,
+                 encoding: str=None) -> Callable[[], Union[str, bytes]]: pass
+def escape_url(value: str) -> str: pass
+def compile_url(url: str) -> Callable[[], str]: pass
+def compile_json(value: Union[Dict, List], encoding: str='utf-8') -> Callable[[], bytes]: pass
+def compile_mapping(mapping: Dict[str, str]) -> Callable[[], Dict[str, str]]: pass
+def compile_data(data: Union[str, Dict], encode: bool=False) -> Callable[[], Union[str, bytes, Dict]]: pass
+def __compose(outer: Callable[[str], Union[str, bytes]], inner: Callable[[], str]) -> Callable[[], Union[str, bytes]]: pass
@@ -0,0 +1,123 @@
+import time
+from collections import deque
+
+from ..settings import THRESHOLD_WINDOW, THRESHOLD_PERCENTILE
+from ..util import readonly, Histogram
+
+
+class Thresholds:
+    """
+    declarative limits of a run, checked against the live counters of the
+    cluster over a sliding window, the run is aborted as soon as one is breached
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'error_rate', lambda: None)
+        readonly(inst, 'latency', lambda: None)
+        readonly(inst, 'percentile', lambda: None)
+        readonly(inst, 'min_qps', lambda: None)
+        readonly(inst, 'window', lambda: None)
+        return inst
+
+    def __init__(self, error_rate=None, latency=None, percentile=THRESHOLD_PERCENTILE, min_qps=None,
+                 window=THRESHOLD_WINDOW):
+        """
+        :param error_rate: max ratio (0 ~ 1) of the requests which are not a success
+        :param latency: max latency percentile (milliseconds)
+        :param percentile: the percentile checked against the latency, 0 ~ 100
+        :param min_qps: min successful requests per second of the whole cluster
+        :param window: seconds every threshold is checked over, nothing is checked before
+        the window is filled, the warmup excluded
+        """
+        if error_rate is None and latency is None and min_qps is None:
+            raise ValueError('no threshold is given')
+        if window <= 0:
+            raise ValueError('window should be positive')
+        readonly(self, 'error_rate', lambda: error_rate)
+        readonly(self, 'latency', lambda: latency)
+        readonly(self, 'percentile', lambda: percentile)
+        readonly(self, 'min_qps', lambda: min_qps)
+        readonly(self, 'window', lambda: window)
+
+    def check(self, total_request, success_request, histogram, seconds):
+        """
+        :param total_request: requests of the window
+        :param success_request: successful requests of the window
+        :param histogram: latency distribution of the window
+        :param seconds: length of the window
+        :return: description of the first breached threshold, None if none
+        """
+        if self.error_rate is not None and total_request > 0:
+            error_rate = 1 - success_request / total_request
+            if error_rate > self.error_rate:
+                return 'error rate %.2f%% > %.2f%%' % (error_rate * 100, self.error_rate * 100)
+        if self.latency is not None and total_request > 0:
+            latency = histogram.percentile(self.percentile)
+            if latency > self.latency:
+                return 'P%s latency %s ms > %s ms' % (self.percentile, latency, self.latency)
+        if self.min_qps is not None:
+            qps = success_request / seconds
+            if qps < self.min_qps:
+                return 'QPS %.1f < %s' % (qps, self.min_qps)
+        return None
+
+    def to_json(self):
+        return {'error_rate': self.error_rate, 'latency': self.latency, 'percentile': self.percentile,
+                'min_qps': self.min_qps, 'window': self.window}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(**data) if data is not None else None
+
+
+class ThresholdWatch:
+    """
+    check the thresholds of a round every time the live counters of the cluster
+    are observed, the counters are cumulative so the window is the difference
+    between the latest observation and the one a window ago
+    """
+    def __init__(self, thresholds, since=None):
+        """
+        :param thresholds: Thresholds
+        :param since: seconds (epoch) the round is measured from, the warmup is over then
+        """
+        self.__thresholds = thresholds
+        self.__since = since
+        self.__points = deque()
+        self.__breach = None
+        # properties
+        readonly(self, 'breach', lambda: self.__breach)
+
+    def observe(self, counters, now=None):
+        """
+        :param counters: live counters summed across the cluster, see merge_live
+        :param now: seconds (epoch) they are read at
+        :return: the breach, a dict of the threshold, the window and the time (milliseconds), None if none
+        """
+        if self.__breach is not None:
+            return self.__breach
+        now = now or time.time()
+        if self.__since is not None and now < self.__since:
+            return None
+        points, window = self.__points, self.__thresholds.window
+        points.append((now, counters))
+        # keep the latest observation at least a window old as the start of the window
+        while len(points) > 1 and now - points[1][0] >= window:
+            points.popleft()
+        start, base = points[0]
+        if now - start < window:
+            return None
+        histogram, previous = Histogram(), dict(base['histogram'])
+        for bucket, count in counters['histogram']:
+            count -= previous.get(bucket, 0)
+            if count > 0:
+                histogram.record(bucket, count)
+        description = self.__thresholds.check(counters['total_request'] - base['total_request'],
+                                              counters['success_request'] - base['success_request'],
+                                              histogram, now - start)
+        if description is not None:
+            self.__breach = {'threshold': description, 'window': round(now - start, 3), 'time': int(now * 1000)}
+        return self.__breach
@@ -0,0 +1,33 @@
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from ..settings import THRESHOLD_WINDOW, THRESHOLD_PERCENTILE
+from ..util import Histogram
+
+
+class Thresholds:
+    error_rate: Optional[float]
+    latency: Optional[int]
+    percentile: float
+    min_qps: Optional[float]
+    window: float
+
+    def __new__(cls, *args, **kwargs) -> Thresholds: pass
+    def __init__(self, error_rate: float=None, latency: int=None, percentile: float=THRESHOLD_PERCENTILE,
+                 min_qps: float=None, window: float=THRESHOLD_WINDOW): pass
+    def check(self, total_request: int, success_request: int, histogram: Histogram, seconds: float) -> Optional[str]: pass
+    def to_json(self) -> Dict: pass
+    @classmethod
+    def from_json(cls, data: Optional[Dict]) -> Optional[Thresholds]: pass
+
+
+class ThresholdWatch:
+    __thresholds: Thresholds
+    __since: Optional[float]
+    __points: deque[Tuple[float, Dict]]
+    __breach: Optional[Dict]
+
+    breach: Optional[Dict]
+
+    def __init__(self, thresholds: Thresholds, since: float=None): pass
+    def observe(self, counters: Dict, now: float=None) -> Optional[Dict]: pass
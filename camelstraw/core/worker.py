@@ -1,26 +1,40 @@
-from asyncio import get_event_loop, gather, sleep
+from asyncio import new_event_loop, set_event_loop, get_event_loop, ensure_future, gather, sleep, wait, \
+    FIRST_COMPLETED
 import multiprocessing
-import sys
-from multiprocessing import Process, cpu_count, Manager as ProcessManager
+import os
+import time
+from multiprocessing import Process, Manager as ProcessManager
 from queue import Empty
 from threading import Lock as ThreadLock
 from typing import List
 
 import dill
 
-from ..settings import WORKER_TIMEOUT, WORKER_CHECK_INTERVAL
+from ..settings import WORKER_TIMEOUT, WORKER_CHECK_INTERVAL, SAMPLE_DIR, WORKER_PINNING, CONTROL_CORES, \
+    RESERVOIR_SIZE
 from ..exception import WrongStatusException, WorkerExecuteException
+from .budget import RequestBudget
+from .limiter import RateLimiter
+from .live import LiveCounters
 from .job import JobManager, Job
+from .scenario import ScenarioJob
+from .replay import ReplayJob
+from .sockets import SocketJob
+from .monitor import HealthMonitor
+from .profiles import Profiler, profile_options
+from .reservoir import ResponseSampler
+from .samples import SampleWriter
 from .interfaces import IAnalysable, IManager, CoreStatus, AnalyseResult
 from ..task import RoundRobin, IDispatchable
-from ..util import uid, singleton, readonly
+from ..util import uid, readonly, usable_cpu_count, plan_cpus, pin_cpus
 
 
-def __try_stop_and_analyse(worker):
+def __try_stop_and_analyse(worker, issued=None):
     """
     try to stop a worker and analyse result, then report the result
     to manager by queue
     :param worker: 
+    :param issued: time (milliseconds) the round is issued by manager
     :return: 
     """
     # use lock to perform stop & analyse safely
@@ -29,82 +43,172 @@ def __try_stop_and_analyse(worker):
             # stop the worker
             worker.stop()
             worker.analyse()
+            # time from the round being issued to the first request loop running, which is
+            # where the warmup starts if the round warms up
+            if worker.result.warmup is not None:
+                started = [worker.result.warmup.start_time]
+            else:
+                started = [job.start_time for job in worker.jobs if job.status != CoreStatus.INIT]
+            startup = min(started) - issued if issued is not None and started else None
             # send compute result to worker manager
-            worker.queue.put(('result', worker.result.json_result))
+            worker.queue.put(('result', worker.result.json_result, startup))
         except WrongStatusException:
             pass
 
 
-async def __work_timeout(worker, timeout=None):
+async def __work_timeout(timeout=None):
     """
     worker's stop trigger for timeout mechanism
-    :param worker:
     :param timeout: seconds
     :return:
     """
     if timeout is None:
         timeout = WORKER_TIMEOUT
     if timeout <= 0:
-        timeout = sys.maxsize
-    timeout = int(timeout)
-    while timeout > 0 and worker.status == CoreStatus.STARTED:
-        # take a nap and check the worker status
-        await sleep(1)
-        timeout -= 1
-    __try_stop_and_analyse(worker)
+        # never times out, wait until the other triggers fire
+        await get_event_loop().create_future()
+    await sleep(timeout)
 
 
 async def __work_notice(worker):
     """
     worker's stop trigger for message queue mechanism
     :param worker:
-    :return:
+    :return: the command stopping the round if it's not a stop, which is left to serve
     """
-    interval = max(1, int(WORKER_CHECK_INTERVAL))
+    interval = WORKER_CHECK_INTERVAL
     while worker.status == CoreStatus.STARTED:
         try:
-            message = worker.queue.get_nowait()
+            message = worker.commands.get_nowait()
             if message[0] == 'stop':
                 # it's a stop command from manager, stop self
-                break
-            else:
-                # it's a result message from worker, put it back
-                worker.queue.put(message)
+                return None
+            # any other command ('exit' of a closing manager for example) means the manager
+            # is done with the round, stop self as well and keep the command for serve
+            return message
         except Empty:
             pass
         # wait several seconds and go on getting
         await sleep(interval)
-    __try_stop_and_analyse(worker)
+    return None
 
 
-async def __stop_work(worker, timeout=None):
+async def __stop_work(worker, timeout=None, budget=None, issued=None, monitor=None, profiler=None):
     """
-    all worker's stop triggers
+    all worker's stop triggers, the worker is stopped as soon as any of them fires
     :param worker:
     :param timeout: seconds
-    :return:
+    :param budget: RequestBudget of a request count bounded round
+    :param issued: time (milliseconds) the round is issued by manager
+    :param monitor: HealthMonitor sampling the worker until it's stopped
+    :param profiler: Profiler of the round, stopped before the worker is analysed
+    :return: the command received during the round which is left to serve, None if none
+    """
+    tasks = [
+        ensure_future(__work_notice(worker)),
+        ensure_future(__work_timeout(timeout)),
+    ]
+    if budget is not None:
+        tasks.append(ensure_future(budget.wait()))
+    # the monitor is not a stop trigger, it's cancelled together with them
+    health = [ensure_future(monitor.run(worker))] if monitor is not None else []
+    await wait(tasks, return_when=FIRST_COMPLETED)
+    notice = tasks[0]
+    pending = notice.result() if notice.done() and not notice.cancelled() else None
+    [task.cancel() for task in tasks + health]
+    if profiler is not None:
+        profiler.stop()
+    __try_stop_and_analyse(worker, issued)
+    return pending
+
+
+def __run_round(worker, timeout=None, issued=None, limiter=None, slot=None, measure_at=None):
+    """
+    run all jobs of the worker until it's stopped
+    :param worker:
+    :param timeout:
+    :param issued: time (milliseconds) the round is issued by manager
+    :param limiter: RateLimiter shared by the worker processes of the host
+    :param slot: LiveSlot of the process, read by the manager while the round is running
+    :param measure_at: time (milliseconds) the warmup ends at, the same for every worker of the
+    cluster, the round doesn't warm up if None
+    :return: the command received during the round which is left to serve, None if none
     """
-    tasks = (
-        __work_notice(worker),
-        __work_timeout(worker, timeout),
-    )
-    return gather(*tasks)
+    jobs = list(worker.jobs)
+    loop = new_event_loop()
+    set_event_loop(loop)
+    sample_writer = None
+    if worker.sample_path is not None:
+        sample_writer = SampleWriter(worker.sample_path, [job.name for job in jobs], warmup=measure_at is not None)
+        [job.record_samples(sample_writer, index) for index, job in enumerate(jobs)]
+    # replays stream only the share of the worker
+    [job.partition(worker.partitions) for job in jobs if isinstance(job, ReplayJob)]
+    # attached even if unlimited, the rate may be set while the round is running
+    if limiter is not None:
+        [job.throttle(limiter) for job in jobs]
+    if slot is not None:
+        [job.record_live(slot) for job in jobs]
+    if RESERVOIR_SIZE > 0:
+        sampler = ResponseSampler()
+        [job.record_responses(sampler) for job in jobs]
+        worker.watch_responses(sampler)
+    budget = None
+    if worker.requests is not None:
+        # the requests of the warmup are not taken from the budget
+        budget = RequestBudget(worker.requests, held=measure_at is not None)
+        [job.limit(budget) for job in jobs]
+    if measure_at is not None:
+        loop.call_later(max(0.0, measure_at / 1000 - time.time()), worker.end_warmup, budget, sample_writer)
+    monitor = HealthMonitor()
+    worker.watch(monitor)
+    profiler = None
+    if worker.profile is not None:
+        profiler = Profiler(**worker.profile)
+        worker.watch_profile(profiler)
+        profiler.start(loop)
+    tasks = [job.start() for job in jobs]
+    tasks.append(__stop_work(worker, timeout, budget, issued, monitor, profiler))
+    pending = loop.run_until_complete(gather(*tasks))[-1]
+    loop.close()
+    if sample_writer is not None:
+        sample_writer.close()
+    return pending
 
 
-def start_work(worker_bytes, timeout=None):
+def serve(index, queue, commands, cpu=None, limiter=None, live=None, timeout=None):
     """
-    :param worker_bytes
+    body of a pooled worker process, it's forked once and keeps alive
+    across runs: every run loads a new worker (job set) over the command
+    queue, and every round of the run is started by the manager
+    :param index: position of the process in the pool
+    :param queue: queue to report readiness and results
+    :param commands: command queue owned by the process
+    :param cpu: the cpu the process is pinned to
+    :param limiter: RateLimiter shared by the pooled processes
+    :param live: LiveCounters shared by the pooled processes, the process owns the slot of its index
     :param timeout:
     :return:
     """
     if multiprocessing.current_process().name == 'MainProcess':
         raise WorkerExecuteException('worker can only run at child process')
-    worker: Worker = dill.loads(worker_bytes)
-    tasks = [job.start() for job in worker.jobs]
-    tasks.append(__stop_work(worker, timeout))
-    loop = get_event_loop()
-    loop.run_until_complete(gather(*tasks))
-    loop.close()
+    if cpu is not None:
+        pin_cpus([cpu])
+    slot = live.slot(index) if live is not None else None
+    queue.put(('ready', index))
+    worker, pending = None, None
+    while True:
+        # a command which stopped the last round is handled before the queue
+        message, pending = pending or commands.get(), None
+        if message[0] == 'load':
+            worker = dill.loads(message[1])
+            worker.start()
+            pending = __run_round(worker, timeout, message[2], limiter, slot, message[3])
+        elif message[0] == 'start' and worker is not None:
+            worker = worker.renew(**(message[1] or {}))
+            pending = __run_round(worker, timeout, message[2], limiter, slot, message[3])
+        elif message[0] == 'exit':
+            return
+        # stop commands arriving after the round is finished are simply ignored
 
 
 class Worker(IAnalysable, IDispatchable):
@@ -121,56 +225,342 @@ class Worker(IAnalysable, IDispatchable):
         worker = super().__new__(cls)
         readonly(worker, 'lock', lambda: None)
         readonly(worker, 'queue', lambda: None)
+        readonly(worker, 'commands', lambda: None)
         readonly(worker, 'jobs', lambda: None)
         readonly(worker, 'job_num', lambda: None)
+        readonly(worker, 'sample_path', lambda: None)
+        readonly(worker, 'requests', lambda: None)
+        readonly(worker, 'partitions', lambda: None)
+        readonly(worker, 'profile', lambda: None)
         return worker
 
-    def __init__(self, queue, weight=1):
+    def __init__(self, queue, weight=1, sample_dir=None, commands=None, requests=None, profile=None):
         self.__job_manager = JobManager()
         super().__init__(uid(__class__.__name__), self.__job_manager)
         # the worker itself has an another lock for correctly perform stop & analyse action
         self.__lock = ThreadLock()
-        # all workers user the same queue to communicate with manager
+        # all workers user the same queue to report results to manager
         self.__queue = queue
+        # every worker owns a command queue, through which manager stops or starts its rounds
+        self.__commands = commands
         self.__weight = weight
+        self.__sample_dir = sample_dir
+        # number of requests every round sends, None means the round lasts until stopped
+        self.__requests = requests
+        # (index, total) of every level replays are split by, slaves then workers
+        self.__partitions = []
+        # health of the process running the worker, attached in the process
+        self.__monitor = None
+        # profiling options of every round, and the profiler of the running one
+        self.__profile = profile
+        self.__profiler = None
+        # reservoirs of the responses of the running round, and those of its warmup
+        self.__sampler = None
+        self.__warmup_sampler = None
+        # requests of the warmup, split off once it ends
+        self.__warmup = None
         # properties
         readonly(self, 'lock', lambda: self.__lock)
         readonly(self, 'queue', lambda: self.__queue)
+        readonly(self, 'commands', lambda: self.__commands)
         readonly(self, 'jobs', lambda: (job for job in self.__job_manager))
         readonly(self, 'job_num', lambda: len(list(self.__job_manager)))
+        # raw samples are recorded only if a directory is given
+        sample_path = os.path.join(sample_dir, '%s.bin' % self.id) if sample_dir else None
+        readonly(self, 'sample_path', lambda: sample_path)
+        readonly(self, 'requests', lambda: self.__requests)
+        readonly(self, 'partitions', lambda: list(self.__partitions))
+        readonly(self, 'profile', lambda: self.__profile)
 
-    def start(self):
-        super().start()
-        process = Process(target=start_work, args=(dill.dumps(self),))
-        process.start()
+    def renew(self, **kwargs):
+        """
+        create a started worker with fresh copies of the jobs for another round,
+        it's called inside the worker process which keeps running
+        :param kwargs: job arguments to override
+        :return: Worker
+        """
+        worker = Worker(queue=self.__queue, weight=self.__weight, sample_dir=self.__sample_dir,
+                        commands=self.__commands, requests=self.__requests, profile=self.__profile)
+        worker.partition(self.__partitions)
+        [worker.dispatch(job.clone(**kwargs)) for job in self.jobs]
+        worker.start()
+        return worker
 
     def dispatch(self, job):
-        if not isinstance(job, Job):
-            raise TypeError('Worker.dispatch only accept Job type')
+        if not isinstance(job, (Job, ScenarioJob, ReplayJob, SocketJob)):
+            raise TypeError('Worker.dispatch only accept Job, ScenarioJob, ReplayJob or SocketJob type')
         if self.status != CoreStatus.INIT:
             raise WrongStatusException('Worker can only be dispatched job at init status')
         self.__job_manager.add(job)
 
+    def limit(self, requests):
+        """
+        bound every round of the worker by a number of requests
+        :param requests:
+        :return:
+        """
+        if self.status != CoreStatus.INIT:
+            raise WrongStatusException('Worker can only be limited at init status')
+        self.__requests = requests
+
+    def partition(self, partitions):
+        """
+        let every replay of the worker stream only its share of the recorded requests
+        :param partitions: (index, total) of every level, slaves then workers
+        :return:
+        """
+        if self.status != CoreStatus.INIT:
+            raise WrongStatusException('Worker can only be partitioned at init status')
+        self.__partitions = [tuple(level) for level in partitions]
+
+    def watch(self, monitor):
+        """
+        attach the health monitor sampling the process which runs the worker
+        :param monitor: HealthMonitor
+        :return:
+        """
+        self.__monitor = monitor
+
+    def watch_profile(self, profiler):
+        """
+        attach the profiler of the process which runs the worker
+        :param profiler: Profiler
+        :return:
+        """
+        self.__profiler = profiler
+
+    def watch_responses(self, sampler):
+        """
+        attach the reservoirs the jobs offer their responses to
+        :param sampler: ResponseSampler
+        :return:
+        """
+        self.__sampler = sampler
+        self.__warmup_sampler = None
+
+    def end_warmup(self, budget=None, sample_writer=None):
+        """
+        split the requests of the warmup off the round, the round is measured from now on,
+        it's called in the worker process
+        :param budget: RequestBudget of the round, counted from now on
+        :param sample_writer: SampleWriter of the round, whose records are marked measured from now on
+        :return:
+        """
+        if self.status != CoreStatus.STARTED:
+            return
+        self.__warmup = self.split()
+        if budget is not None:
+            budget.open()
+        # the responses of the warmup are sampled apart as well
+        if self.__sampler is not None:
+            self.__warmup_sampler, self.__sampler = self.__sampler, ResponseSampler()
+            [job.record_responses(self.__sampler) for job in self.jobs]
+        if sample_writer is not None:
+            sample_writer.measure()
+
     def weight(self):
         return self.__weight
 
+    def _timing(self):
+        return AnalyseResult.merge_timing(job.result.timing for job in self.jobs)
+
+    def _tls(self):
+        return AnalyseResult.merge_tls(job.result.tls for job in self.jobs)
+
+    def _upload(self):
+        return AnalyseResult.merge_upload(job.result.upload for job in self.jobs)
+
+    def _warmup(self):
+        if self.__warmup is None or self.__warmup_sampler is None:
+            return self.__warmup
+        return AnalyseResult.from_json(dict(self.__warmup.json_data, reservoir=self.__warmup_sampler.to_json()))
+
+    def _reservoir(self):
+        if self.__sampler is None:
+            return None
+        return self.__sampler.to_json()
+
+    def _profile(self):
+        if self.__profiler is None:
+            return None
+        return self.__profiler.result
+
+    def _health(self):
+        if self.__monitor is None or self.__monitor.summary is None:
+            return None
+        return {self.id: self.__monitor.summary}
+
+    def _breakdown(self):
+        groups = {}
+        for job in self.jobs:
+            groups.setdefault(job.name, []).append(job.result)
+        return {name: AnalyseResult.from_results(name, results) for name, results in groups.items()}
+
 
-@singleton
 class WorkerManager(IManager):
     """
-    initialize workers and dispatch jobs for them
+    keep a pool of pre-forked worker processes and dispatch jobs for them,
+    the processes are kept alive across rounds and runs until the manager
+    is closed, so that a new run only ships its jobs to them
     """
-    def __init__(self, worker_num=cpu_count()):
+    def __init__(self, worker_num=None, run_id=None, requests=None, pinning=None, partition=None, rate=None,
+                 profile=None, warmup=None):
+        """
+        :param worker_num: size of the pool, the number of usable cpus by default
+        :param pinning: pin every pooled process to a dedicated cpu, and the manager itself
+        to the reserved control cpus, WORKER_PINNING by default
+        :param partition: (index, total) of the slave, replays are split across slaves then workers
+        :param rate: requests per second of all the workers together, unlimited by default
+        :param profile: profiling options of every worker, see profile_options
+        :param warmup: seconds every round warms up before it's measured
+        """
         super().__init__(uid(__class__.__name__))
         self.__balancer = RoundRobin()
-        self.__worker_num = min(max(worker_num or cpu_count(), 1), cpu_count() * 2)
-        # all workers communicate through this queue
-        self.__queue = ProcessManager().Queue(maxsize=self.__worker_num * 2)
+        # cpus are planned before pinning, pinned processes only see their own cpus
+        self.__usable_cpus = usable_cpu_count()
+        self.__cpus = None
+        if WORKER_PINNING if pinning is None else pinning:
+            self.__cpus = plan_cpus(CONTROL_CORES)
+            # the manager server process forked below inherits the control cpus too
+            pin_cpus(self.__cpus[0])
+        # created before forking so that every pooled process shares it
+        self.__limiter = RateLimiter()
+        # one slot of live counters for every process the pool may grow to
+        self.__live = LiveCounters(self.__usable_cpus * 2)
+        self.__process_manager = ProcessManager()
+        # all workers report readiness and results through this queue
+        self.__queue = self.__process_manager.Queue()
+        # pooled processes, every process owns a command queue
+        self.__processes = []
+        self.__commands = []
+        # milliseconds from forking to ready, per process
+        self.__ready = {}
+        # milliseconds from issuing the last round to its first request loop running, per worker
+        self.__startup = []
+        # latest health sample of every worker of the running round
+        self.__health = {}
+        # processes running the workers of the current run, whose live counters are read
+        self.__slots = []
+        self.__worker_num = 0
+        self.__run_id = None
+        self.__requests = None
+        self.__partition = None
+        self.__warmup = None
+        self.__sample_dir = None
         self.__result = None
-        [self.add(Worker(queue=self.__queue)) for _ in range(self.__worker_num)]
+        self.__running = False
+        # results are gathered either by stop or by waiting for the request budget to be used up
+        self.__lock = ThreadLock()
         # properties
+        readonly(self, 'run_id', lambda: self.__run_id)
+        readonly(self, 'requests', lambda: self.__requests)
+        readonly(self, 'sample_dir', lambda: self.__sample_dir)
+        readonly(self, 'warmup', lambda: self.__warmup)
         readonly(self, 'worker_num', lambda: self.__worker_num)
+        readonly(self, 'pool_size', lambda: len(self.__processes))
+        readonly(self, 'ready', lambda: dict(self.__ready))
+        readonly(self, 'startup', lambda: max(self.__startup) if self.__startup else None)
+        readonly(self, 'pinning', lambda: self.__pinning())
+        readonly(self, 'health', lambda: dict(self.__health))
+        readonly(self, 'rate', lambda: self.__limiter.rate)
+        readonly(self, 'granted', lambda: self.__limiter.granted)
+        readonly(self, 'live', lambda: self.__live.snapshot(self.__slots))
+        readonly(self, 'progress', lambda: self.__live.snapshot(self.__slots)['total'])
         readonly(self, 'result', lambda: self.__result)
+        readonly(self, 'running', lambda: self.__running)
+        self.reset(worker_num, run_id=run_id, requests=requests, partition=partition, rate=rate, profile=profile,
+                   warmup=warmup)
+
+    def __resize(self, size):
+        """
+        fork or release pooled processes, blocks until the forked ones are ready
+        :param size:
+        :return:
+        """
+        forked = {}
+        while len(self.__processes) < size:
+            index = len(self.__processes)
+            commands = self.__process_manager.Queue()
+            process = Process(target=serve, args=(index, self.__queue, commands, self.__cpu(index), self.__limiter,
+                                                  self.__live), daemon=True)
+            forked[index] = time.time()
+            process.start()
+            self.__processes.append(process)
+            self.__commands.append(commands)
+        while len(self.__processes) > size:
+            self.__commands.pop().put(('exit', None))
+            self.__processes.pop().join()
+            self.__ready.pop(len(self.__processes), None)
+        while len(forked) > 0:
+            message = self.__queue.get()
+            if message[0] == 'ready':
+                self.__ready[message[1]] = int((time.time() - forked.pop(message[1])) * 1000)
+
+    def __cpu(self, index):
+        """
+        cpu the pooled process is pinned to, None if not pinning
+        :param index:
+        :return:
+        """
+        if self.__cpus is None:
+            return None
+        return self.__cpus[1][index % len(self.__cpus[1])]
+
+    def __pinning(self):
+        """
+        placement of the processes, reported in run metadata
+        :return: None if not pinning
+        """
+        if self.__cpus is None:
+            return None
+        return {
+            'control': self.__cpus[0],
+            'workers': [self.__cpu(index) for index in range(len(self.__processes))],
+            # every worker owns a cpu shared with neither other workers nor control processes
+            'dedicated': len(self.__processes) <= len(self.__cpus[1]) and
+                         len(set(self.__cpus[0]) & set(self.__cpus[1])) == 0
+        }
+
+    def __pool_size(self, worker_num=None):
+        """
+        one process per usable cpu by default, cpus reserved for control
+        processes are excluded when pinning
+        :param worker_num:
+        :return:
+        """
+        default = self.__usable_cpus if self.__cpus is None else len(self.__cpus[1])
+        return min(max(worker_num or default, 1), self.__usable_cpus * 2)
+
+    def reset(self, worker_num=None, run_id=None, requests=None, partition=None, rate=None, profile=None,
+              warmup=None):
+        """
+        finish the running round and drop all the dispatched jobs, the pooled
+        processes are kept alive to run the jobs of the next run
+        :param worker_num: size of the pool, the current size is kept if None
+        :param run_id:
+        :param requests: total number of requests of every round, None means rounds last until stopped
+        :param partition: (index, total) of the slave, the whole stream of replays by default
+        :param rate: requests per second of all the workers together, unlimited by default
+        :param profile: profiling options of every worker, not profiled if None
+        :param warmup: seconds every round warms up, the requests of which are reported apart
+        :return:
+        """
+        self.stop()
+        self.throttle(rate)
+        if worker_num is not None or len(self.__processes) == 0:
+            self.__resize(self.__pool_size(worker_num))
+        self.__run_id = run_id
+        self.__requests = requests
+        self.__partition = tuple(partition or (0, 1))
+        self.__warmup = warmup or None
+        self.__sample_dir = os.path.join(SAMPLE_DIR, run_id or uid()) if SAMPLE_DIR else None
+        self._container = [Worker(queue=self.__queue, sample_dir=self.__sample_dir, commands=commands,
+                                  profile=profile_options(profile)) for commands in self.__commands]
+        self.__worker_num = len(self._container)
+        self.__slots = []
+        self.__startup = []
+        self.__health = {}
+        self.__result = None
 
     def dispatch(self, job, worker=None):
         if worker is None:
@@ -180,26 +570,117 @@ class WorkerManager(IManager):
         else:
             worker.dispatch(job.job())
 
-    def start(self):
-        # eliminate workers without any job and update associate field
+    def __measure_at(self, issued, measure_at=None):
+        """
+        time (milliseconds) the warmup of the round ends at
+        :param issued: time the round is issued
+        :param measure_at: the time given by the master, so that the whole cluster is measured
+        from the same moment
+        :return: None if the round doesn't warm up
+        """
+        if measure_at is not None:
+            return measure_at
+        if self.__warmup is None:
+            return None
+        return issued + int(self.__warmup * 1000)
+
+    def start(self, measure_at=None):
+        """
+        :param measure_at: time (milliseconds) the warmup ends at, warmup seconds after now by default
+        :return:
+        """
+        # eliminate workers without any job and update associate field, workers are
+        # created in the order of the pooled processes
+        self.__slots = [index for index, worker in enumerate(self) if worker.job_num > 0]
         self._container = [worker for worker in self if worker.job_num > 0]
         self.__worker_num = len(self._container)
-        # start all workers
-        [worker.start() for worker in self._container]
+        # split the request budget exactly across the workers
+        if self.requests is not None:
+            shares = RequestBudget.split(self.requests, self.__worker_num)
+            [worker.limit(share) for worker, share in zip(self, shares)]
+        [worker.partition([self.__partition, (index, self.__worker_num)]) for index, worker in enumerate(self)]
+        # ship the workers to the pooled processes owning their command queues, they are
+        # all serialized before the round is issued so that no worker waits for the others
+        payloads = [dill.dumps(worker) for worker in self._container]
+        # no process is running a round, so the slots can be zeroed by the manager
+        self.__live.reset(range(len(self.__processes)))
+        issued = int(time.time() * 1000)
+        measure_at = self.__measure_at(issued, measure_at)
+        for worker, payload in zip(self._container, payloads):
+            worker.commands.put(('load', payload, issued, measure_at))
+        self.__startup = []
+        self.__health = {}
+        self.__result = None
+        self.__running = True
+
+    def restart(self, measure_at=None, **kwargs):
+        """
+        finish the running round, whose result is merged as by stop but replaced by
+        that of the new round, and start another round of the same jobs in the alive
+        worker processes
+        :param measure_at: time (milliseconds) the warmup ends at, warmup seconds after now by default
+        :param kwargs: job arguments to override, concurrency for example
+        :return:
+        """
+        if self.__running:
+            self.stop()
+        self.__live.reset(range(len(self.__processes)))
+        issued = int(time.time() * 1000)
+        measure_at = self.__measure_at(issued, measure_at)
+        for worker in self:
+            worker.commands.put(('start', kwargs, issued, measure_at))
+        self.__startup = []
+        self.__health = {}
+        self.__result = None
+        self.__running = True
+
+    def wait(self):
+        """
+        block until every worker finishes the running round, which happens
+        once the request budget is used up or the manager is stopped
+        :return: AnalyseResult
+        """
+        with self.__lock:
+            if self.__running:
+                # gather results
+                tmp_results: List[AnalyseResult] = []
+                while len(tmp_results) < self.worker_num:
+                    message = self.__queue.get()
+                    if message[0] == 'result':
+                        tmp_results.append(AnalyseResult.from_json(message[1]))
+                        if message[2] is not None:
+                            self.__startup.append(message[2])
+                    # health samples are streamed while the round is running
+                    elif message[0] == 'health':
+                        self.__health[message[1]] = message[2]
+                # generate self result
+                self.__result = AnalyseResult.from_results(self.id, tmp_results)
+                self.__running = False
+        return self.__result
 
     def stop(self):
-        # send stop signals
-        for i in range(self.__worker_num):
-            self.__queue.put(('stop', None))
-        # gather results
-        tmp_results: List[AnalyseResult] = []
-        while len(tmp_results) < self.worker_num:
-            message = self.__queue.get()
-            # gather result message
-            if message[0] == 'result':
-                tmp_results.append(AnalyseResult.from_json(message[1]))
-            # put other messages back
-            else:
-                self.__queue.put(message)
-        # generate self result
-        self.__result = AnalyseResult.from_results(self.id, tmp_results)
+        if not self.__running:
+            return
+        # send stop signals, workers already finished their budget simply ignore them
+        for worker in self:
+            worker.commands.put(('stop', None))
+        self.wait()
+
+    def throttle(self, rate=None):
+        """
+        change the rate of all the workers together, it takes effect at once even
+        in the running round
+        :param rate: requests per second, None means unlimited
+        :return:
+        """
+        self.__limiter.set(rate)
+
+    def close(self):
+        """
+        stop the running round and let all pooled processes exit
+        :return:
+        """
+        self.stop()
+        self.__resize(0)
+        self.__limiter.close()
+        self.__live.close()
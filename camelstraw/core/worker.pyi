@@ -1,53 +1,145 @@
 import asyncio
-from multiprocessing import Queue, Lock, cpu_count
-from typing import TypeVar, Iterable
+from multiprocessing import Process, Queue, Lock
+from multiprocessing.managers import SyncManager
+from threading import Lock as ThreadLock
+from typing import TypeVar, Iterable, Dict, List, Optional, Tuple, Union
 
+from .budget import RequestBudget
+from .limiter import RateLimiter
+from .live import LiveCounters, LiveSlot
 from .job import Job, JobManager, JobContainer
+from .monitor import HealthMonitor
+from .profiles import Profiler
+from .reservoir import ResponseSampler
+from .samples import SampleWriter
+from .scenario import ScenarioJob
+from .replay import ReplayJob
+from .sockets import SocketJob
 from .interfaces import IAnalysable, IManager, AnalyseResult
 from ..task import IDispatchable, IBalancer
 JobType = TypeVar('JobType', Job, JobContainer)
 
 
-def __try_stop_and_analyse(worker: Worker) -> None: pass
-async def __work_timeout(worker: Worker, timeout: int) -> asyncio.coroutine: pass
-async def __work_notice(worker: Worker) -> asyncio.coroutine: pass
-async def __stop_work(worker: Worker, timeout: int) -> asyncio.Future: pass
-def start_work(worker_bytes: bytes, timeout: int) -> None: pass
+def __try_stop_and_analyse(worker: Worker, issued: int=None) -> None: pass
+async def __work_timeout(timeout: int=None) -> asyncio.coroutine: pass
+async def __work_notice(worker: Worker) -> Optional[Tuple]: pass
+async def __stop_work(worker: Worker, timeout: int=None, budget: RequestBudget=None,
+                      issued: int=None, monitor: HealthMonitor=None, profiler: Profiler=None) -> Optional[Tuple]: pass
+def __run_round(worker: Worker, timeout: int=None, issued: int=None, limiter: RateLimiter=None,
+                slot: LiveSlot=None, measure_at: int=None) -> Optional[Tuple]: pass
+def serve(index: int, queue: Queue, commands: Queue, cpu: int=None, limiter: RateLimiter=None,
+          live: LiveCounters=None, timeout: int=None) -> None: pass
 
 
 # noinspection PyMissingConstructor
 class Worker(IAnalysable, IDispatchable):
     __job_manager: JobManager
     __lock: Lock
-    # all workers user the same queue to communicate with manager
+    # all workers user the same queue to report results to manager
     __queue: Queue
+    # every worker owns a command queue
+    __commands: Queue
     __weight: int
+    __sample_dir: str
+    __requests: int
+    __partitions: List[Tuple[int, int]]
+    __monitor: HealthMonitor
+    __profile: Dict
+    __profiler: Profiler
+    __sampler: ResponseSampler
+    __warmup_sampler: Optional[ResponseSampler]
+    __warmup: Optional[AnalyseResult]
 
     lock: Lock
     queue: Queue
+    commands: Queue
     jobs: Iterable[Job]
     job_num: int
+    sample_path: str
+    requests: int
+    partitions: List[Tuple[int, int]]
+    profile: Optional[Dict]
     
-    def __init__(self, queue: Queue, weight: int=1): pass
+    def __init__(self, queue: Queue, weight: int=1, sample_dir: str=None, commands: Queue=None,
+                 requests: int=None, profile: Dict=None): pass
 
-    def start(self) -> None: pass
-    def dispatch(self, job: Job) -> None: pass
+    def renew(self, **kwargs) -> Worker: pass
+    def dispatch(self, job: Union[Job, ScenarioJob, ReplayJob, SocketJob]) -> None: pass
+    def limit(self, requests: int) -> None: pass
+    def partition(self, partitions: List[Tuple[int, int]]) -> None: pass
+    def watch(self, monitor: HealthMonitor) -> None: pass
+    def watch_profile(self, profiler: Profiler) -> None: pass
+    def watch_responses(self, sampler: ResponseSampler) -> None: pass
+    def end_warmup(self, budget: RequestBudget=None, sample_writer: SampleWriter=None) -> None: pass
     def weight(self) -> int: pass
+    def _breakdown(self) -> Dict[str, AnalyseResult]: pass
+    def _timing(self) -> Dict[str, Dict]: pass
+    def _tls(self) -> Dict[str, Dict]: pass
+    def _upload(self) -> Dict[str, Dict]: pass
+    def _health(self) -> Optional[Dict[str, Dict]]: pass
+    def _profile(self) -> Optional[Dict]: pass
+    def _warmup(self) -> Optional[AnalyseResult]: pass
+    def _reservoir(self) -> Optional[Dict]: pass
 
 
 # noinspection PyMissingConstructor
 class WorkerManager(IManager):
     __balancer: IBalancer
-    __worker_num: int
+    __limiter: RateLimiter
+    __live: LiveCounters
+    __process_manager: SyncManager
     __queue: Queue
+    __processes: List[Process]
+    __commands: List[Queue]
+    __ready: Dict[int, int]
+    __startup: List[int]
+    __health: Dict[str, Dict]
+    __slots: List[int]
+    __worker_num: int
+    __run_id: str
+    __requests: int
+    __partition: Tuple[int, int]
+    __warmup: Optional[float]
+    __sample_dir: str
     __result: AnalyseResult
+    __running: bool
+    __lock: ThreadLock
+    __usable_cpus: int
+    __cpus: Optional[Tuple[List[int], List[int]]]
 
+    run_id: str
+    requests: int
+    sample_dir: str
+    warmup: Optional[float]
     worker_num: int
+    pool_size: int
+    ready: Dict[int, int]
+    startup: Optional[int]
+    pinning: Optional[Dict]
+    health: Dict[str, Dict]
+    rate: Optional[float]
+    granted: int
+    live: Dict
+    progress: Dict
     result: AnalyseResult
+    running: bool
     
-    def __init__(self, worker_num: int=cpu_count()): pass
+    def __init__(self, worker_num: int=None, run_id: str=None, requests: int=None, pinning: bool=None,
+                 partition: Tuple[int, int]=None, rate: float=None, profile: Dict=None, warmup: float=None): pass
     def __iter__(self) -> Iterable[Worker]: pass
+    def __resize(self, size: int) -> None: pass
+    def __cpu(self, index: int) -> Optional[int]: pass
+    def __pinning(self) -> Optional[Dict]: pass
+    def __pool_size(self, worker_num: int=None) -> int: pass
+    def __measure_at(self, issued: int, measure_at: int=None) -> Optional[int]: pass
 
+    def reset(self, worker_num: int=None, run_id: str=None, requests: int=None,
+              partition: Tuple[int, int]=None, rate: float=None, profile: Dict=None,
+              warmup: float=None) -> None: pass
     def dispatch(self, job: JobContainer, worker: Worker=None) -> None: pass
-    def start(self) -> None: pass
+    def start(self, measure_at: int=None) -> None: pass
+    def restart(self, measure_at: int=None, **kwargs) -> None: pass
+    def wait(self) -> AnalyseResult: pass
     def stop(self) -> None: pass
+    def throttle(self, rate: float=None) -> None: pass
+    def close(self) -> None: pass
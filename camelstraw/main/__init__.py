@@ -1,2 +1,10 @@
-from .main import cmd_main, web_main
-from .launchers import ApiLauncher as Launcher
+from ..util.modules import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'cmd_main': '.main',
+    'web_main': '.main',
+    'compare_main': '.main',
+    'target_main': '.main',
+    'Launcher': '.launchers:ApiLauncher'
+})
+__all__ = ['cmd_main', 'web_main', 'compare_main', 'target_main', 'Launcher']
@@ -1,8 +1,13 @@
 import time
 from abc import ABCMeta, abstractmethod
+from threading import Event, Lock as ThreadLock, Thread
 
-from ..net import HttpMethod
-from ..core import JobContainer, Master, Slave
+from ..net import HttpMethod, get_host_ip
+from ..core import JobContainer, Master, DirectMaster, Slave
+from ..exception import WrongStatusException
+from ..settings import TEST_DURATION, RUN_STORE, SEARCH_PROBE_DURATION, SEARCH_PERCENTILE, SEARCH_ERROR_RATE, \
+    SEARCH_MAX_CONCURRENCY
+from ..store import RunStore
 from ..util import singleton, readonly
 
 
@@ -13,8 +18,16 @@ class BaseLauncher(metaclass=ABCMeta):
         pass
 
     @staticmethod
-    def launch_master(*jobs, worker_num=None):
-        master = Master(*jobs, worker_num=worker_num)
+    def launch_master(*jobs, worker_num=None, requests=None, rate=None, profile=None, warmup=None, thresholds=None,
+                      direct=False):
+        """
+        :param warmup: seconds the run warms up before it's measured
+        :param thresholds: Thresholds aborting the run once breached
+        :param direct: run the workers of this host in process, without the master service and the slaves
+        :return: Master, or DirectMaster if direct
+        """
+        master = (DirectMaster if direct else Master)(*jobs, worker_num=worker_num, requests=requests, rate=rate,
+                                                      profile=profile, warmup=warmup, thresholds=thresholds)
         master.start()
         return master
 
@@ -26,58 +39,381 @@ class BaseLauncher(metaclass=ABCMeta):
             return [slave]
         # TODO: implement left functions
 
+    @staticmethod
+    def finish(master, duration=None, requests=None, release=True):
+        """
+        run until the duration passes, the request budget is used up or a threshold
+        of the master is breached, then stop the cluster
+        :param master:
+        :param duration: seconds measured, the warmup of the master runs ahead of them
+        :param requests: total number of requests, prior to the duration
+        :param release: whether the slaves release their worker processes
+        :return: AnalyseResult
+        """
+        if requests is not None:
+            master.wait()
+            master.close(release)
+        else:
+            master.watch(duration + (master.warmup or 0))
+            master.stop(release)
+        return master.result
+
+    @staticmethod
+    def report_profiles(master):
+        """
+        write the profiles of a profiled run and print where they are
+        :param master:
+        :return: paths of the written files
+        """
+        if master.profile is None:
+            return []
+        paths = master.write_profiles()
+        for path in paths:
+            print('Profile: %s' % path)
+        return paths
+
+    @staticmethod
+    def save_run(master, result=None, slaves=None, **metadata):
+        """
+        save the finished run into the run store
+        :param master:
+        :param result: the result to save, the last result of master by default
+        :param slaves: slave results to save, the last slave results of master by default
+        :param metadata: extra run description
+        :return: id of the saved run, None if the run store is disabled
+        """
+        result = result or master.result
+        slaves = slaves if slaves is not None else master.slave_results
+        if RUN_STORE is None or result is None:
+            return None
+        metadata.update({
+            'host': get_host_ip(),
+            'run': master.run_id,
+            'jobs': ['%s %s' % (job.__class__.__name__, job.url) for job in master.jobs],
+            'worker_num': master.worker_num,
+            'startup': master.startup,
+            'pinning': master.pinning,
+            # the breached threshold if the run is aborted, it's rebuilt into the loaded result
+            'abort': result.abort
+        })
+        store = RunStore(RUN_STORE)
+        try:
+            return store.save(result, metadata=metadata, slaves=slaves)
+        finally:
+            store.close()
+
 
 @singleton
 class CmdLauncher(BaseLauncher):
 
-    def __init__(self, duration, worker_num, method, urls):
+    def __init__(self, duration, worker_num, method, urls, requests=None, rate=None, profile=None, warmup=None,
+                 thresholds=None):
         readonly(self, 'duration', lambda: duration)
+        readonly(self, 'profile', lambda: profile)
+        readonly(self, 'warmup', lambda: warmup)
+        readonly(self, 'thresholds', lambda: thresholds)
+        readonly(self, 'requests', lambda: requests)
+        readonly(self, 'rate', lambda: rate)
         readonly(self, 'worker_num', lambda: worker_num)
         readonly(self, 'method', lambda: method)
         readonly(self, 'urls', lambda: urls)
 
-    def launch(self, local_mode=True):
-        assert self.duration is not None and isinstance(self.duration, int)
+    def launch(self, local_mode=True, direct=False):
+        """
+        :param local_mode:
+        :param direct: run on this host only, in process, see DirectMaster
+        :return: AnalyseResult
+        """
+        assert isinstance(self.duration, int) or isinstance(self.requests, int)
         assert self.method is not None and isinstance(self.method, HttpMethod)
         assert len(self.urls) > 0 and all(isinstance(url, str) for url in self.urls)
 
         jobs = [JobContainer.from_url(url, self.method) for url in self.urls]
-        master = self.launch_master(*jobs, worker_num=self.worker_num)
-        self.launch_slaves(local_mode)
-        time.sleep(self.duration)
-        master.stop()
-        print(master.result)
+        master = self.launch_master(*jobs, worker_num=self.worker_num, requests=self.requests, rate=self.rate,
+                                    profile=self.profile, warmup=self.warmup, thresholds=self.thresholds,
+                                    direct=direct)
+        if not direct:
+            self.launch_slaves(local_mode)
+        result = self.finish(master, self.duration, self.requests)
+        print(result)
+        self.report_profiles(master)
+        self.save_run(master, launcher=self.__class__.__name__, duration=self.duration, requests=self.requests,
+                      rate=self.rate, warmup=self.warmup,
+                      thresholds=self.thresholds.to_json() if self.thresholds is not None else None)
+        return result
 
 
 @singleton
 class WebLauncher(BaseLauncher):
-
+    """
+    serve the dashboard, which starts and stops runs one at a time, shows the
+    live counters of the running run and browses the saved runs
+    """
     def __init__(self, host, port):
-        pass
+        self.__master = None
+        self.__stopping = Event()
+        # description of the running run, and the summary of the last finished one
+        self.__run = None
+        self.__finished = None
+        self.__lock = ThreadLock()
+        # properties
+        readonly(self, 'host', lambda: host)
+        readonly(self, 'port', lambda: port)
+        readonly(self, 'running', lambda: self.__master is not None)
+        readonly(self, 'run', lambda: self.__run)
+        readonly(self, 'finished', lambda: self.__finished)
 
-    def launch(self, *args, **kwargs):
-        pass
+    def launch(self, local_mode=True):
+        # imported here so that the command line tools don't load the dashboard
+        from ..web import Dashboard
+        Dashboard(self, self.host, self.port, local_mode=local_mode).start()
+
+    def start_run(self, urls, method=HttpMethod.GET, duration=TEST_DURATION, worker_num=None, rate=None,
+                  concurrency=1, local_mode=True):
+        """
+        start a run, which is stopped after the duration or by stop_run
+        :param urls:
+        :param method: HttpMethod
+        :param duration: seconds
+        :param worker_num:
+        :param rate: requests per second of the whole cluster, unlimited by default
+        :param concurrency: request loops per url per worker
+        :param local_mode:
+        :return: description of the run
+        """
+        assert isinstance(duration, int) and duration > 0
+        assert len(urls) > 0 and all(isinstance(url, str) for url in urls)
+        jobs = [JobContainer.from_url(url, method, concurrency) for url in urls]
+        with self.__lock:
+            if self.__master is not None:
+                raise WrongStatusException('a run is running already')
+            self.__stopping.clear()
+            self.__master = self.launch_master(*jobs, worker_num=worker_num, rate=rate)
+            self.__run = {
+                'run': self.__master.run_id,
+                'started': int(time.time() * 1000),
+                'urls': list(urls),
+                'method': method.phrase,
+                'duration': duration,
+                'worker_num': worker_num,
+                'rate': rate,
+                'concurrency': concurrency
+            }
+        self.launch_slaves(local_mode)
+        Thread(target=self.__finish_run, args=(self.__master, duration), daemon=True).start()
+        return self.__run
+
+    def stop_run(self):
+        """
+        stop the running run before its duration passes
+        :return:
+        """
+        self.__stopping.set()
+
+    def progress(self):
+        """
+        live counters of the running run
+        :return: None if no run is running
+        """
+        master = self.__master
+        return master.progress() if master is not None else None
+
+    def __finish_run(self, master, duration):
+        try:
+            self.__stopping.wait(duration)
+            master.stop()
+            result = master.result
+            run_id = self.save_run(master, launcher=self.__class__.__name__, duration=duration,
+                                   rate=self.__run['rate'])
+            self.__finished = dict(self.__run, id=run_id, stopped=int(time.time() * 1000),
+                                   total_request=result.total_request, success_request=result.success_request,
+                                   qps=result.qps, latency=result.latency, p50=result.histogram.percentile(50),
+                                   p90=result.histogram.percentile(90), p99=result.histogram.percentile(99),
+                                   errors=result.errors, statuses=result.statuses)
+        finally:
+            with self.__lock:
+                self.__master = None
+                self.__run = None
 
 
-@singleton
 class ApiLauncher(BaseLauncher):
 
-    def __init__(self, *jobs, duration, worker_num=None):
+    def __init__(self, *jobs, duration=None, worker_num=None, requests=None, rate=None, profile=None, warmup=None,
+                 thresholds=None):
+        """
+        :param duration: seconds the test lasts
+        :param requests: total number of requests split across all workers, the test
+        finishes as soon as they are sent instead of lasting the duration
+        :param rate: requests per second of the whole cluster, unlimited by default
+        :param profile: 'cprofile' or 'sample', or a dict of mode, window and interval, see profile_options
+        :param warmup: seconds run ahead of the duration, whose requests open the connections and are
+        reported apart instead of counted in the result
+        :param thresholds: Thresholds checked against the live counters, the test is aborted as soon as
+        one is breached, and the result tells which one and when
+        """
         self.__jobs = jobs
         # properties
         readonly(self, 'jobs', lambda: self.__jobs)
         readonly(self, 'duration', lambda: duration)
+        readonly(self, 'requests', lambda: requests)
+        readonly(self, 'rate', lambda: rate)
         readonly(self, 'worker_num', lambda: worker_num)
+        readonly(self, 'profile', lambda: profile)
+        readonly(self, 'warmup', lambda: warmup)
+        readonly(self, 'thresholds', lambda: thresholds)
 
     def dispatch(self, job):
         self.jobs.append(job)
 
-    def launch(self, local_mode=True):
-        assert self.duration is not None and isinstance(self.duration, int)
+    def launch(self, local_mode=True, keep_workers=False, direct=False):
+        """
+        :param local_mode:
+        :param keep_workers: keep the worker processes of the slaves warm, so that the
+        next launch in the session ships its jobs to them instead of forking new ones
+        :param direct: run on this host only, in process, without the master service and
+        the slaves, which starts much faster, see DirectMaster
+        :return: AnalyseResult
+        """
+        assert isinstance(self.duration, int) or isinstance(self.requests, int)
         assert len(self.jobs) > 0 and all(isinstance(job, JobContainer) for job in self.jobs)
 
-        master = self.launch_master(*self.jobs, worker_num=self.worker_num)
-        self.launch_slaves(local_mode)
-        time.sleep(self.duration)
-        master.stop()
-        print(master.result)
+        master = self.launch_master(*self.jobs, worker_num=self.worker_num, requests=self.requests, rate=self.rate,
+                                    profile=self.profile, warmup=self.warmup, thresholds=self.thresholds,
+                                    direct=direct)
+        if not direct:
+            self.launch_slaves(local_mode)
+        result = self.finish(master, self.duration, self.requests, release=not keep_workers)
+        print(result)
+        self.report_profiles(master)
+        self.save_run(master, launcher=self.__class__.__name__, duration=self.duration, requests=self.requests,
+                      rate=self.rate, warmup=self.warmup,
+                      thresholds=self.thresholds.to_json() if self.thresholds is not None else None)
+        return result
+
+
+class SearchLauncher(BaseLauncher):
+    """
+    search the highest throughput which keeps the latency percentile and
+    error rate within the slo, by running short probes of increasing
+    concurrency on the same alive cluster
+    """
+    def __init__(self, *jobs, latency, percentile=SEARCH_PERCENTILE, error_rate=SEARCH_ERROR_RATE,
+                 probe_duration=SEARCH_PROBE_DURATION, min_concurrency=1, max_concurrency=SEARCH_MAX_CONCURRENCY,
+                 precision=0.05, worker_num=None):
+        """
+        :param latency: slo of the latency percentile (milliseconds)
+        :param percentile: the checked percentile, 0 ~ 100
+        :param error_rate: max error rate, 0 ~ 1
+        :param probe_duration: seconds every probe lasts
+        :param min_concurrency: concurrency (per job per worker) of the first probe
+        :param max_concurrency: upper bound of the concurrency
+        :param precision: the search stops once the pass/fail bounds are this close (relative)
+        """
+        self.__jobs = list(jobs)
+        self.__probes = []
+        self.__best = None
+        # properties
+        readonly(self, 'jobs', lambda: self.__jobs)
+        readonly(self, 'latency', lambda: latency)
+        readonly(self, 'percentile', lambda: percentile)
+        readonly(self, 'error_rate', lambda: error_rate)
+        readonly(self, 'probe_duration', lambda: probe_duration)
+        readonly(self, 'min_concurrency', lambda: max(1, min_concurrency))
+        readonly(self, 'max_concurrency', lambda: max(1, max_concurrency))
+        readonly(self, 'precision', lambda: precision)
+        readonly(self, 'worker_num', lambda: worker_num)
+        # the probe curve, and the sustainable probe with the highest throughput
+        readonly(self, 'probes', lambda: self.__probes)
+        readonly(self, 'best', lambda: self.__best)
+
+    def dispatch(self, job):
+        self.jobs.append(job)
+
+    def launch(self, local_mode=True, direct=False):
+        """
+        :param local_mode:
+        :param direct: probe on this host only, in process, see DirectMaster
+        """
+        assert self.latency is not None and self.latency > 0
+        assert len(self.jobs) > 0 and all(isinstance(job, JobContainer) for job in self.jobs)
+
+        master = self.launch_master(*self.jobs, worker_num=self.worker_num, direct=direct)
+        if not direct:
+            self.launch_slaves(local_mode)
+        try:
+            self.__search(master)
+        finally:
+            master.close()
+        print(self.__report())
+        if self.best is not None:
+            self.save_run(master, result=self.best['result'], slaves=self.best['slaves'],
+                          launcher=self.__class__.__name__, duration=self.probe_duration,
+                          search=[{key: value for key, value in probe.items() if key not in ('result', 'slaves')}
+                                  for probe in self.probes])
+
+    def __search(self, master):
+        # ramp up exponentially until the slo is broken, then bisect between the last pass and the first fail
+        passed, failed = 0, None
+        concurrency = self.min_concurrency
+        while concurrency <= self.max_concurrency:
+            if not self.__probe(master, concurrency):
+                failed = concurrency
+                break
+            passed = concurrency
+            if concurrency == self.max_concurrency:
+                break
+            concurrency = min(concurrency * 2, self.max_concurrency)
+        if failed is None:
+            return
+        while failed - passed > max(1, int(passed * self.precision)):
+            concurrency = (passed + failed) // 2
+            if concurrency <= self.min_concurrency and passed == 0:
+                break
+            if self.__probe(master, concurrency):
+                passed = concurrency
+            else:
+                failed = concurrency
+
+    def __probe(self, master, concurrency):
+        """
+        run a probe with the given concurrency on the alive cluster
+        :return: whether the probe is within the slo
+        """
+        master.restart(concurrency=concurrency)
+        time.sleep(self.probe_duration)
+        result = master.collect()
+        latency = result.histogram.percentile(self.percentile)
+        error_rate = 1 - result.success_request / max(1, result.total_request)
+        sustainable = result.total_request > 0 and latency <= self.latency and error_rate <= self.error_rate
+        probe = {
+            'concurrency': concurrency,
+            'qps': result.qps,
+            'latency': latency,
+            'error_rate': error_rate,
+            'sustainable': sustainable,
+            'result': result,
+            'slaves': master.slave_results
+        }
+        self.__probes.append(probe)
+        print('Probe: concurrency %s, QPS %s, P%s %s ms, Error Rate %.2f%%, %s' % (
+            concurrency, result.qps, self.percentile, latency, error_rate * 100,
+            'sustainable' if sustainable else 'unsustainable'))
+        if sustainable and (self.__best is None or result.qps > self.__best['qps']):
+            self.__best = probe
+        return sustainable
+
+    def __report(self):
+        reprs = [
+            '=' * 128,
+            'SLO: P%s <= %s ms, Error Rate <= %.2f%%' % (self.percentile, self.latency, self.error_rate * 100),
+            'Probes: %s' % len(self.probes)]
+        for probe in sorted(self.probes, key=lambda p: p['concurrency']):
+            reprs.append('    concurrency %6s  QPS %8s  P%s %6s ms  Error Rate %6.2f%%  %s' % (
+                probe['concurrency'], probe['qps'], self.percentile, probe['latency'], probe['error_rate'] * 100,
+                'sustainable' if probe['sustainable'] else 'unsustainable'))
+        if self.best is None:
+            reprs.append('Max Sustainable QPS: none, even the lowest concurrency breaks the slo')
+        else:
+            reprs.append('Max Sustainable QPS: %s (concurrency %s)' % (self.best['qps'], self.best['concurrency']))
+        reprs.append('=' * 128)
+        return '\n'.join(reprs)
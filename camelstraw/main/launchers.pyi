@@ -1,35 +1,101 @@
 from abc import ABCMeta, abstractmethod
-from typing import List
+from threading import Event, Lock as ThreadLock
+from typing import Dict, List, Optional, Union
 
-from ..core import JobContainer, Master, Slave
+from ..core import JobContainer, Master, DirectMaster, Slave, Thresholds
+from ..core.interfaces import AnalyseResult
 from ..net import HttpMethod
+from ..settings import TEST_DURATION, SEARCH_PROBE_DURATION, SEARCH_PERCENTILE, SEARCH_ERROR_RATE, SEARCH_MAX_CONCURRENCY
 
 
 class BaseLauncher(metaclass=ABCMeta):
     @abstractmethod
     def launch(self, *args, **kwargs) -> None: pass
     @staticmethod
-    def launch_master(*jobs: JobContainer, worker_num: int=None) -> Master: pass
+    def launch_master(*jobs: JobContainer, worker_num: int=None, requests: int=None, rate: float=None,
+                      profile: Union[str, Dict]=None, warmup: float=None, thresholds: Thresholds=None,
+                      direct: bool=False) -> Union[Master, DirectMaster]: pass
     @staticmethod
     def launch_slaves(local_mode: bool=True) -> List[Slave]: pass
+    @staticmethod
+    def finish(master: Union[Master, DirectMaster], duration: int=None, requests: int=None, release: bool=True) -> AnalyseResult: pass
+    @staticmethod
+    def report_profiles(master: Union[Master, DirectMaster]) -> List[str]: pass
+    @staticmethod
+    def save_run(master: Union[Master, DirectMaster], result: AnalyseResult=None, slaves: Dict[str, AnalyseResult]=None,
+                 **metadata) -> Optional[int]: pass
 
 class CmdLauncher(BaseLauncher):
     duration: int
     worker_num: int
     method: HttpMethod
     urls: List[str]
-    def __init__(self, worker_num: int, duration: int, method: HttpMethod, urls: List[str]): pass
-    def launch(self, local_mode: bool=True) -> None: pass
+    requests: int
+    rate: float
+    profile: Union[str, Dict]
+    warmup: float
+    thresholds: Optional[Thresholds]
+    def __init__(self, worker_num: int, duration: int, method: HttpMethod, urls: List[str],
+                 requests: int=None, rate: float=None, profile: Union[str, Dict]=None, warmup: float=None,
+                 thresholds: Thresholds=None): pass
+    def launch(self, local_mode: bool=True, direct: bool=False) -> AnalyseResult: pass
 
 class WebLauncher(BaseLauncher):
-    def __init__(self, host: str, port: str): pass
-    def launch(self, *args, **kwargs) -> None: pass
+    __master: Optional[Master]
+    __stopping: Event
+    __run: Optional[Dict]
+    __finished: Optional[Dict]
+    __lock: ThreadLock
+    host: str
+    port: int
+    running: bool
+    run: Optional[Dict]
+    finished: Optional[Dict]
+    def __init__(self, host: str, port: int): pass
+    def launch(self, local_mode: bool=True) -> None: pass
+    def start_run(self, urls: List[str], method: HttpMethod=HttpMethod.GET, duration: int=TEST_DURATION,
+                  worker_num: int=None, rate: float=None, concurrency: int=1, local_mode: bool=True) -> Dict: pass
+    def stop_run(self) -> None: pass
+    def progress(self) -> Optional[Dict]: pass
+    def __finish_run(self, master: Master, duration: int) -> None: pass
 
 class ApiLauncher(BaseLauncher):
     __jobs: List[JobContainer]
     jobs: List[JobContainer]
     duration: int
     worker_num: int
-    def __init__(self, jobs: List[JobContainer], duration: int, worker_num: int=None): pass
+    requests: int
+    rate: float
+    profile: Union[str, Dict]
+    warmup: float
+    thresholds: Optional[Thresholds]
+    def __init__(self, *jobs: JobContainer, duration: int=None, worker_num: int=None, requests: int=None,
+                 rate: float=None, profile: Union[str, Dict]=None, warmup: float=None,
+                 thresholds: Thresholds=None): pass
     def dispatch(self, job: JobContainer) -> None: pass
-    def launch(self, local_mode: bool=True) -> None: pass
+    def launch(self, local_mode: bool=True, keep_workers: bool=False, direct: bool=False) -> AnalyseResult: pass
+
+class SearchLauncher(BaseLauncher):
+    __jobs: List[JobContainer]
+    __probes: List[Dict]
+    __best: Dict
+    jobs: List[JobContainer]
+    latency: int
+    percentile: float
+    error_rate: float
+    probe_duration: int
+    min_concurrency: int
+    max_concurrency: int
+    precision: float
+    worker_num: int
+    probes: List[Dict]
+    best: Dict
+    def __init__(self, *jobs: JobContainer, latency: int, percentile: float=SEARCH_PERCENTILE,
+                 error_rate: float=SEARCH_ERROR_RATE, probe_duration: int=SEARCH_PROBE_DURATION,
+                 min_concurrency: int=1, max_concurrency: int=SEARCH_MAX_CONCURRENCY, precision: float=0.05,
+                 worker_num: int=None): pass
+    def dispatch(self, job: JobContainer) -> None: pass
+    def launch(self, local_mode: bool=True, direct: bool=False) -> None: pass
+    def __search(self, master: Union[Master, DirectMaster]) -> None: pass
+    def __probe(self, master: Union[Master, DirectMaster], concurrency: int) -> bool: pass
+    def __report(self) -> str: pass
@@ -1,17 +1,22 @@
 import argparse
+import sys
 from multiprocessing import cpu_count
 
-from .launchers import CmdLauncher, WebLauncher
-from ..settings import TEST_DURATION
+from ..settings import TEST_DURATION, RUN_STORE, COMPARE_THRESHOLD, SEARCH_PROBE_DURATION, SEARCH_PERCENTILE, \
+    SEARCH_ERROR_RATE, SEARCH_MAX_CONCURRENCY, PROFILE_DIR, TARGET_PORT, TARGET_RESPONSE_SIZE, THRESHOLD_WINDOW, \
+    THRESHOLD_PERCENTILE
 from ..net import HttpMethod
+from ..store import RunStore, compare_results
+from ..util import TimeFormat
 
 
 def cmd_main():
     parser = argparse.ArgumentParser(description='CamelStraw command line tool.')
-    # though the default value None here, the real default value will be set to cpu_count() in WorkerManager
+    # though the default value None here, the real default value will be set to the number of usable cpus
+    # (respecting cpu affinity and cgroup quota) in WorkerManager
     parser.add_argument('-w', '--worker', metavar='WorkerNumber', dest='worker_num', action='store', nargs='?',
                         default=None, type=int, help='worker number, every worker owns a standalone process, '
-                                                     'default value is the number of your cpu.')
+                                                     'default value is the number of your usable cpus.')
     parser.add_argument('-t', '--timeout', metavar='Timeout', dest='duration', action='store', nargs='?',
                         default=TEST_DURATION, type=int, help='test duration (seconds), default value is 60.')
     parser.add_argument('-m', '--method', metavar='Method', dest='method', action='store', nargs='?',
@@ -23,18 +28,216 @@ def cmd_main():
                              'you should always provide arguments in url (just like a HttpGet request), for example '
                              '\'http://example.com?arg1=value1&arg2=value2\', when you use HttpPost method, the '
                              'arguments will be parsed to json format and sent to \'http://example.com\' as a payload.')
+    parser.add_argument('-n', '--requests', metavar='Requests', dest='requests', action='store', nargs='?',
+                        default=None, type=int, help='total number of requests split across all workers, the test '
+                                                     'finishes as soon as they are sent and the timeout is ignored.')
+    parser.add_argument('-r', '--rate', metavar='Rate', dest='rate', action='store', nargs='?',
+                        default=None, type=float, help='requests per second of all workers on all slaves together, '
+                                                       'unlimited by default.')
+    parser.add_argument('--profile', metavar='Profiler', dest='profile', action='store', nargs='?',
+                        default=None, choices=('cprofile', 'sample'),
+                        help='profile the worker processes with \'cprofile\' (every call, slower) or \'sample\' '
+                             '(stack sampling, cheap), the merged profile and that of every slave are written to '
+                             '%s.' % PROFILE_DIR)
+    parser.add_argument('--profile-window', metavar='Window', dest='profile_window', action='store', nargs='?',
+                        default=None, type=float, help='seconds profiled from the start of the test, the whole '
+                                                       'test by default.')
+    parser.add_argument('--warmup', metavar='Warmup', dest='warmup', action='store', nargs='?',
+                        default=None, type=float, help='seconds the test runs ahead of the timeout to open the '
+                                                       'connections and warm the target up, the requests sent '
+                                                       'meanwhile are reported apart instead of counted in.')
+    parser.add_argument('--direct', dest='direct', action='store_true', default=False,
+                        help='run on this host only, the workers are driven in process without the master and '
+                             'slave services, which starts much faster for quick runs and smoke tests.')
+    # thresholds aborting the test once breached, the exit status is 1 then
+    parser.add_argument('--abort-error-rate', metavar='ErrorRate', dest='abort_error_rate', action='store',
+                        nargs='?', default=None, type=float, help='abort the test once the error rate (0 ~ 1) of '
+                                                                  'the window exceeds this value.')
+    parser.add_argument('--abort-latency', metavar='Latency', dest='abort_latency', action='store', nargs='?',
+                        default=None, type=int, help='abort the test once the latency percentile of the window '
+                                                     'exceeds this value (milliseconds).')
+    parser.add_argument('--abort-percentile', metavar='Percentile', dest='abort_percentile', action='store',
+                        nargs='?', default=THRESHOLD_PERCENTILE, type=float,
+                        help='the latency percentile checked for aborting, default value is %s.'
+                             % THRESHOLD_PERCENTILE)
+    parser.add_argument('--abort-min-qps', metavar='QPS', dest='abort_min_qps', action='store', nargs='?',
+                        default=None, type=float, help='abort the test once the successful requests per second '
+                                                       'of the window fall below this value.')
+    parser.add_argument('--abort-window', metavar='Window', dest='abort_window', action='store', nargs='?',
+                        default=THRESHOLD_WINDOW, type=float,
+                        help='sliding window the abort thresholds are checked over (seconds), default value is '
+                             '%s.' % THRESHOLD_WINDOW)
+    # options of the max throughput search mode
+    parser.add_argument('--slo-latency', metavar='Latency', dest='slo_latency', action='store', nargs='?',
+                        default=None, type=int, help='search the max throughput whose latency percentile keeps '
+                                                     'within this value (milliseconds), the duration is ignored '
+                                                     'in this mode.')
+    parser.add_argument('--slo-percentile', metavar='Percentile', dest='slo_percentile', action='store', nargs='?',
+                        default=SEARCH_PERCENTILE, type=float, help='the latency percentile checked when searching, '
+                                                                    'default value is %s.' % SEARCH_PERCENTILE)
+    parser.add_argument('--slo-error-rate', metavar='ErrorRate', dest='slo_error_rate', action='store', nargs='?',
+                        default=SEARCH_ERROR_RATE, type=float, help='max error rate (0 ~ 1) when searching, '
+                                                                    'default value is %s.' % SEARCH_ERROR_RATE)
+    parser.add_argument('--probe', metavar='ProbeDuration', dest='probe_duration', action='store', nargs='?',
+                        default=SEARCH_PROBE_DURATION, type=int, help='duration of every probe when searching '
+                                                                      '(seconds), default value is %s.'
+                                                                      % SEARCH_PROBE_DURATION)
+    parser.add_argument('--max-concurrency', metavar='Concurrency', dest='max_concurrency', action='store',
+                        nargs='?', default=SEARCH_MAX_CONCURRENCY, type=int,
+                        help='max concurrency (per url per worker) when searching, default value is %s.'
+                             % SEARCH_MAX_CONCURRENCY)
     args = parser.parse_args()
-    launcher = CmdLauncher(duration=args.duration, worker_num=args.worker_num, method=args.method, urls=args.urls)
-    launcher.launch()
+    # the launchers load aiohttp & dill, they are imported once the arguments are valid
+    from .launchers import CmdLauncher, SearchLauncher
+    from ..core import JobContainer, Thresholds
+    method = HttpMethod.from_phrase(args.method)
+    urls = [url for group in args.urls for url in group]
+    if args.slo_latency is not None:
+        jobs = [JobContainer.from_url(url, method) for url in urls]
+        launcher = SearchLauncher(*jobs, latency=args.slo_latency, percentile=args.slo_percentile,
+                                  error_rate=args.slo_error_rate, probe_duration=args.probe_duration,
+                                  max_concurrency=args.max_concurrency, worker_num=args.worker_num)
+    else:
+        thresholds = None
+        if args.abort_error_rate is not None or args.abort_latency is not None or args.abort_min_qps is not None:
+            thresholds = Thresholds(error_rate=args.abort_error_rate, latency=args.abort_latency,
+                                    percentile=args.abort_percentile, min_qps=args.abort_min_qps,
+                                    window=args.abort_window)
+        launcher = CmdLauncher(duration=args.duration, worker_num=args.worker_num, method=method, urls=urls,
+                               requests=args.requests, rate=args.rate, warmup=args.warmup, thresholds=thresholds,
+                               profile=None if args.profile is None else {'mode': args.profile,
+                                                                          'window': args.profile_window})
+    result = launcher.launch(direct=args.direct)
+    # ci gates fail on an aborted test
+    if result is not None and result.abort is not None:
+        sys.exit(1)
 
 
 def web_main():
-    parser = argparse.ArgumentParser(description='CamelStraw web interface tool.')
+    # -h is taken by the host, so the help is only offered as --help
+    parser = argparse.ArgumentParser(description='CamelStraw web interface tool.', add_help=False)
+    parser.add_argument('--help', action='help', help='show this help message and exit.')
     parser.add_argument('-h', '--host', metavar='Host', dest='host', action='store', nargs='?',
                         default='127.0.0.1', type=str, help='the host serves the web interface, '
                                                             'default value is \'127.0.0.1\'.')
     parser.add_argument('-p', '--port', metavar='Port', dest='port', action='store', nargs='?',
                         default=4869, type=int, help='the port the web service listens to, default value is 4869.')
     args = parser.parse_args()
+    from .launchers import WebLauncher
     launcher = WebLauncher(host=args.host, port=args.port)
     launcher.launch()
+
+
+def target_main():
+    # -h is taken by the host, so the help is only offered as --help
+    parser = argparse.ArgumentParser(description='CamelStraw mock target, a multi-process server standing in for '
+                                                 'the tested service.', add_help=False)
+    parser.add_argument('--help', action='help', help='show this help message and exit.')
+    parser.add_argument('-h', '--host', metavar='Host', dest='host', action='store', nargs='?',
+                        default='0.0.0.0', type=str, help='the host the target listens to, default value is '
+                                                          '\'0.0.0.0\'.')
+    parser.add_argument('-p', '--port', metavar='Port', dest='port', action='store', nargs='?',
+                        default=TARGET_PORT, type=int, help='the port the target listens to, default value is %s.'
+                                                            % TARGET_PORT)
+    parser.add_argument('-w', '--processes', metavar='Processes', dest='processes', action='store', nargs='?',
+                        default=None, type=int, help='number of processes sharing the port, default value is the '
+                                                     'number of your usable cpus.')
+    parser.add_argument('-s', '--size', metavar='Size', dest='size', action='store', nargs='?',
+                        default=TARGET_RESPONSE_SIZE, type=int, help='bytes of every response, default value is %s.'
+                                                                     % TARGET_RESPONSE_SIZE)
+    parser.add_argument('-l', '--latency', metavar='Latency', dest='latency', action='store', nargs='?',
+                        default=0, type=float, help='mean latency injected before responding (milliseconds), '
+                                                    'none by default.')
+    parser.add_argument('-d', '--distribution', metavar='Distribution', dest='distribution', action='store',
+                        nargs='?', default='fixed', choices=('fixed', 'uniform', 'exponential', 'pareto'),
+                        help='distribution of the injected latency, one of \'fixed\', \'uniform\', '
+                             '\'exponential\' or \'pareto\', default value is \'fixed\'.')
+    parser.add_argument('-e', '--error-rate', metavar='ErrorRate', dest='error_rate', action='store', nargs='?',
+                        default=0, type=float, help='fraction (0 ~ 1) of the requests failed by 500, or of the '
+                                                    'websocket messages failed by closing with 1011.')
+    parser.add_argument('-c', '--close-rate', metavar='CloseRate', dest='close_rate', action='store', nargs='?',
+                        default=0, type=float, help='fraction (0 ~ 1) of the responses closing their connections.')
+    parser.add_argument('-r', '--read-rate', metavar='ReadRate', dest='read_rate', action='store', nargs='?',
+                        default=None, type=float, help='bytes per second request bodies are read at, unlimited '
+                                                       'by default.')
+    args = parser.parse_args()
+    from ..target import MockTarget
+    MockTarget(host=args.host, port=args.port, processes=args.processes, size=args.size, latency=args.latency,
+               distribution=args.distribution, error_rate=args.error_rate, close_rate=args.close_rate,
+               read_rate=args.read_rate).run()
+
+
+def __print_runs(store, limit):
+    print('%-6s %-20s %-24s %12s %10s %8s %8s %8s' % ('Id', 'Created', 'Launcher', 'Request', 'QPS',
+                                                     'P50', 'P90', 'P99'))
+    for run in store.runs(limit):
+        print('%-6s %-20s %-24s %12s %10s %8s %8s %8s' % (
+            run['id'], TimeFormat.from_millisecond(run['created']), run['metadata'].get('launcher', '-'),
+            '%s/%s' % (run['success_request'], run['total_request']), run['qps'],
+            run['p50'], run['p90'], run['p99']))
+
+
+def __print_run(store, run_id):
+    run = store.load(run_id)
+    if run is None:
+        print('run %s does not exist.' % run_id)
+        return 1
+    print('Run: %s (%s)' % (run.id, TimeFormat.from_millisecond(run.created)))
+    for key, value in sorted(run.metadata.items()):
+        # the abort is shown with the result
+        if key != 'abort':
+            print('%s: %s' % (key, value))
+    print(run.result)
+    for name, job in sorted(run.result.jobs.items()):
+        print(job)
+    for slave, result in sorted(run.slaves.items()):
+        print(result)
+    return 0
+
+
+def __print_diff(store, baseline_id, candidate_id, threshold):
+    baseline, candidate = store.load(baseline_id), store.load(candidate_id)
+    for run_id, run in ((baseline_id, baseline), (candidate_id, candidate)):
+        if run is None:
+            print('run %s does not exist.' % run_id)
+            return 1
+    rows = compare_results(baseline.result, candidate.result, threshold)
+    print('%-48s %-14s %12s %12s %10s  %s' % ('Scope', 'Metric', 'Baseline', 'Candidate', 'Change', 'Flag'))
+    for row in rows:
+        print('%-48s %-14s %12.2f %12.2f %9.2f%%  %s' % (row['scope'][:48], row['metric'], row['baseline'],
+                                                         row['candidate'], row['change'], row['flag']))
+    # non-zero exit code makes regressions visible to scripts
+    return 1 if any(row['flag'] == 'regressed' for row in rows) else 0
+
+
+def compare_main():
+    parser = argparse.ArgumentParser(description='CamelStraw run store tool, list, show and compare saved runs.')
+    parser.add_argument('-s', '--store', metavar='Store', dest='store', action='store', nargs='?',
+                        default=RUN_STORE, type=str, help='path of the run store, default value is \'%s\'.'
+                                                          % RUN_STORE)
+    commands = parser.add_subparsers(dest='command')
+    command = commands.add_parser('list', help='list saved runs, newest first.')
+    command.add_argument('-n', '--limit', metavar='Limit', dest='limit', action='store', nargs='?',
+                         default=20, type=int, help='max number of runs to list, default value is 20.')
+    command = commands.add_parser('show', help='show a saved run with job and slave breakdowns.')
+    command.add_argument('run_id', metavar='RunId', type=int, help='id of the run.')
+    command = commands.add_parser('diff', help='compare a candidate run against a baseline run, exits with 1 '
+                                               'when any regression is flagged.')
+    command.add_argument('baseline', metavar='Baseline', type=int, help='id of the baseline run.')
+    command.add_argument('candidate', metavar='Candidate', type=int, help='id of the candidate run.')
+    command.add_argument('-t', '--threshold', metavar='Threshold', dest='threshold', action='store', nargs='?',
+                         default=COMPARE_THRESHOLD, type=float, help='relative change (percent) to be flagged, '
+                                                                     'default value is %s.' % COMPARE_THRESHOLD)
+    args = parser.parse_args()
+    store = RunStore(args.store)
+    try:
+        if args.command == 'show':
+            code = __print_run(store, args.run_id)
+        elif args.command == 'diff':
+            code = __print_diff(store, args.baseline, args.candidate, args.threshold)
+        else:
+            __print_runs(store, getattr(args, 'limit', 20))
+            code = 0
+    finally:
+        store.close()
+    sys.exit(code)
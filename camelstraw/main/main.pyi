@@ -1,2 +1,11 @@
+from typing import Optional
+
+from ..store import RunStore
+
 def cmd_main() -> None: pass
 def web_main() -> None: pass
+def target_main() -> None: pass
+def __print_runs(store: RunStore, limit: Optional[int]) -> None: pass
+def __print_run(store: RunStore, run_id: int) -> int: pass
+def __print_diff(store: RunStore, baseline_id: int, candidate_id: int, threshold: float) -> int: pass
+def compare_main() -> None: pass
@@ -1,3 +1,17 @@
-from .protocols import Protocol
-from .methods import HttpMethod
-from .ip import get_host_ip
+from ..util.modules import lazy_exports
+
+# errors and connections need aiohttp, the others don't
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Protocol': '.protocols',
+    'HttpMethod': '.methods',
+    'ErrorType': '.errors',
+    'is_success': '.errors',
+    'get_host_ip': '.ip',
+    'ws_connect': '.connections',
+    'TlsOptions': '.tls',
+    'Delimiter': '.framing',
+    'FixedLength': '.framing',
+    'FilePayload': '.uploads'
+})
+__all__ = ['Protocol', 'HttpMethod', 'ErrorType', 'is_success', 'get_host_ip', 'ws_connect', 'TlsOptions',
+           'Delimiter', 'FixedLength', 'FilePayload']
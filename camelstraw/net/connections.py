@@ -0,0 +1,21 @@
+from asyncio import sleep
+
+from aiohttp import ClientConnectorError
+
+
+async def ws_connect(client, url, retry=1, interval=1):
+    """
+    connect a websocket, retrying while the server is still starting up, messages
+    of any size are accepted since they carry whole results
+    :param client: aiohttp ClientSession
+    :param url:
+    :param retry: times of connecting before giving up
+    :param interval: seconds between two connections
+    :return: ClientWebSocketResponse
+    """
+    for _ in range(retry - 1):
+        try:
+            return await client.ws_connect(url, max_msg_size=0)
+        except ClientConnectorError:
+            await sleep(interval)
+    return await client.ws_connect(url, max_msg_size=0)
@@ -0,0 +1,4 @@
+from aiohttp import ClientSession, ClientWebSocketResponse
+
+
+async def ws_connect(client: ClientSession, url: str, retry: int=1, interval: float=1) -> ClientWebSocketResponse: pass
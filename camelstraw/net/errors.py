@@ -0,0 +1,68 @@
+import asyncio
+import errno
+import ssl
+from enum import IntEnum
+
+from aiohttp import ClientConnectorError, ClientOSError, ClientPayloadError, ClientResponseError, ClientSSLError, \
+    ServerDisconnectedError, ServerTimeoutError
+from aiohttp.http_exceptions import HttpProcessingError
+
+
+class ErrorType(IntEnum):
+
+    def __new__(cls, value, phrase, description=''):
+        # noinspection PyArgumentList
+        obj: int = int.__new__(cls, value)
+        obj._value_ = value
+
+        obj.phrase = phrase
+        obj.description = description
+        return obj
+
+    @classmethod
+    def from_exception(cls, exc):
+        """
+        classify an exception raised while sending a request or waiting for its response
+        :param exc:
+        :return:
+        """
+        # ssl errors are connector errors as well, so check them first
+        if isinstance(exc, (ssl.SSLError, ClientSSLError)):
+            return ErrorType.TLS
+        if isinstance(exc, (asyncio.TimeoutError, ServerTimeoutError)):
+            return ErrorType.TIMEOUT
+        if isinstance(exc, (ClientConnectorError, ConnectionRefusedError)):
+            return ErrorType.CONNECT
+        if isinstance(exc, (ServerDisconnectedError, ConnectionResetError, ConnectionAbortedError, BrokenPipeError,
+                            asyncio.IncompleteReadError)):
+            return ErrorType.RESET
+        if isinstance(exc, ClientOSError) and exc.errno in (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE):
+            return ErrorType.RESET
+        if isinstance(exc, (HttpProcessingError, ClientResponseError, ClientPayloadError)):
+            return ErrorType.PROTOCOL
+        return ErrorType.OTHER
+
+    @classmethod
+    def from_phrase(cls, phrase):
+        for error in cls:
+            if error.phrase == phrase:
+                return error
+        return ErrorType.OTHER
+
+    CONNECT = 100, 'ConnectError', 'connection refused or host unreachable'
+    TIMEOUT = 101, 'Timeout', 'no response in time'
+    RESET = 102, 'ConnectionReset', 'connection reset or closed by peer'
+    TLS = 103, 'TlsError', 'tls handshake or certificate failure'
+    PROTOCOL = 104, 'ProtocolError', 'malformed or unexpected response'
+    OTHER = 105, 'OtherError'
+    EXTRACT = 106, 'ExtractError', 'value to extract for the following requests is missing'
+
+
+def is_success(status_code):
+    """
+    default success predicate, every 2xx status code is a success,
+    it works for numpy arrays of status codes as well
+    :param status_code:
+    :return:
+    """
+    return (status_code >= 200) & (status_code < 300)
@@ -0,0 +1,23 @@
+from enum import IntEnum
+
+
+class ErrorType(IntEnum):
+    value: int
+    phrase: str
+    description: str
+
+    CONNECT: ErrorType
+    TIMEOUT: ErrorType
+    RESET: ErrorType
+    TLS: ErrorType
+    PROTOCOL: ErrorType
+    OTHER: ErrorType
+    EXTRACT: ErrorType
+    def __new__(cls, value: int, phrase: str, description: str=''): pass
+    @classmethod
+    def from_exception(cls, exc: BaseException) -> ErrorType: pass
+    @classmethod
+    def from_phrase(cls, phrase: str) -> ErrorType: pass
+
+
+def is_success(status_code: int) -> bool: pass
@@ -0,0 +1,39 @@
+class Delimiter:
+    """
+    responses ended by a delimiter, '\r\n' of a redis-like protocol for example
+    """
+    def __init__(self, delimiter):
+        self.__delimiter = delimiter.encode() if isinstance(delimiter, str) else bytes(delimiter)
+
+    def __call__(self, buffer):
+        index = buffer.find(self.__delimiter)
+        return None if index < 0 else index + len(self.__delimiter)
+
+
+class FixedLength:
+    """
+    responses of a fixed number of bytes
+    """
+    def __init__(self, length):
+        if length <= 0:
+            raise ValueError('length of a response should be positive')
+        self.__length = length
+
+    def __call__(self, buffer):
+        return self.__length if len(buffer) >= self.__length else None
+
+
+def framing(value):
+    """
+    normalize how responses are told apart in a stream of bytes
+    :param value: delimiter (str or bytes), fixed length (int), or a callable of the bytes
+    received so far returning the length of the first response, None until it's complete
+    :return: callable, None if no response is expected
+    """
+    if value is None or callable(value):
+        return value
+    if isinstance(value, int):
+        return FixedLength(value)
+    if isinstance(value, (str, bytes)):
+        return Delimiter(value)
+    raise TypeError('framing should be a delimiter, a length or a callable, got %s' % type(value).__name__)
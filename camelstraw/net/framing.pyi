@@ -0,0 +1,18 @@
+from typing import Callable, Optional, Union
+
+FramingType = Callable[[bytearray], Optional[int]]
+
+
+class Delimiter:
+    __delimiter: bytes
+    def __init__(self, delimiter: Union[str, bytes]): pass
+    def __call__(self, buffer: bytearray) -> Optional[int]: pass
+
+
+class FixedLength:
+    __length: int
+    def __init__(self, length: int): pass
+    def __call__(self, buffer: bytearray) -> Optional[int]: pass
+
+
+def framing(value: Union[str, bytes, int, FramingType, None]) -> Optional[FramingType]: pass
@@ -1,10 +1,45 @@
 import socket
 from functools import lru_cache
 
+from ..settings import HOST_IP, MASTER, MASTER_PORT
+
+LOOPBACK = '127.0.0.1'
+
+
+def __route_ip(target):
+    """
+    local address of the interface routing to the target, connecting an udp socket
+    only looks the route up, no packet is sent
+    :param target:
+    :return: None if there's no route
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as skt:
+            skt.connect((target, MASTER_PORT))
+            return skt.getsockname()[0]
+    except OSError:
+        return None
+
+
+def __name_ip():
+    """
+    address the host name resolves to, from the hosts file on most machines
+    :return: None if it's not resolved or only resolved to loopback
+    """
+    try:
+        ips = socket.gethostbyname_ex(socket.gethostname())[2]
+    except OSError:
+        return None
+    return next((ip for ip in ips if not ip.startswith('127.')), None)
+
 
 @lru_cache()
 def get_host_ip():
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as skt:
-        skt.connect(('8.8.8.8', 80))
-        ip = skt.getsockname()[0]
-        return ip
+    """
+    identity of this machine, it never depends on any route outside the cluster
+    :return: HOST_IP if configured, otherwise the address routing to the master,
+    the address of the host name, or loopback
+    """
+    if HOST_IP:
+        return HOST_IP
+    return __route_ip(MASTER) or __name_ip() or LOOPBACK
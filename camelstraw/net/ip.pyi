@@ -1 +1,8 @@
+from typing import Optional
+
+LOOPBACK: str
+
+
+def __route_ip(target: str) -> Optional[str]: pass
+def __name_ip() -> Optional[str]: pass
 def get_host_ip() -> str: pass
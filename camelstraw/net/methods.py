@@ -12,6 +12,36 @@ class HttpMethod(IntEnum):
         obj.description = description
         return obj
 
+    @classmethod
+    def from_phrase(cls, phrase):
+        for method in cls:
+            if method.phrase == phrase:
+                return method
+        raise ValueError('unknown http method %s' % phrase)
+
+    @classmethod
+    def from_verb(cls, verb):
+        """
+        :param verb: method of a request line, 'GET' for example
+        :return:
+        """
+        for method in cls:
+            if method.name == verb.upper():
+                return method
+        raise ValueError('unknown http method %s' % verb)
+
+    @property
+    def verb(self):
+        return self.name
+
+    @property
+    def sends_body(self):
+        """
+        whether the data of the method is sent as a body rather than query arguments
+        :return:
+        """
+        return self in (HttpMethod.POST, HttpMethod.PUT, HttpMethod.PATCH)
+
     GET = 100, 'HttpGet'
     POST = 101, 'HttpPost'
     PUT = 103, 'HttpPut'
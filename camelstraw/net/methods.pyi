@@ -13,4 +13,11 @@ class HttpMethod(IntEnum):
     DELETE: HttpMethod
     HEAD: HttpMethod
     OPTIONS: HttpMethod
+
+    verb: str
+    sends_body: bool
     def __new__(cls, value: int, phrase: str, description: str=''): pass
+    @classmethod
+    def from_phrase(cls, phrase: str) -> HttpMethod: pass
+    @classmethod
+    def from_verb(cls, verb: str) -> HttpMethod: pass
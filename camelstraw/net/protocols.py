@@ -15,8 +15,10 @@ class Protocol(IntEnum):
 
     @classmethod
     def from_url(cls, url):
-        for protocol in [Protocol.HTTP, Protocol.HTTPS, Protocol.WS, Protocol.WSS]:
-            if protocol.prefix in url:
+        # compare the whole scheme, http is a prefix of https as ws is of wss
+        scheme = url.split('://', 1)[0].lower()
+        for protocol in [Protocol.HTTP, Protocol.HTTPS, Protocol.WS, Protocol.WSS, Protocol.TCP, Protocol.UDP]:
+            if protocol.prefix == scheme:
                 return protocol
         return Protocol.HTTP
 
@@ -24,3 +26,5 @@ class Protocol(IntEnum):
     HTTPS = 101, 'Http-Safe', 'https'
     WS = 102, 'Websocket', 'ws'
     WSS = 103, 'Websocket-Safe', 'wss'
+    TCP = 104, 'Tcp', 'tcp'
+    UDP = 105, 'Udp', 'udp'
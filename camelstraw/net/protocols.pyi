@@ -6,6 +6,8 @@ class Protocol(IntEnum):
     HTTPS: Protocol
     WS: Protocol
     WSS: Protocol
+    TCP: Protocol
+    UDP: Protocol
     def __new__(cls, value: int, phrase: str, prefix: str='', description: str=''): pass
     @classmethod
     def from_url(cls, url) -> Protocol: pass
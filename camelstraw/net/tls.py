@@ -0,0 +1,137 @@
+import ssl
+import time
+
+from ..util import readonly
+
+# tls versions accepted by TlsOptions, keyed by their phrases
+TLS_VERSIONS = {
+    'TLSv1.2': ssl.TLSVersion.TLSv1_2,
+    'TLSv1.3': ssl.TLSVersion.TLSv1_3
+}
+
+
+class TlsObject(ssl.SSLObject):
+    """
+    ssl object timing its own handshake, from the client hello being produced
+    to the handshake being done, both network round trips and cpu included
+    """
+    def do_handshake(self):
+        if getattr(self, '_started', None) is None:
+            self._started = time.perf_counter()
+        try:
+            super().do_handshake()
+        except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+            raise
+        except ssl.SSLError:
+            self.context.record(self, None)
+            raise
+        self.context.record(self, int((time.perf_counter() - self._started) * 1000000))
+
+
+class TlsContext(ssl.SSLContext):
+    """
+    client context resuming the latest session of every host, or never
+    resuming any of them, and reporting every handshake to the recorder
+    """
+    sslobject_class = TlsObject
+
+    def __new__(cls, recorder=None, resumption=True):
+        return super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+
+    def __init__(self, recorder=None, resumption=True):
+        """
+        :param recorder: callable of (resumed, duration), duration is None for a failed handshake
+        :param resumption: resume the sessions of previous connections, full handshakes only if not
+        """
+        super().__init__()
+        self.__recorder = recorder
+        self.__resumption = resumption
+        # host -> the latest connection with a completed handshake
+        self.__latest = {}
+        if not resumption:
+            self.options |= ssl.OP_NO_TICKET
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and self.__resumption:
+            latest = self.__latest.get(server_hostname, None)
+            # tls 1.3 tickets arrive after the handshake, read them as late as possible
+            session = latest.session if latest is not None else None
+        return super().wrap_bio(incoming, outgoing, server_side=server_side, server_hostname=server_hostname,
+                                session=session)
+
+    def record(self, sslobj, duration):
+        """
+        :param sslobj: TlsObject of the handshake
+        :param duration: microseconds, None if the handshake failed
+        :return:
+        """
+        if duration is not None and self.__resumption:
+            self.__latest[sslobj.server_hostname] = sslobj
+        if self.__recorder is not None:
+            self.__recorder(duration is not None and sslobj.session_reused, duration)
+
+
+class TlsOptions:
+    """
+    tls options of a https or wss job, contexts are built in the worker
+    processes since ssl contexts can't be pickled
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'verify', lambda: None)
+        readonly(inst, 'ca_file', lambda: None)
+        readonly(inst, 'shared', lambda: None)
+        readonly(inst, 'resumption', lambda: None)
+        readonly(inst, 'reconnect', lambda: None)
+        readonly(inst, 'alpn', lambda: None)
+        readonly(inst, 'ciphers', lambda: None)
+        readonly(inst, 'version', lambda: None)
+        return inst
+
+    def __init__(self, verify=True, ca_file=None, shared=True, resumption=True, reconnect=False, alpn=None,
+                 ciphers=None, version=None):
+        """
+        :param verify: verify the certificate and the host name of the server
+        :param ca_file: certificates trusted besides the default ones, a self-signed one for example
+        :param shared: share a context, and hence the sessions, between the request loops of the job,
+        otherwise every request loop is a client of its own
+        :param resumption: resume sessions by tickets or ids, every handshake is a full one if not
+        :param reconnect: open a connection, and hence do a handshake, for every request
+        :param alpn: protocols offered by alpn, ['http/1.1'] for example
+        :param ciphers: openssl cipher list of tls 1.2, tls 1.3 suites can't be changed by python
+        :param version: the only tls version used, TLSv1.2 or TLSv1.3, both of them by default
+        """
+        if version is not None and version not in TLS_VERSIONS:
+            raise ValueError('Unknown tls version %s, expected one of %s' % (version, ', '.join(TLS_VERSIONS)))
+        readonly(self, 'verify', lambda: verify)
+        readonly(self, 'ca_file', lambda: ca_file)
+        readonly(self, 'shared', lambda: shared)
+        readonly(self, 'resumption', lambda: resumption)
+        readonly(self, 'reconnect', lambda: reconnect)
+        readonly(self, 'alpn', lambda: list(alpn) if alpn else None)
+        readonly(self, 'ciphers', lambda: ciphers)
+        readonly(self, 'version', lambda: version)
+
+    def context(self, recorder=None):
+        """
+        :param recorder: callable of (resumed, duration), see TlsContext
+        :return: TlsContext
+        """
+        context = TlsContext(recorder, self.resumption)
+        if self.verify:
+            context.load_default_certs()
+            if self.ca_file is not None:
+                context.load_verify_locations(cafile=self.ca_file)
+        else:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        if self.alpn:
+            context.set_alpn_protocols(self.alpn)
+        if self.ciphers:
+            context.set_ciphers(self.ciphers)
+        if self.version is not None:
+            context.minimum_version = context.maximum_version = TLS_VERSIONS[self.version]
+        return context
@@ -0,0 +1,35 @@
+import ssl
+from typing import Callable, Dict, List, Optional
+
+TLS_VERSIONS: Dict[str, ssl.TLSVersion]
+
+
+class TlsObject(ssl.SSLObject):
+    _started: float
+    def do_handshake(self) -> None: pass
+
+
+class TlsContext(ssl.SSLContext):
+    __recorder: Callable[[bool, Optional[int]], None]
+    __resumption: bool
+    __latest: Dict[str, TlsObject]
+
+    def __init__(self, recorder: Callable[[bool, Optional[int]], None]=None, resumption: bool=True): pass
+    def wrap_bio(self, incoming: ssl.MemoryBIO, outgoing: ssl.MemoryBIO, server_side: bool=False,
+                 server_hostname: str=None, session: ssl.SSLSession=None) -> TlsObject: pass
+    def record(self, sslobj: TlsObject, duration: Optional[int]) -> None: pass
+
+
+class TlsOptions:
+    verify: bool
+    ca_file: str
+    shared: bool
+    resumption: bool
+    reconnect: bool
+    alpn: List[str]
+    ciphers: str
+    version: str
+
+    def __init__(self, verify: bool=True, ca_file: str=None, shared: bool=True, resumption: bool=True,
+                 reconnect: bool=False, alpn: List[str]=None, ciphers: str=None, version: str=None): pass
+    def context(self, recorder: Callable[[bool, Optional[int]], None]=None) -> TlsContext: pass
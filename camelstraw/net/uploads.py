@@ -0,0 +1,119 @@
+import mmap
+import os
+
+from ..settings import UPLOAD_CHUNK_SIZE
+from ..util import readonly
+
+
+class MappedFile:
+    """
+    a file mapped into the memory of a worker process, its content is sent as
+    memoryview slices of the mapping, so that neither the file is read into
+    python objects nor the slices are copied before reaching the transport
+    """
+    def __init__(self, path, chunk_size=UPLOAD_CHUNK_SIZE):
+        with open(path, 'rb') as file:
+            # an empty file can't be mapped, it's sent as an empty body or empty messages
+            size = os.fstat(file.fileno()).st_size
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else None
+        self.__view = memoryview(self.__map if self.__map is not None else b'')
+        self.__chunk_size = chunk_size
+        # properties
+        readonly(self, 'path', lambda: path)
+        readonly(self, 'size', lambda: len(self.__view))
+
+    def chunks(self, sent=None):
+        """
+        slices of the whole file in order
+        :param sent: callable of the bytes of every slice once it's taken by the writer
+        :return: generator of memoryview
+        """
+        view, step = self.__view, self.__chunk_size
+        for offset in range(0, len(view), step):
+            chunk = view[offset:offset + step]
+            yield chunk
+            if sent is not None:
+                sent(len(chunk))
+
+    async def stream(self, sent=None):
+        """
+        body of a streamed http request, aiohttp awaits the transport between two slices
+        :param sent: see chunks
+        :return: async generator of memoryview
+        """
+        for chunk in self.chunks(sent):
+            yield chunk
+
+    def frames(self, sent=None):
+        """
+        slices of the file over and over, one binary websocket message each
+        :param sent: callable of the bytes of every slice once it's taken
+        :return: generator of memoryview
+        """
+        # an empty file has no slice, every message is empty then
+        chunks = self.chunks if len(self.__view) > 0 else lambda: (self.__view,)
+        while True:
+            for chunk in chunks():
+                if sent is not None:
+                    sent(len(chunk))
+                yield chunk
+
+    def close(self):
+        try:
+            self.__view.release()
+            if self.__map is not None:
+                self.__map.close()
+        except BufferError:
+            # slices still referenced, the mapping goes with them
+            pass
+
+
+class FilePayload:
+    """
+    body of http requests or websocket messages read from a file, only the path
+    is shipped to the slaves, which map the file of the same path of their own
+    in the worker processes, large uploads hence cost neither pickling nor memory
+    """
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        inst = super().__new__(cls)
+        readonly(inst, 'path', lambda: None)
+        readonly(inst, 'chunk_size', lambda: None)
+        readonly(inst, 'chunked', lambda: None)
+        readonly(inst, 'content_type', lambda: None)
+        return inst
+
+    def __init__(self, path, chunk_size=UPLOAD_CHUNK_SIZE, chunked=False, content_type='application/octet-stream'):
+        """
+        :param path: path of the file on every slave
+        :param chunk_size: bytes of every slice written to the connection, and of every websocket message
+        :param chunked: send http bodies by chunked transfer encoding, by Content-Length of the file if not
+        :param content_type: Content-Type of http bodies
+        """
+        if chunk_size <= 0:
+            raise ValueError('chunk size should be positive')
+        path = os.path.abspath(path)
+        readonly(self, 'path', lambda: path)
+        readonly(self, 'chunk_size', lambda: chunk_size)
+        readonly(self, 'chunked', lambda: chunked)
+        readonly(self, 'content_type', lambda: content_type)
+
+    def open(self):
+        """
+        map the file, it's called in the worker process
+        :return: MappedFile
+        """
+        return MappedFile(self.path, self.chunk_size)
+
+    def headers(self, size):
+        """
+        headers of a http body of the file
+        :param size: bytes of the file
+        :return:
+        """
+        headers = {'Content-Type': self.content_type}
+        if not self.chunked:
+            headers['Content-Length'] = str(size)
+        return headers
@@ -0,0 +1,33 @@
+import asyncio
+import mmap
+from typing import AsyncGenerator, Callable, Dict, Generator, Optional
+
+from ..settings import UPLOAD_CHUNK_SIZE
+
+
+class MappedFile:
+    __map: Optional[mmap.mmap]
+    __view: memoryview
+    __chunk_size: int
+
+    path: str
+    size: int
+
+    def __init__(self, path: str, chunk_size: int=UPLOAD_CHUNK_SIZE): pass
+    def chunks(self, sent: Callable[[int], None]=None) -> Generator[memoryview, None, None]: pass
+    async def stream(self, sent: Callable[[int], None]=None) -> AsyncGenerator[memoryview, None]: pass
+    def frames(self, sent: Callable[[int], None]=None) -> Generator[memoryview, None, None]: pass
+    def close(self) -> None: pass
+
+
+class FilePayload:
+    path: str
+    chunk_size: int
+    chunked: bool
+    content_type: str
+
+    def __new__(cls, *args, **kwargs) -> FilePayload: pass
+    def __init__(self, path: str, chunk_size: int=UPLOAD_CHUNK_SIZE, chunked: bool=False,
+                 content_type: str='application/octet-stream'): pass
+    def open(self) -> MappedFile: pass
+    def headers(self, size: int) -> Dict[str, str]: pass
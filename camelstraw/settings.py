@@ -1,16 +1,120 @@
+import os
+
 # test duration (seconds)
 TEST_DURATION = 60
 
+# ip value of this machine reported to the master and prefixed to ids, resolved locally if None:
+# the address routing to the master (no packet is sent), then the address of the host name
+HOST_IP = os.environ.get('CAMELSTRAW_HOST_IP', None)
+
 # ip value of master machine
 MASTER = '10.172.143.48'
 # websocket port port of master service
 MASTER_PORT = 9001
+# times of connecting the master service before giving up, one second apart
+MASTER_CONNECT_RETRY = 10
 # ip values list of slave machines
 SLAVES = [
     '10.172.143.48'
 ]
 
-# interval between each worker checks the queue (seconds)
-WORKER_CHECK_INTERVAL = 1
+# optional relay tier of large fleets, relay ip -> ips of the slaves and relays connecting to it, the
+# relays connect to the master (or to their own relays) in turn and pre-merge what goes up, hosts
+# not listed connect to the master directly, a relay may be a slave as well
+RELAYS = {}
+# websocket port of relay services
+RELAY_PORT = 9002
+
+# seconds a slave keeps its worker processes warm waiting for the next master, once
+# the master is gone without releasing it
+SLAVE_LINGER = 60
+
+# pin every worker process to a dedicated cpu, and the slave / master processes to the reserved ones
+WORKER_PINNING = False
+# cpus reserved for the control processes when pinning
+CONTROL_CORES = 1
+
+# interval between each worker checks the queue (seconds), sub-second so that an aborted run stops promptly
+WORKER_CHECK_INTERVAL = 0.1
 # default timeout for each worker (seconds)
 WORKER_TIMEOUT = -1
+
+# seconds between every two rebalances of a global rate across the slaves
+RATE_REBALANCE_INTERVAL = 2
+# a slave sending less than (1 - slack) of its rate share falls behind, and keeps (1 + slack) of
+# what it achieves, the rest of the rate goes to the other slaves
+RATE_SLACK = 0.1
+
+# interval between every two health samples of a worker (seconds)
+HEALTH_INTERVAL = 0.5
+# a worker is considered saturated once the p99 lag of its event loop exceeds this (milliseconds)
+HEALTH_LAG_LIMIT = 20
+# or once its mean cpu utilisation exceeds this (percent of a cpu)
+HEALTH_CPU_LIMIT = 90
+
+# sqlite file every finished run is saved to, None disables the run store
+RUN_STORE = os.path.join(os.path.expanduser('~'), '.camelstraw', 'runs.db')
+# relative change (percent) of throughput or percentiles flagged by the compare command
+COMPARE_THRESHOLD = 5
+
+# directory every worker writes its raw per-request samples to, one sub directory
+# per run, None disables sample recording
+SAMPLE_DIR = None
+# rows processed at a time when analysing samples
+SAMPLE_CHUNK_SIZE = 1 << 22
+
+# number of responses every worker keeps as a uniform sample, as well as of every error class,
+# shipped with the result for diagnostics, 0 disables the sampling
+RESERVOIR_SIZE = 16
+# bytes of the body kept for every sampled response
+RESERVOIR_BODY_SIZE = 1024
+
+# a replayed request sent later than its schedule by more than this is late (milliseconds)
+REPLAY_TOLERANCE = 10
+# max number of replayed requests in flight per job per worker
+REPLAY_CONCURRENCY = 1024
+
+# seconds of cpu time between every two stack samples of a sampling profiler
+PROFILE_INTERVAL = 0.005
+# directory the merged profiles of every profiled run are written to
+PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.camelstraw', 'profiles')
+
+# port the bundled mock target listens to
+TARGET_PORT = 8000
+# bytes of the body of every response of the mock target
+TARGET_RESPONSE_SIZE = 64
+# seconds between two throughput reports of the mock target
+TARGET_REPORT_INTERVAL = 1
+# bytes read at a time when the mock target reads request bodies slowly
+TARGET_READ_CHUNK = 1 << 12
+# seconds to wait for all processes of the mock target to listen
+TARGET_STARTUP_TIMEOUT = 10
+
+# seconds a tcp or udp request waits for its response, connecting included
+SOCKET_TIMEOUT = 10
+# bytes read from a tcp connection at a time
+SOCKET_READ_SIZE = 1 << 16
+# bytes of every slice of an uploaded file written to the connection, and of every binary
+# websocket message sent out of a file
+UPLOAD_CHUNK_SIZE = 1 << 16
+
+# seconds between every two live points pushed to the dashboard
+WEB_PUSH_INTERVAL = 1
+# max number of points of a series sent to the dashboard, longer series are downsampled
+WEB_SERIES_POINTS = 600
+# the live series is downsampled and sent again every this many pushes, points are appended in between
+WEB_RESAMPLE_INTERVAL = 10
+
+# duration of every probe when searching the max throughput (seconds)
+SEARCH_PROBE_DURATION = 10
+# the latency percentile checked against the slo when searching
+SEARCH_PERCENTILE = 99
+# max error rate (0 ~ 1) of a sustainable probe
+SEARCH_ERROR_RATE = 0.01
+# upper bound of the searched concurrency (per job per worker)
+SEARCH_MAX_CONCURRENCY = 1024
+
+# sliding window the abort thresholds of a run are checked over (seconds)
+THRESHOLD_WINDOW = 10
+# the latency percentile checked against the latency threshold
+THRESHOLD_PERCENTILE = 99
@@ -0,0 +1 @@
+from .stores import Run, RunStore, compare_results
@@ -0,0 +1,260 @@
+import json
+import os
+import sqlite3
+import time
+
+from ..core.interfaces import AnalyseResult
+from ..settings import RUN_STORE, COMPARE_THRESHOLD
+from ..util import Histogram, readonly
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    total_request INTEGER NOT NULL,
+    success_request INTEGER NOT NULL,
+    latency INTEGER NOT NULL,
+    qps INTEGER NOT NULL,
+    start_time INTEGER NOT NULL,
+    stop_time INTEGER NOT NULL,
+    p50 INTEGER NOT NULL,
+    p90 INTEGER NOT NULL,
+    p99 INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS histograms (
+    run_id INTEGER NOT NULL,
+    scope TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS series (
+    run_id INTEGER NOT NULL,
+    scope TEXT NOT NULL,
+    second INTEGER NOT NULL,
+    total_request INTEGER NOT NULL,
+    success_request INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    run_id INTEGER NOT NULL,
+    scope TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS errors (
+    run_id INTEGER NOT NULL,
+    scope TEXT NOT NULL,
+    error TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    run_id INTEGER NOT NULL,
+    scope TEXT NOT NULL,
+    url TEXT NOT NULL,
+    total_request INTEGER NOT NULL,
+    success_request INTEGER NOT NULL,
+    statuses TEXT NOT NULL,
+    errors TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS histograms_run ON histograms (run_id, scope);
+CREATE INDEX IF NOT EXISTS series_run ON series (run_id, scope);
+CREATE INDEX IF NOT EXISTS statuses_run ON statuses (run_id, scope);
+CREATE INDEX IF NOT EXISTS errors_run ON errors (run_id, scope);
+CREATE INDEX IF NOT EXISTS urls_run ON urls (run_id, scope);
+'''
+
+# result kinds, a run owns exactly one master result
+KIND_MASTER = 'master'
+KIND_SLAVE = 'slave'
+KIND_JOB = 'job'
+
+
+class Run:
+    """
+    a finished run loaded from the store
+    """
+    def __init__(self, _id, created, metadata, result, slaves):
+        readonly(self, 'id', lambda: _id)
+        readonly(self, 'created', lambda: created)
+        readonly(self, 'metadata', lambda: metadata)
+        readonly(self, 'result', lambda: result)
+        readonly(self, 'slaves', lambda: slaves)
+
+
+class RunStore:
+    """
+    persist analyse results of finished runs into a local sqlite file,
+    every run keeps its metadata, the master/slave/job aggregates,
+    latency histograms and per-second series
+    """
+    def __init__(self, path=RUN_STORE):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.__connection = sqlite3.connect(path)
+        self.__connection.executescript(SCHEMA)
+        # properties
+        readonly(self, 'path', lambda: path)
+
+    def close(self):
+        self.__connection.close()
+
+    def save(self, result, metadata=None, slaves=None):
+        """
+        :param result: merged result of the master
+        :param metadata: json serializable run description
+        :param slaves: slave id -> AnalyseResult
+        :return: id of the saved run
+        """
+        with self.__connection:
+            cursor = self.__connection.execute('INSERT INTO runs (created, metadata) VALUES (?, ?)',
+                                               (int(time.time() * 1000), json.dumps(metadata or {})))
+            run_id = cursor.lastrowid
+            self.__save_result(run_id, KIND_MASTER, KIND_MASTER, result)
+            for name, job in result.jobs.items():
+                self.__save_result(run_id, KIND_JOB, name, job)
+            for slave, slave_result in (slaves or {}).items():
+                self.__save_result(run_id, KIND_SLAVE, slave, slave_result)
+        return run_id
+
+    def __save_result(self, run_id, kind, scope, result):
+        histogram = result.histogram
+        self.__connection.execute(
+            'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (run_id, kind, scope, result.total_request, result.success_request, result.latency, result.qps,
+             result.start_time, result.stop_time,
+             histogram.percentile(50), histogram.percentile(90), histogram.percentile(99)))
+        self.__connection.executemany(
+            'INSERT INTO histograms VALUES (?, ?, ?, ?)',
+            ((run_id, scope, bucket, count) for bucket, count in histogram))
+        self.__connection.executemany(
+            'INSERT INTO series VALUES (?, ?, ?, ?, ?)',
+            ((run_id, scope, second, total, success) for second, (total, success) in sorted(result.series.items())))
+        self.__connection.executemany(
+            'INSERT INTO statuses VALUES (?, ?, ?, ?)',
+            ((run_id, scope, status, count) for status, count in sorted(result.statuses.items())))
+        self.__connection.executemany(
+            'INSERT INTO errors VALUES (?, ?, ?, ?)',
+            ((run_id, scope, error, count) for error, count in sorted(result.errors.items())))
+        self.__connection.executemany(
+            'INSERT INTO urls VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((run_id, scope, url, counters['total_request'], counters['success_request'],
+              json.dumps(counters['statuses']), json.dumps(counters['errors']))
+             for url, counters in sorted(result.urls.items())))
+
+    def runs(self, limit=None):
+        """
+        summary of saved runs, newest first
+        :param limit:
+        :return: list of dict
+        """
+        sql = 'SELECT r.id, r.created, r.metadata, s.total_request, s.success_request, s.qps, s.p50, s.p90, s.p99 ' \
+              'FROM runs r JOIN results s ON s.run_id = r.id AND s.kind = ? ORDER BY r.id DESC'
+        params = [KIND_MASTER]
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        keys = ('id', 'created', 'metadata', 'total_request', 'success_request', 'qps', 'p50', 'p90', 'p99')
+        rows = [dict(zip(keys, row)) for row in self.__connection.execute(sql, params)]
+        for row in rows:
+            row['metadata'] = json.loads(row['metadata'])
+        return rows
+
+    def load(self, run_id):
+        """
+        rebuild a saved run
+        :param run_id:
+        :return: Run, or None if there's no such run
+        """
+        row = self.__connection.execute('SELECT id, created, metadata FROM runs WHERE id = ?', (run_id,)).fetchone()
+        if row is None:
+            return None
+        metadata = json.loads(row[2])
+        results = {KIND_MASTER: {}, KIND_SLAVE: {}, KIND_JOB: {}}
+        for kind, scope, total_request, success_request, latency, qps, start_time, stop_time in \
+                self.__connection.execute('SELECT kind, scope, total_request, success_request, latency, qps, '
+                                          'start_time, stop_time FROM results WHERE run_id = ?', (run_id,)):
+            results[kind][scope] = dict(total_request=total_request, success_request=success_request,
+                                        latency=latency, qps=qps, start_time=start_time, stop_time=stop_time)
+
+        def build(scope, data, jobs=None, abort=None):
+            histogram = Histogram({bucket: count for bucket, count in self.__connection.execute(
+                'SELECT bucket, count FROM histograms WHERE run_id = ? AND scope = ?', (run_id, scope))})
+            series = {second: [total, success] for second, total, success in self.__connection.execute(
+                'SELECT second, total_request, success_request FROM series WHERE run_id = ? AND scope = ?',
+                (run_id, scope))}
+            statuses = {status: count for status, count in self.__connection.execute(
+                'SELECT status, count FROM statuses WHERE run_id = ? AND scope = ?', (run_id, scope))}
+            errors = {error: count for error, count in self.__connection.execute(
+                'SELECT error, count FROM errors WHERE run_id = ? AND scope = ?', (run_id, scope))}
+            urls = {url: AnalyseResult.url_counters(total_request, success_request, json.loads(statuses),
+                                                    json.loads(errors))
+                    for url, total_request, success_request, statuses, errors in self.__connection.execute(
+                        'SELECT url, total_request, success_request, statuses, errors FROM urls '
+                        'WHERE run_id = ? AND scope = ?', (run_id, scope))}
+            return AnalyseResult(_id=scope, histogram=histogram, series=series, statuses=statuses, errors=errors,
+                                 urls=urls, jobs=jobs, abort=abort, **data)
+
+        jobs = {scope: build(scope, data) for scope, data in results[KIND_JOB].items()}
+        result = build(KIND_MASTER, results[KIND_MASTER][KIND_MASTER], jobs, metadata.get('abort'))
+        slaves = {scope: build(scope, data) for scope, data in results[KIND_SLAVE].items()}
+        return Run(_id=row[0], created=row[1], metadata=metadata, result=result, slaves=slaves)
+
+    def delete(self, run_id):
+        with self.__connection:
+            for table in ('histograms', 'series', 'statuses', 'errors', 'urls'):
+                self.__connection.execute('DELETE FROM %s WHERE run_id = ?' % table, (run_id,))
+            self.__connection.execute('DELETE FROM results WHERE run_id = ?', (run_id,))
+            self.__connection.execute('DELETE FROM runs WHERE id = ?', (run_id,))
+
+
+def __change(baseline, candidate):
+    if baseline == 0:
+        return 0.0 if candidate == 0 else float('inf')
+    return (candidate - baseline) * 100 / baseline
+
+
+def __compare_one(scope, baseline, candidate, threshold):
+    rows = []
+    # higher is better for throughput & success rate, lower is better for percentiles
+    metrics = (
+        ('qps', baseline.qps, candidate.qps, True),
+        ('success_rate', baseline.success_request * 100 / max(1, baseline.total_request),
+         candidate.success_request * 100 / max(1, candidate.total_request), True),
+        ('p50', baseline.histogram.percentile(50), candidate.histogram.percentile(50), False),
+        ('p90', baseline.histogram.percentile(90), candidate.histogram.percentile(90), False),
+        ('p99', baseline.histogram.percentile(99), candidate.histogram.percentile(99), False),
+    )
+    for metric, base_value, candidate_value, higher_better in metrics:
+        change = __change(base_value, candidate_value)
+        regressed = change < -threshold if higher_better else change > threshold
+        improved = change > threshold if higher_better else change < -threshold
+        rows.append({
+            'scope': scope,
+            'metric': metric,
+            'baseline': base_value,
+            'candidate': candidate_value,
+            'change': change,
+            'flag': 'regressed' if regressed else 'improved' if improved else ''
+        })
+    return rows
+
+
+def compare_results(baseline, candidate, threshold=COMPARE_THRESHOLD):
+    """
+    compare two analyse results metric by metric, changes larger than
+    threshold percent are flagged as 'regressed' or 'improved'
+    :param baseline: AnalyseResult
+    :param candidate: AnalyseResult
+    :param threshold: percent
+    :return: list of dict
+    """
+    rows = __compare_one(KIND_MASTER, baseline, candidate, threshold)
+    for name in sorted(set(baseline.jobs) & set(candidate.jobs)):
+        rows.extend(__compare_one(name, baseline.jobs[name], candidate.jobs[name], threshold))
+    return rows
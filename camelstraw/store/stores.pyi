@@ -0,0 +1,42 @@
+from sqlite3 import Connection
+from typing import Dict, List
+
+from ..core.interfaces import AnalyseResult
+from ..settings import RUN_STORE, COMPARE_THRESHOLD
+
+SCHEMA: str
+KIND_MASTER: str
+KIND_SLAVE: str
+KIND_JOB: str
+
+
+class Run:
+    id: int
+    created: int
+    metadata: Dict
+    result: AnalyseResult
+    slaves: Dict[str, AnalyseResult]
+
+    def __init__(self, _id: int, created: int, metadata: Dict, result: AnalyseResult,
+                 slaves: Dict[str, AnalyseResult]): pass
+
+
+class RunStore:
+    __connection: Connection
+
+    path: str
+
+    def __init__(self, path: str=RUN_STORE): pass
+
+    def close(self) -> None: pass
+    def save(self, result: AnalyseResult, metadata: Dict=None, slaves: Dict[str, AnalyseResult]=None) -> int: pass
+    def __save_result(self, run_id: int, kind: str, scope: str, result: AnalyseResult) -> None: pass
+    def runs(self, limit: int=None) -> List[Dict]: pass
+    def load(self, run_id: int) -> Run: pass
+    def delete(self, run_id: int) -> None: pass
+
+
+def __change(baseline: float, candidate: float) -> float: pass
+def __compare_one(scope: str, baseline: AnalyseResult, candidate: AnalyseResult, threshold: float) -> List[Dict]: pass
+def compare_results(baseline: AnalyseResult, candidate: AnalyseResult,
+                    threshold: float=COMPARE_THRESHOLD) -> List[Dict]: pass
@@ -0,0 +1,272 @@
+import asyncio
+import random
+import signal
+import socket
+import string
+import time
+from multiprocessing import get_context
+from queue import Empty
+
+from aiohttp import web, WSMsgType, WSCloseCode
+
+from ..core.live import LiveCounters
+from ..settings import TARGET_PORT, TARGET_RESPONSE_SIZE, TARGET_REPORT_INTERVAL, TARGET_READ_CHUNK, \
+    TARGET_STARTUP_TIMEOUT
+from ..util import readonly, usable_cpu_count
+
+# body of the injected errors
+ERROR_BODY = b'injected error'
+
+
+def latency_distribution(distribution, mean):
+    """
+    :param distribution: 'fixed', 'uniform' (0 ~ 2 * mean), 'exponential' or 'pareto' (long tail, alpha 3)
+    :param mean: mean of the injected latency (milliseconds)
+    :return: function of no arguments returning seconds, None if no latency is injected
+    """
+    if not mean:
+        return None
+    mean = mean / 1000
+    if distribution == 'fixed':
+        return lambda: mean
+    if distribution == 'uniform':
+        uniform = random.uniform
+        return lambda: uniform(0, 2 * mean)
+    if distribution == 'exponential':
+        expovariate, rate = random.expovariate, 1 / mean
+        return lambda: expovariate(rate)
+    if distribution == 'pareto':
+        # the minimum making the mean of pareto(3) the given one
+        paretovariate, scale = random.paretovariate, mean * 2 / 3
+        return lambda: scale * paretovariate(3)
+    raise ValueError('Unknown latency distribution %s, expected one of fixed, uniform, exponential, pareto'
+                     % distribution)
+
+
+class TargetApp:
+    """
+    the application of a process of the mock target, the bodies are built
+    once, a request costs a few random numbers on top of aiohttp itself
+    """
+    def __init__(self, slot, size, latency, distribution, error_rate, close_rate, read_rate):
+        self.__slot = slot
+        self.__delay = latency_distribution(distribution, latency)
+        self.__error_rate = error_rate
+        self.__close_rate = close_rate
+        self.__read_rate = read_rate
+        text = (string.ascii_letters * (size // len(string.ascii_letters) + 1))[:size]
+        self.__text = text
+        self.__body = text.encode()
+
+    def app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get('/ws/{tail:.*}', self.__websocket_handler),
+            web.route('*', '/{tail:.*}', self.__http_handler)
+        ])
+        return app
+
+    async def __read(self, content):
+        # read the body at the given rate, so that the sender is blocked by the flow control of tcp
+        while True:
+            chunk = await content.read(TARGET_READ_CHUNK)
+            if not chunk:
+                return
+            await asyncio.sleep(len(chunk) / self.__read_rate)
+
+    async def __http_handler(self, request):
+        started = time.perf_counter()
+        if request.body_exists:
+            if self.__read_rate is None:
+                await request.read()
+            else:
+                await self.__read(request.content)
+        if self.__delay is not None:
+            await asyncio.sleep(self.__delay())
+        failed = self.__error_rate > 0 and random.random() < self.__error_rate
+        body = ERROR_BODY if failed else self.__body
+        response = web.Response(body=body, status=500 if failed else 200)
+        if self.__close_rate > 0 and random.random() < self.__close_rate:
+            response.force_close()
+        self.__slot.record((time.perf_counter() - started) * 1000, not failed, failed, len(body))
+        return response
+
+    async def __websocket_handler(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                break
+            started = time.perf_counter()
+            if self.__read_rate is not None:
+                await asyncio.sleep(len(msg.data) / self.__read_rate)
+            if self.__delay is not None:
+                await asyncio.sleep(self.__delay())
+            if self.__error_rate > 0 and random.random() < self.__error_rate:
+                # a failed message has no reply, the connection is closed as a server error
+                self.__slot.record((time.perf_counter() - started) * 1000, False, True)
+                await ws.close(code=WSCloseCode.INTERNAL_ERROR, message=ERROR_BODY)
+                break
+            if msg.type == WSMsgType.TEXT:
+                await ws.send_str(self.__text)
+            else:
+                await ws.send_bytes(self.__body)
+            self.__slot.record((time.perf_counter() - started) * 1000, True, size=len(self.__body))
+            if self.__close_rate > 0 and random.random() < self.__close_rate:
+                await ws.close()
+                break
+        return ws
+
+
+def serve_target(index, options, counters, ready):
+    """
+    entry of a process of the mock target, it listens to the shared port until terminated
+    :param index: index of the process, and of its live counters slot
+    :param options: dict of host, port, size, latency, distribution, error_rate, close_rate and read_rate
+    :param counters: LiveCounters
+    :param ready: queue to put the index to once listening, or the error if it can't
+    :return:
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    stopping = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    loop.add_signal_handler(signal.SIGINT, stopping.set)
+    host, port = options['host'], options['port']
+    app = TargetApp(counters.slot(index), **{key: value for key, value in options.items()
+                                            if key not in ('host', 'port')}).app()
+    runner = web.AppRunner(app, access_log=None, handle_signals=False)
+
+    async def serve():
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port, reuse_port=True, backlog=1024).start()
+        except OSError as e:
+            ready.put('%s: %s' % (e.__class__.__name__, e))
+            return
+        ready.put(index)
+        await stopping.wait()
+
+    # the forked counters are left to the creator, which releases the shared memory
+    try:
+        loop.run_until_complete(serve())
+        loop.run_until_complete(runner.cleanup())
+    finally:
+        loop.close()
+
+
+class MockTarget:
+    """
+    a target of configurable behaviours standing in for a real service, so that
+    the load generator itself is benchmarked on a single box. every process
+    listens to the same port by SO_REUSEPORT and the kernel balances the
+    connections, the processes count their responses into their own slots of
+    the shared live counters, which is how the throughput is reported
+    """
+    def __init__(self, host='0.0.0.0', port=TARGET_PORT, processes=None, size=TARGET_RESPONSE_SIZE, latency=0,
+                 distribution='fixed', error_rate=0, close_rate=0, read_rate=None):
+        """
+        :param processes: number of processes, the number of usable cpus by default
+        :param size: bytes of the body of every response
+        :param latency: mean latency injected before responding (milliseconds)
+        :param distribution: distribution of the injected latency, see latency_distribution
+        :param error_rate: fraction of the requests answered by 500, of the websocket messages closing the
+        connection with 1011 instead
+        :param close_rate: fraction of the responses closing the connection after them
+        :param read_rate: bytes per second request bodies are read at, no limit if None
+        """
+        processes = processes or usable_cpu_count()
+        if processes > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+            raise ValueError('SO_REUSEPORT is not available on this platform, only 1 process can listen')
+        latency_distribution(distribution, latency)
+        if not 0 <= error_rate <= 1 or not 0 <= close_rate <= 1:
+            raise ValueError('error rate and close rate should be within 0 ~ 1')
+        if read_rate is not None and read_rate <= 0:
+            raise ValueError('read rate should be positive')
+        self.__options = {'host': host, 'port': port, 'size': size, 'latency': latency,
+                          'distribution': distribution, 'error_rate': error_rate, 'close_rate': close_rate,
+                          'read_rate': read_rate}
+        self.__processes = []
+        self.__counters = None
+        # properties
+        readonly(self, 'host', lambda: host)
+        readonly(self, 'port', lambda: port)
+        readonly(self, 'processes', lambda: processes)
+        readonly(self, 'options', lambda: dict(self.__options))
+        readonly(self, 'running', lambda: len(self.__processes) > 0)
+
+    def start(self):
+        """
+        start the processes and wait until all of them listen
+        :return:
+        """
+        context = get_context('fork')
+        self.__counters = LiveCounters(self.processes)
+        ready = context.Queue()
+        self.__processes = [context.Process(target=serve_target, args=(index, self.__options, self.__counters, ready),
+                                            name='MockTarget-%s' % index, daemon=True)
+                            for index in range(self.processes)]
+        [process.start() for process in self.__processes]
+        try:
+            for _ in range(self.processes):
+                message = ready.get(timeout=TARGET_STARTUP_TIMEOUT)
+                if not isinstance(message, int):
+                    raise OSError('mock target can not listen to %s:%s, %s' % (self.host, self.port, message))
+        except Empty:
+            self.stop()
+            raise OSError('mock target does not listen to %s:%s in %s seconds'
+                          % (self.host, self.port, TARGET_STARTUP_TIMEOUT))
+        except OSError:
+            self.stop()
+            raise
+
+    def progress(self):
+        """
+        :return: counters of all the processes together, see LiveCounters
+        """
+        if self.__counters is None:
+            return None
+        return self.__counters.snapshot(range(self.processes))['total']
+
+    def stop(self):
+        [process.terminate() for process in self.__processes if process.is_alive()]
+        [process.join() for process in self.__processes]
+        self.__processes = []
+        if self.__counters is not None:
+            self.__counters.close()
+            self.__counters = None
+
+    def run(self, interval=TARGET_REPORT_INTERVAL):
+        """
+        serve until interrupted or terminated, and print the throughput of every interval
+        :param interval: seconds
+        :return:
+        """
+        # terminated like interrupted, so that the processes are stopped as well
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        self.start()
+        print('Mock target listening to %s:%s with %s processes' % (self.host, self.port, self.processes))
+        last, last_time = self.progress(), time.time()
+        try:
+            while True:
+                time.sleep(interval)
+                current, current_time = self.progress(), time.time()
+                print(self.__report(last, current, current_time - last_time))
+                last, last_time = current, current_time
+        except KeyboardInterrupt:
+            pass
+        finally:
+            total = self.progress()
+            self.stop()
+        histogram = total['histogram']
+        print('Total: %s responses, %s errors, %.2f MB, P50 %s ms, P99 %s ms' % (
+            total['total_request'], total['errors'], total['bytes'] / (1 << 20), histogram.percentile(50),
+            histogram.percentile(99)))
+
+    @staticmethod
+    def __report(last, current, elapsed):
+        requests = current['total_request'] - last['total_request']
+        errors = current['errors'] - last['errors']
+        size = current['bytes'] - last['bytes']
+        return '%s  QPS %10.1f  Errors/s %8.1f  Out %8.2f MB/s' % (
+            time.strftime('%H:%M:%S'), requests / elapsed, errors / elapsed, size / elapsed / (1 << 20))
@@ -0,0 +1,56 @@
+from multiprocessing import Process, Queue
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+from aiohttp.web_app import Application
+from aiohttp.streams import StreamReader
+
+from ..core.live import LiveCounters, LiveSlot
+from ..settings import TARGET_PORT, TARGET_RESPONSE_SIZE, TARGET_REPORT_INTERVAL
+
+ERROR_BODY: bytes
+
+
+def latency_distribution(distribution: str, mean: float) -> Optional[Callable[[], float]]: pass
+
+
+class TargetApp:
+    __slot: LiveSlot
+    __delay: Optional[Callable[[], float]]
+    __error_rate: float
+    __close_rate: float
+    __read_rate: Optional[float]
+    __text: str
+    __body: bytes
+
+    def __init__(self, slot: LiveSlot, size: int, latency: float, distribution: str, error_rate: float,
+                 close_rate: float, read_rate: Optional[float]): pass
+    def app(self) -> Application: pass
+    async def __read(self, content: StreamReader) -> None: pass
+    async def __http_handler(self, request: web.Request) -> web.Response: pass
+    async def __websocket_handler(self, request: web.Request) -> web.WebSocketResponse: pass
+
+
+def serve_target(index: int, options: Dict, counters: LiveCounters, ready: Queue) -> None: pass
+
+
+class MockTarget:
+    __options: Dict
+    __processes: List[Process]
+    __counters: Optional[LiveCounters]
+
+    host: str
+    port: int
+    processes: int
+    options: Dict
+    running: bool
+
+    def __init__(self, host: str='0.0.0.0', port: int=TARGET_PORT, processes: int=None,
+                 size: int=TARGET_RESPONSE_SIZE, latency: float=0, distribution: str='fixed', error_rate: float=0,
+                 close_rate: float=0, read_rate: float=None): pass
+    def start(self) -> None: pass
+    def progress(self) -> Optional[Dict]: pass
+    def stop(self) -> None: pass
+    def run(self, interval: float=TARGET_REPORT_INTERVAL) -> None: pass
+    @staticmethod
+    def __report(last: Dict, current: Dict, elapsed: float) -> str: pass
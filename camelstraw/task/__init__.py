@@ -1,2 +1,12 @@
-from .tasks import PeriodTask
-from .balancers import IDispatchable, IBalancer, Random, RoundRobin, WeightRoundRobin
+from ..util.modules import lazy_exports
+
+# the periodic task needs apscheduler, the balancers don't
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'PeriodTask': '.tasks',
+    'IDispatchable': '.balancers',
+    'IBalancer': '.balancers',
+    'Random': '.balancers',
+    'RoundRobin': '.balancers',
+    'WeightRoundRobin': '.balancers'
+})
+__all__ = ['PeriodTask', 'IDispatchable', 'IBalancer', 'Random', 'RoundRobin', 'WeightRoundRobin']
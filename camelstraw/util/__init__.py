@@ -1,3 +1,19 @@
-from .decorators import singleton, readonly
-from .clocks import Stopwatch, TimeFormat
-from .randoms import uid
+from .modules import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'singleton': '.decorators',
+    'readonly': '.decorators',
+    'Stopwatch': '.clocks',
+    'TimeFormat': '.clocks',
+    'uid': '.randoms',
+    'Histogram': '.histograms',
+    'available_cpus': '.cpus',
+    'cpu_quota': '.cpus',
+    'usable_cpu_count': '.cpus',
+    'plan_cpus': '.cpus',
+    'pin_cpus': '.cpus',
+    'lttb': '.series',
+    'downsample': '.series'
+})
+__all__ = ['singleton', 'readonly', 'Stopwatch', 'TimeFormat', 'uid', 'Histogram', 'available_cpus', 'cpu_quota',
+           'usable_cpu_count', 'plan_cpus', 'pin_cpus', 'lttb', 'downsample', 'lazy_exports']
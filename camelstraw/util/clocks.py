@@ -5,6 +5,14 @@ from camelstraw.util import readonly
 
 class Stopwatch:
 
+    def __new__(cls, *args, **kwargs):
+        # TODO: unknown dill problem.
+        # the following code seems duplicate to that in __init__,
+        # but it's a must when used in Process & dill
+        stopwatch = super().__new__(cls)
+        readonly(stopwatch, 'start_time', lambda: None)
+        return stopwatch
+
     def __init__(self):
         self.__start_time = None
         # milliseconds
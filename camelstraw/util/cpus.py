@@ -0,0 +1,77 @@
+import math
+import os
+
+# cgroup v2 and v1 files holding the cpu quota
+CGROUP_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_CPU_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_CPU_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+def available_cpus():
+    """
+    cpus the current process is allowed to run on
+    :return: sorted cpu ids
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_quota():
+    """
+    cpu limit of the cgroup the process belongs to
+    :return: number of cpus, None if not limited
+    """
+    try:
+        with open(CGROUP_CPU_MAX) as f:
+            quota, period = f.read().split()[:2]
+        if quota == 'max':
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(CGROUP_CPU_QUOTA) as f:
+            quota = int(f.read())
+        with open(CGROUP_CPU_PERIOD) as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def usable_cpu_count():
+    """
+    number of cpus the process can really use, respecting both the affinity
+    and the cgroup quota
+    :return:
+    """
+    count = len(available_cpus())
+    quota = cpu_quota()
+    if quota is not None:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
+def plan_cpus(reserved=1):
+    """
+    split the usable cpus into the ones of control processes and the ones of workers
+    :param reserved: cpus reserved for the control processes, one cpu is always left to workers
+    :return: (cpus of the control processes, cpus of the workers)
+    """
+    cpus = available_cpus()[:usable_cpu_count()]
+    reserved = max(0, min(reserved, len(cpus) - 1))
+    return cpus[:reserved] or cpus, cpus[reserved:]
+
+
+def pin_cpus(cpus, pid=0):
+    """
+    bind a process to the cpus
+    :param cpus:
+    :param pid: the current process by default
+    :return: whether the process is pinned, False if not supported by the platform
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        return False
+    os.sched_setaffinity(pid, set(cpus))
+    return True
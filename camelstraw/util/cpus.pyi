@@ -0,0 +1,12 @@
+from typing import Iterable, List, Optional, Tuple
+
+CGROUP_CPU_MAX: str
+CGROUP_CPU_QUOTA: str
+CGROUP_CPU_PERIOD: str
+
+
+def available_cpus() -> List[int]: pass
+def cpu_quota() -> Optional[float]: pass
+def usable_cpu_count() -> int: pass
+def plan_cpus(reserved: int=1) -> Tuple[List[int], List[int]]: pass
+def pin_cpus(cpus: Iterable[int], pid: int=0) -> bool: pass
@@ -0,0 +1,73 @@
+class Histogram:
+    """
+    latency distribution in milliseconds, values below 1000 are kept exactly
+    and larger values are rounded down to 3 significant digits, so that the
+    histogram stays small and can be merged across workers, slaves and master
+    """
+    def __init__(self, buckets=None):
+        self.__buckets = {}
+        for bucket, count in (buckets or {}).items():
+            self.record(int(bucket), count)
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self):
+        return iter(sorted(self.__buckets.items()))
+
+    @staticmethod
+    def bucket(value):
+        value = max(0, int(value))
+        if value < 1000:
+            return value
+        magnitude = 10 ** (len(str(value)) - 3)
+        return value // magnitude * magnitude
+
+    @property
+    def total(self):
+        return sum(self.__buckets.values())
+
+    @property
+    def mean(self):
+        total = self.total
+        if total == 0:
+            return 0
+        return sum(bucket * count for bucket, count in self.__buckets.items()) / total
+
+    @property
+    def max(self):
+        return max(self.__buckets) if self.__buckets else 0
+
+    def record(self, value, count=1):
+        bucket = self.bucket(value)
+        self.__buckets[bucket] = self.__buckets.get(bucket, 0) + count
+        return self
+
+    def merge(self, other):
+        if other is None:
+            return self
+        for bucket, count in other:
+            self.__buckets[bucket] = self.__buckets.get(bucket, 0) + count
+        return self
+
+    def percentile(self, percent):
+        """
+        :param percent: 0 ~ 100
+        :return: the smallest bucket that covers the given percent of records
+        """
+        total = self.total
+        if total == 0:
+            return 0
+        threshold, accumulated = total * percent / 100, 0
+        for bucket, count in self:
+            accumulated += count
+            if accumulated >= threshold:
+                return bucket
+        return self.max
+
+    def to_json(self):
+        return {str(bucket): count for bucket, count in self}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(buckets=data)
@@ -0,0 +1,22 @@
+from typing import Dict, Iterator, Tuple
+
+
+class Histogram:
+    __buckets: Dict[int, int]
+
+    total: int
+    mean: float
+    max: int
+
+    def __init__(self, buckets: Dict=None): pass
+    def __len__(self) -> int: pass
+    def __iter__(self) -> Iterator[Tuple[int, int]]: pass
+
+    @staticmethod
+    def bucket(value: int) -> int: pass
+    def record(self, value: int, count: int=1) -> Histogram: pass
+    def merge(self, other: Histogram) -> Histogram: pass
+    def percentile(self, percent: float) -> int: pass
+    def to_json(self) -> Dict[str, int]: pass
+    @classmethod
+    def from_json(cls, data: Dict) -> Histogram: pass
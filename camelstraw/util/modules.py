@@ -0,0 +1,26 @@
+import sys
+from importlib import import_module
+
+
+def lazy_exports(package, exports):
+    """
+    import the submodules of a package only when their names are used (PEP 562),
+    so that importing the package doesn't load aiohttp, dill or apscheduler
+    :param package: __name__ of the package
+    :param exports: exported name -> relative name of the submodule defining it, followed
+    by ':' and the name in the submodule if it's exported under another name
+    :return: __getattr__ and __dir__ of the package
+    """
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError("module '%s' has no attribute '%s'" % (package, name))
+        module, _, attribute = exports[name].partition(':')
+        value = getattr(import_module(module, package), attribute or name)
+        # later lookups find the name directly
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,45 @@
+def lttb(xs, ys, threshold):
+    """
+    largest triangle three buckets: pick the points keeping the visual shape of a
+    series, the middle points are split into threshold - 2 buckets, and the point
+    of every bucket forming the largest triangle with the previously picked point
+    and the average of the next bucket is kept
+    :param xs: x values in ascending order
+    :param ys: y values
+    :param threshold: max number of points kept
+    :return: indexes of the kept points, the first and the last ones are always kept
+    """
+    length = len(xs)
+    if threshold >= length or threshold < 3:
+        return list(range(length))
+    every = (length - 2) / (threshold - 2)
+    indexes, picked = [0], 0
+    for i in range(threshold - 2):
+        # the third vertex is the average point of the next bucket
+        start, stop = int((i + 1) * every) + 1, min(int((i + 2) * every) + 1, length)
+        average_x = sum(xs[start:stop]) / (stop - start)
+        average_y = sum(ys[start:stop]) / (stop - start)
+        x, y = xs[picked], ys[picked]
+        best, largest = None, -1
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            # twice the area, the factor doesn't matter when comparing
+            area = abs((x - average_x) * (ys[j] - y) - (x - xs[j]) * (average_y - y))
+            if area > largest:
+                best, largest = j, area
+        indexes.append(best)
+        picked = best
+    indexes.append(length - 1)
+    return indexes
+
+
+def downsample(points, threshold, y=1):
+    """
+    downsample rows of a series by lttb
+    :param points: rows whose first item is the x value, in ascending order
+    :param threshold: max number of rows kept
+    :param y: index of the y value in a row which keeps the shape
+    :return: list of the kept rows
+    """
+    points = list(points)
+    indexes = lttb([point[0] for point in points], [point[y] for point in points], threshold)
+    return [points[index] for index in indexes]
@@ -0,0 +1,5 @@
+from typing import List, Sequence
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]: pass
+def downsample(points: Sequence[Sequence], threshold: int, y: int=1) -> List[Sequence]: pass
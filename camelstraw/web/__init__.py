@@ -0,0 +1,6 @@
+from ..util.modules import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Dashboard': '.dashboards'
+})
+__all__ = ['Dashboard']
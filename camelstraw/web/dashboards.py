@@ -0,0 +1,248 @@
+import time
+from asyncio import ensure_future, gather, get_event_loop, sleep
+
+from aiohttp import web, WSMsgType
+from aiohttp.web_app import Application
+
+from .pages import DASHBOARD_PAGE
+from ..exception import WrongStatusException
+from ..net import HttpMethod
+from ..settings import RUN_STORE, TEST_DURATION, WEB_PUSH_INTERVAL, WEB_SERIES_POINTS, WEB_RESAMPLE_INTERVAL
+from ..store import RunStore
+from ..util import readonly, downsample, Histogram
+
+# fields of a point of the live series, the stored series has the first four of them
+POINT_FIELDS = ('second', 'qps', 'success', 'errors', 'p50', 'p90', 'p99')
+
+
+class Dashboard:
+    """
+    web interface of the web launcher. the live series is built here from the
+    counters the slaves read out of the shared memory of their workers, the
+    master only keeps the latest of them, so neither the workers nor the
+    aggregation of the master do any work for the dashboard. series are
+    downsampled by lttb before sent, new points are appended by the browser
+    in between, so that long runs stay as cheap as short ones
+    """
+    def __init__(self, launcher, host, port, local_mode=True):
+        self.__app = Application()
+        self.__launcher = launcher
+        self.__local_mode = local_mode
+        self.__sockets = set()
+        self.__pusher = None
+        # live series of the current run, and the counters of the last push
+        self.__series = []
+        self.__last = None
+        self.__finished = None
+        # properties
+        readonly(self, 'host', lambda: host)
+        readonly(self, 'port', lambda: port)
+
+    def start(self):
+        self.__app.on_startup.append(self.__on_startup)
+        self.__app.on_shutdown.append(self.__on_shutdown)
+        self.__app.add_routes([
+            web.get('/', self.__page_handler),
+            web.get('/ws', self.__ws_handler),
+            web.get('/api/runs', self.__runs_handler),
+            web.post('/api/runs', self.__start_handler),
+            web.get('/api/runs/{run_id:\\d+}', self.__run_handler),
+            web.post('/api/stop', self.__stop_handler)
+        ])
+        web.run_app(self.__app, host=self.host, port=self.port)
+
+    async def __on_startup(self, app):
+        self.__pusher = ensure_future(self.__push())
+
+    async def __on_shutdown(self, app):
+        self.__launcher.stop_run()
+        self.__pusher.cancel()
+        await gather(self.__pusher, return_exceptions=True)
+        await gather(*(ws.close() for ws in list(self.__sockets)))
+
+    async def __page_handler(self, request):
+        return web.Response(text=DASHBOARD_PAGE, content_type='text/html')
+
+    async def __ws_handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.__sockets.add(ws)
+        try:
+            await ws.send_json(self.__snapshot())
+            # the browser only listens, messages are drained until it's gone
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self.__sockets.discard(ws)
+        return ws
+
+    async def __runs_handler(self, request):
+        limit = int(request.query.get('limit', 50))
+        runs = await get_event_loop().run_in_executor(None, self.__load_runs, limit)
+        return web.json_response(runs)
+
+    async def __run_handler(self, request):
+        run = await get_event_loop().run_in_executor(None, self.__load_run, int(request.match_info['run_id']))
+        if run is None:
+            return web.json_response({'error': 'no such run'}, status=404)
+        return web.json_response(run)
+
+    async def __start_handler(self, request):
+        try:
+            data = await request.json()
+            urls = [url.strip() for url in data.get('urls', []) if url.strip()]
+            params = dict(urls=urls, method=HttpMethod.from_phrase(data.get('method', HttpMethod.GET.phrase)),
+                          duration=int(data.get('duration', TEST_DURATION)),
+                          worker_num=int(data['worker_num']) if data.get('worker_num') else None,
+                          rate=float(data['rate']) if data.get('rate') else None,
+                          concurrency=int(data.get('concurrency', 1)), local_mode=self.__local_mode)
+        except (ValueError, TypeError, AttributeError) as e:
+            return web.json_response({'error': str(e)}, status=400)
+        if len(urls) == 0 or params['duration'] <= 0:
+            return web.json_response({'error': 'urls and a positive duration are required'}, status=400)
+        try:
+            # forking the master and the slaves blocks
+            run = await get_event_loop().run_in_executor(None, lambda: self.__launcher.start_run(**params))
+        except WrongStatusException as e:
+            return web.json_response({'error': str(e)}, status=409)
+        self.__series, self.__last = [], None
+        await self.__broadcast(self.__snapshot())
+        return web.json_response(run)
+
+    async def __stop_handler(self, request):
+        self.__launcher.stop_run()
+        return web.json_response({'stopping': self.__launcher.running})
+
+    async def __push(self):
+        """
+        poll the live counters of the running run and push them to every browser
+        :return:
+        """
+        loop, pushes = get_event_loop(), 0
+        while True:
+            await sleep(WEB_PUSH_INTERVAL)
+            if self.__launcher.finished is not self.__finished:
+                self.__finished = self.__launcher.finished
+                await self.__broadcast({'type': 'finished', 'run': self.__finished})
+            if not self.__launcher.running:
+                continue
+            try:
+                progress = await loop.run_in_executor(None, self.__launcher.progress)
+            except (OSError, AssertionError):
+                # the master is just started or already gone
+                continue
+            point = self.__point(progress)
+            if point is None:
+                continue
+            self.__series.append(point)
+            pushes += 1
+            # the resampled series replaces the one built by the browser, the point included
+            if pushes % WEB_RESAMPLE_INTERVAL == 0:
+                await self.__broadcast({'type': 'series', 'series': self.__downsampled()})
+            await self.__broadcast({'type': 'point', 'point': point, 'totals': self.__totals(progress),
+                                    'append': pushes % WEB_RESAMPLE_INTERVAL != 0})
+
+    def __point(self, progress):
+        """
+        rates and percentiles between the last push and this one
+        :param progress: live counters summed across the slaves
+        :return: a row of POINT_FIELDS, None if there's nothing to compare with yet
+        """
+        run = self.__launcher.run
+        if progress is None or run is None:
+            return None
+        now, last = time.time(), self.__last
+        self.__last = (now, progress, dict(progress['histogram']))
+        if last is None:
+            return None
+        elapsed = max(now - last[0], 1e-3)
+        # the histogram of the interval is the difference of the cumulative ones
+        histogram = Histogram({bucket: count - last[2].get(bucket, 0) for bucket, count in progress['histogram']
+                               if count > last[2].get(bucket, 0)})
+        return [
+            round(now - run['started'] / 1000, 1),
+            round((progress['total_request'] - last[1]['total_request']) / elapsed, 1),
+            round((progress['success_request'] - last[1]['success_request']) / elapsed, 1),
+            round((progress['errors'] - last[1]['errors']) / elapsed, 1),
+            histogram.percentile(50),
+            histogram.percentile(90),
+            histogram.percentile(99)
+        ]
+
+    @staticmethod
+    def __totals(progress):
+        histogram = progress['histogram']
+        return {
+            'total_request': progress['total_request'],
+            'success_request': progress['success_request'],
+            'errors': progress['errors'],
+            'bytes': progress['bytes'],
+            'p50': histogram.percentile(50),
+            'p90': histogram.percentile(90),
+            'p99': histogram.percentile(99)
+        }
+
+    def __downsampled(self):
+        return downsample(self.__series, WEB_SERIES_POINTS)
+
+    def __snapshot(self):
+        return {
+            'type': 'snapshot',
+            'fields': POINT_FIELDS,
+            'run': self.__launcher.run,
+            'finished': self.__launcher.finished,
+            'series': self.__downsampled()
+        }
+
+    async def __broadcast(self, message):
+        await gather(*(ws.send_json(message) for ws in list(self.__sockets) if not ws.closed),
+                     return_exceptions=True)
+
+    @staticmethod
+    def __load_runs(limit):
+        if RUN_STORE is None:
+            return []
+        store = RunStore(RUN_STORE)
+        try:
+            return store.runs(limit)
+        finally:
+            store.close()
+
+    @staticmethod
+    def __load_run(run_id):
+        """
+        a saved run with its per-second series downsampled
+        :param run_id:
+        :return: dict, None if there's no such run
+        """
+        if RUN_STORE is None:
+            return None
+        store = RunStore(RUN_STORE)
+        try:
+            run = store.load(run_id)
+        finally:
+            store.close()
+        if run is None:
+            return None
+        result = run.result
+        seconds = sorted(result.series.keys())
+        series = [[second - seconds[0], total, success, total - success]
+                  for second, (total, success) in ((second, result.series[second]) for second in seconds)]
+        return {
+            'id': run.id,
+            'created': run.created,
+            'metadata': run.metadata,
+            'total_request': result.total_request,
+            'success_request': result.success_request,
+            'qps': result.qps,
+            'latency': result.latency,
+            'p50': result.histogram.percentile(50),
+            'p90': result.histogram.percentile(90),
+            'p99': result.histogram.percentile(99),
+            'statuses': {str(status): count for status, count in result.statuses.items()},
+            'errors': result.errors,
+            'jobs': sorted(result.jobs.keys()),
+            'slaves': sorted(run.slaves.keys()),
+            'series': downsample(series, WEB_SERIES_POINTS)
+        }
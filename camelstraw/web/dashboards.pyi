@@ -0,0 +1,43 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+from aiohttp.web_app import Application
+
+from ..main.launchers import WebLauncher
+
+POINT_FIELDS: Tuple[str, ...]
+
+
+class Dashboard:
+    __app: Application
+    __launcher: WebLauncher
+    __local_mode: bool
+    __sockets: Set[web.WebSocketResponse]
+    __series: List[List[float]]
+    __last: Optional[Tuple[float, Dict, Dict[int, int]]]
+    __finished: Optional[Dict]
+
+    host: str
+    port: int
+
+    def __init__(self, launcher: WebLauncher, host: str, port: int, local_mode: bool=True): pass
+    def start(self) -> None: pass
+    async def __on_startup(self, app: Application) -> None: pass
+    async def __on_shutdown(self, app: Application) -> None: pass
+    async def __page_handler(self, request: web.Request) -> web.Response: pass
+    async def __ws_handler(self, request: web.Request) -> web.WebSocketResponse: pass
+    async def __runs_handler(self, request: web.Request) -> web.Response: pass
+    async def __run_handler(self, request: web.Request) -> web.Response: pass
+    async def __start_handler(self, request: web.Request) -> web.Response: pass
+    async def __stop_handler(self, request: web.Request) -> web.Response: pass
+    async def __push(self) -> None: pass
+    def __point(self, progress: Dict) -> Optional[List[float]]: pass
+    @staticmethod
+    def __totals(progress: Dict) -> Dict: pass
+    def __downsampled(self) -> List[List[float]]: pass
+    def __snapshot(self) -> Dict: pass
+    async def __broadcast(self, message: Dict) -> None: pass
+    @staticmethod
+    def __load_runs(limit: int) -> List[Dict]: pass
+    @staticmethod
+    def __load_run(run_id: int) -> Optional[Dict]: pass
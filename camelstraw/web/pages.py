@@ -0,0 +1,164 @@
+# single page of the dashboard, kept inline so that the package ships no static files
+DASHBOARD_PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>CamelStraw</title>
+<style>
+body { font-family: sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 20px; }
+h2 { font-size: 16px; margin-top: 24px; }
+form label { display: inline-block; margin-right: 12px; }
+textarea { width: 640px; height: 48px; }
+input { width: 80px; }
+#stats span { display: inline-block; min-width: 120px; margin-right: 12px; }
+canvas { border: 1px solid #ccc; }
+table { border-collapse: collapse; }
+td, th { padding: 2px 10px; text-align: right; }
+tr.run { cursor: pointer; }
+tr.run:hover { background: #eef; }
+.error { color: #c00; }
+</style>
+</head>
+<body>
+<h1>CamelStraw</h1>
+<form id="form">
+  <div><textarea id="urls" placeholder="one url per line"></textarea></div>
+  <label>Method <select id="method"><option>HttpGet</option><option>HttpPost</option></select></label>
+  <label>Duration (s) <input id="duration" value="60"></label>
+  <label>Concurrency <input id="concurrency" value="1"></label>
+  <label>Workers <input id="worker_num" placeholder="cpus"></label>
+  <label>Rate (req/s) <input id="rate" placeholder="unlimited"></label>
+  <button type="submit">Start</button>
+  <button type="button" id="stop">Stop</button>
+  <span id="message" class="error"></span>
+</form>
+<h2 id="title">No run</h2>
+<div id="stats"></div>
+<canvas id="chart" width="960" height="320"></canvas>
+<div>QPS <span style="color:#36c">total</span> / <span style="color:#3a3">success</span> /
+  <span style="color:#c33">errors</span>, P99 <span style="color:#999">ms</span></div>
+<h2>Runs</h2>
+<table id="runs"><tr><th>Id</th><th>Created</th><th>Launcher</th><th>Request</th><th>QPS</th>
+  <th>P50</th><th>P90</th><th>P99</th></tr></table>
+<script>
+var series = [], live = true;
+
+function $(id) { return document.getElementById(id); }
+
+function stats(items) {
+  $('stats').innerHTML = items.map(function (item) {
+    return '<span>' + item[0] + ': <b>' + item[1] + '</b></span>';
+  }).join('');
+}
+
+function draw() {
+  var canvas = $('chart'), ctx = canvas.getContext('2d');
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  if (series.length < 2) return;
+  var x0 = series[0][0], x1 = series[series.length - 1][0] || 1;
+  var top = Math.max.apply(null, series.map(function (p) { return p[1]; })) || 1;
+  var late = series[0].length > 6 ?
+    Math.max.apply(null, series.map(function (p) { return p[6]; })) || 1 : 0;
+  function line(index, color, scale) {
+    ctx.strokeStyle = color;
+    ctx.beginPath();
+    series.forEach(function (p, i) {
+      var x = (p[0] - x0) / Math.max(x1 - x0, 1) * (canvas.width - 20) + 10;
+      var y = canvas.height - 10 - p[index] / scale * (canvas.height - 20);
+      if (i === 0) ctx.moveTo(x, y); else ctx.lineTo(x, y);
+    });
+    ctx.stroke();
+  }
+  line(1, '#36c', top);
+  line(2, '#3a3', top);
+  line(3, '#c33', top);
+  if (late) line(6, '#999', late);
+  ctx.fillStyle = '#222';
+  ctx.fillText(top + ' req/s', 12, 14);
+  if (late) ctx.fillText(late + ' ms', canvas.width - 60, 14);
+}
+
+function finished(run) {
+  if (!run) return;
+  $('title').textContent = 'Finished run ' + (run.id || run.run);
+  stats([['Request', run.success_request + '/' + run.total_request], ['QPS', run.qps],
+         ['P50', run.p50 + ' ms'], ['P90', run.p90 + ' ms'], ['P99', run.p99 + ' ms'],
+         ['Errors', JSON.stringify(run.errors)]]);
+  runs();
+}
+
+function connect() {
+  var ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/ws');
+  ws.onmessage = function (event) {
+    var data = JSON.parse(event.data);
+    if (data.type === 'snapshot') {
+      if (data.run) {
+        live = true;
+        series = data.series;
+        $('title').textContent = 'Running ' + data.run.method + ' ' + data.run.urls.join(', ');
+      } else {
+        finished(data.finished);
+      }
+    } else if (data.type === 'series' && live) {
+      series = data.series;
+    } else if (data.type === 'point' && live) {
+      if (data.append) series.push(data.point);
+      var t = data.totals;
+      stats([['Request', t.success_request + '/' + t.total_request], ['QPS', data.point[1]],
+             ['Errors', t.errors], ['MB', (t.bytes / 1048576).toFixed(1)],
+             ['P50', t.p50 + ' ms'], ['P90', t.p90 + ' ms'], ['P99', t.p99 + ' ms']]);
+    } else if (data.type === 'finished') {
+      finished(data.run);
+    }
+    draw();
+  };
+  ws.onclose = function () { setTimeout(connect, 1000); };
+}
+
+function runs() {
+  fetch('/api/runs').then(function (r) { return r.json(); }).then(function (rows) {
+    var table = $('runs');
+    while (table.rows.length > 1) table.deleteRow(1);
+    rows.forEach(function (run) {
+      var row = table.insertRow();
+      row.className = 'run';
+      [run.id, new Date(run.created).toLocaleString(), run.metadata.launcher || '-',
+       run.success_request + '/' + run.total_request, run.qps, run.p50, run.p90, run.p99].forEach(function (v) {
+        row.insertCell().textContent = v;
+      });
+      row.onclick = function () { show(run.id); };
+    });
+  });
+}
+
+function show(id) {
+  fetch('/api/runs/' + id).then(function (r) { return r.json(); }).then(function (run) {
+    live = false;
+    series = run.series;
+    $('title').textContent = 'Run ' + run.id + ' (' + new Date(run.created).toLocaleString() + ')';
+    stats([['Request', run.success_request + '/' + run.total_request], ['QPS', run.qps],
+           ['P50', run.p50 + ' ms'], ['P90', run.p90 + ' ms'], ['P99', run.p99 + ' ms'],
+           ['Statuses', JSON.stringify(run.statuses)], ['Errors', JSON.stringify(run.errors)]]);
+    draw();
+  });
+}
+
+$('form').onsubmit = function (event) {
+  event.preventDefault();
+  $('message').textContent = '';
+  var body = {urls: $('urls').value.split('\\n'), method: $('method').value, duration: $('duration').value,
+              concurrency: $('concurrency').value, worker_num: $('worker_num').value, rate: $('rate').value};
+  fetch('/api/runs', {method: 'POST', body: JSON.stringify(body)}).then(function (r) {
+    return r.json().then(function (data) { if (!r.ok) $('message').textContent = data.error; });
+  });
+};
+
+$('stop').onclick = function () { fetch('/api/stop', {method: 'POST'}); };
+
+connect();
+runs();
+</script>
+</body>
+</html>
+'''
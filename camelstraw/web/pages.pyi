@@ -0,0 +1 @@
+DASHBOARD_PAGE: str
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+import time
+
+# wall clock targets (seconds) on top of a bare interpreter, measured as the best of several runs
+IMPORT_TARGET = 0.02
+CLI_TARGET = 0.1
+ROUNDS = 5
+
+COMMANDS = {
+    'import camelstraw': 'import camelstraw',
+    'cmd_main --help': "import sys; sys.argv = ['cmd_main', '--help']; from camelstraw import cmd_main; cmd_main()",
+    'compare_main --help': "import sys; sys.argv = ['compare_main', '--help']; "
+                               "from camelstraw import compare_main; compare_main()",
+    'target_main --help': "import sys; sys.argv = ['target_main', '--help']; "
+                          "from camelstraw import target_main; target_main()",
+}
+
+
+def measure(code):
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], stdout=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    interpreter = measure('pass')
+    failed = False
+    for name, code in COMMANDS.items():
+        target = IMPORT_TARGET if name.startswith('import') else CLI_TARGET
+        elapsed = measure(code) - interpreter
+        failed = failed or elapsed > target
+        print('%-24s %6.1f ms  (target %d ms)' % (name, elapsed * 1000, target * 1000))
+    # heavy dependencies must not be loaded by importing the package
+    code = "import sys, camelstraw; print(' '.join(m for m in ('aiohttp', 'dill', 'apscheduler', 'numpy') " \
+           "if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, check=True).stdout.decode().strip()
+    print('loaded by import: %s' % (loaded or 'none'))
+    sys.exit(1 if failed or loaded else 0)
@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+from camelstraw.core.templates import compile_url, compile_data, compile_mapping
+
+# cost of rendering a request (seconds), measured as the best of several runs
+RENDER_TARGET = 0.000005
+ROUNDS = 5
+NUMBER = 100000
+
+
+def measure(render):
+    return min(timeit.repeat(render, number=NUMBER, repeat=ROUNDS)) / NUMBER
+
+
+if __name__ == '__main__':
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+        file.write('\n'.join('user-%s' % index for index in range(1000)))
+    try:
+        cases = {
+            'constant url': compile_url('http://127.0.0.1/api/items?page=1'),
+            'url counter': compile_url('http://127.0.0.1/api/items/{{counter}}'),
+            'url random & choice': compile_url('http://127.0.0.1/api/items/{{random 1 100000}}?user={{choice %s}}'
+                                               % file.name),
+            'headers uuid': compile_mapping({'X-Request-Id': '{{uuid}}', 'Accept': 'application/json'}),
+            'json body': compile_data({'id': '{{counter}}', 'user': '{{choice %s}}' % file.name,
+                                       'at': '{{time ms}}', 'tags': ['a', 'b']}, encode=True),
+            'json.dumps baseline': lambda: json.dumps({'id': 1, 'user': 'user-1', 'at': 0, 'tags': ['a', 'b']})
+                                                .encode()
+        }
+        failed = False
+        for name, render in cases.items():
+            elapsed = measure(render)
+            failed = failed or elapsed > RENDER_TARGET
+            print('%-24s %6.2f us  (target %d us)' % (name, elapsed * 1000000, RENDER_TARGET * 1000000))
+    finally:
+        os.remove(file.name)
+    sys.exit(1 if failed else 0)
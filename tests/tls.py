@@ -0,0 +1,83 @@
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Process
+
+from aiohttp import web
+
+from camelstraw import HttpGetJob, TlsOptions
+from camelstraw.core import DirectMaster
+
+HOST = 'localhost'
+PORT = 8443
+# requests of every mode, sent one at a time by a single worker
+REQUESTS = 200
+
+
+def make_certificate(directory):
+    """
+    a self-signed certificate of localhost, by the openssl command line
+    :param directory:
+    :return: paths of the certificate and the key
+    """
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=%s' % HOST,
+                    '-addext', 'subjectAltName=DNS:%s' % HOST, '-keyout', key, '-out', cert],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return cert, key
+
+
+def start_server(cert, key):
+
+    async def handler(request):
+        return web.Response(text='ok')
+
+    app = web.Application()
+    app.add_routes([web.get('/', handler)])
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    web.run_app(app, host=HOST, port=PORT, ssl_context=context, print=None)
+
+
+def handshakes(tls):
+    job = HttpGetJob('https://%s:%s/' % (HOST, PORT), tls=tls)
+    master = DirectMaster(job, worker_num=1, requests=REQUESTS)
+    master.start()
+    result = master.wait()
+    master.close()
+    counters = next(iter(result.tls.values()))
+    return result.success_request, counters['full'], counters['resumed'], counters['failed']
+
+
+if __name__ == '__main__':
+    directory = tempfile.mkdtemp()
+    cert, key = make_certificate(directory)
+    server = Process(target=start_server, args=(cert, key), daemon=True)
+    server.start()
+    time.sleep(1)
+    try:
+        cases = {
+            # a kept alive connection does a single full handshake
+            'default': (TlsOptions(ca_file=cert), lambda full, resumed: full == 1 and resumed == 0),
+            # every connection but the first resumes the session of the previous one
+            'reconnect=True': (TlsOptions(ca_file=cert, reconnect=True),
+                               lambda full, resumed: full + resumed == REQUESTS and resumed > full),
+            # every connection does a full handshake
+            'resumption=False': (TlsOptions(ca_file=cert, reconnect=True, resumption=False),
+                                 lambda full, resumed: full == REQUESTS and resumed == 0)
+        }
+        failed = False
+        for name, (tls, expected) in cases.items():
+            success, full, resumed, errors = handshakes(tls)
+            passed = success == REQUESTS and errors == 0 and expected(full, resumed)
+            failed = failed or not passed
+            print('%-18s %4s/%s ok, %4s full, %4s resumed, %s failed  %s'
+                  % (name, success, REQUESTS, full, resumed, errors, 'pass' if passed else 'FAIL'))
+    finally:
+        server.terminate()
+        shutil.rmtree(directory)
+    sys.exit(1 if failed else 0)